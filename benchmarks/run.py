@@ -0,0 +1,425 @@
+"""Mediciones de rendimiento de las rutas críticas.
+
+Mide, sobre una base sintética (ver benchmarks/synthetic.py), las plantillas
+de mensajes, el reporte HTML, los enlaces de la página de exportación, las
+consultas con filtros y la extracción de fichas desde páginas guardadas en
+benchmarks/fixtures. Cada medición se repite por rondas; el resultado se
+guarda en JSON (benchmarks/results/) y puede compararse con uno anterior
+para detectar regresiones: se comparan las medianas y una regresión solo
+cuenta si se repite al medir de nuevo.
+
+Ejemplos::
+
+    python -m benchmarks.synthetic --contactos 1000000 --export-logs 3000000
+    python -m benchmarks.run
+    python -m benchmarks.run --comparar benchmarks/results/base.json
+    python -m benchmarks.run --filtro consulta --rondas 10
+"""
+import argparse
+import fnmatch
+import io
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks import synthetic
+from src import exports, frames, links, migrations, queries, query_cache, report, search, templates
+from src.db import connect
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+ROUNDS = 5
+MIN_TIME = 0.2      # segundos mínimos por ronda; las funciones rápidas se repiten
+THRESHOLD = 0.10    # una medición 10 % más lenta que la base es una regresión
+PAGE_ROWS = 250     # la página más grande de Exportar (PAGE_SIZES en src/app.py)
+REPORT_ROWS = 1000  # contactos del reporte en memoria (generate_html)
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Registra una medición: ``preparar(entorno)`` retorna la función a medir."""
+    def register(prepare):
+        BENCHMARKS[name] = prepare
+        return prepare
+    return register
+
+
+class Entorno:
+    """Base sintética y datos comunes a las mediciones."""
+
+    def __init__(self, path, workdir):
+        self.path = path
+        self.workdir = workdir
+        self.con = connect(path)
+        migrations.migrate(self.con)
+        self.mensajes = [texto for texto, in self.con.execute("SELECT descripcion FROM mensajes ORDER BY id")]
+        self.mensaje_ids = [i for i, in self.con.execute("SELECT id FROM mensajes ORDER BY id")]
+        # El link con más contactos: el peor caso de la página de exportación
+        self.link_id = self.con.execute(
+            "SELECT id_link FROM contactos GROUP BY id_link ORDER BY COUNT(*) DESC LIMIT 1"
+        ).fetchone()[0]
+
+    def frame(self, query, params=None):
+        return frames.read_frame(self.con, query, params)
+
+    def sizes(self):
+        return {
+            tabla: self.con.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+            for tabla in ("links_contactos", "contactos", "mensajes", "export_logs")
+        }
+
+    def close(self):
+        self.con.close()
+
+
+# =============================================================================
+# MEDICIONES
+# =============================================================================
+@benchmark("plantillas.apply_template")
+def bench_apply_template(env):
+    contacto = env.frame(queries.CONTACTO_POR_ID, (1,)).iloc[0].to_dict()
+    texto = env.mensajes[0]
+    return lambda: templates.apply_template(texto, contacto)
+
+
+@benchmark("reporte.generate_html")
+def bench_generate_html(env):
+    data = env.frame(*search.build_contact_query(env.con, link_id=env.link_id, limit=REPORT_ROWS))
+    return lambda: report.generate_html(data, env.mensajes)
+
+
+@benchmark("reporte.write_report (link completo)")
+def bench_write_report(env):
+    query, params = search.build_contact_query(env.con, link_id=env.link_id)
+    return lambda: report.write_report(io.BytesIO(), env.con, query, params, env.mensajes)
+
+
+@benchmark("exportacion.pagina (enlaces)")
+def bench_export_page(env):
+    # Lo que arma la página Exportar por cada página de la grilla
+    query, params = search.build_contact_query(
+        env.con, link_id=env.link_id, order_by="id", limit=PAGE_ROWS + 1
+    )
+    pagina = env.frame(query, params).iloc[:PAGE_ROWS]
+    return lambda: links.build_links(pagina, env.mensajes, env.mensaje_ids, start=PAGE_ROWS)
+
+
+@benchmark("exportacion.registro (filas)")
+def bench_export_rows(env):
+    # Lo que reúnen los trabajos de exportación mientras escriben el archivo
+    query, params = search.build_contact_query(env.con, link_id=env.link_id)
+
+    def reunir():
+        registro = exports.SelectionRecorder(env.mensajes, env.mensaje_ids)
+        for bloque in report.cursor_batches(env.con.execute(query, params)):
+            registro.add(bloque, len(registro.links))
+        return registro.rows()
+    return reunir
+
+
+@benchmark("exportacion.registro (insertar)")
+def bench_export_log(env):
+    # Lo que hace el escritor al descargar; se registra en una base aparte
+    query, params = search.build_contact_query(env.con, link_id=env.link_id)
+    registro = exports.SelectionRecorder(env.mensajes, env.mensaje_ids)
+    for bloque in report.cursor_batches(env.con.execute(query, params)):
+        registro.add(bloque, len(registro.links))
+    filas = registro.rows()
+    digest = exports.selection_hash(*filas, "HTML")
+    con = connect(os.path.join(env.workdir, "registro.db"))
+    migrations.migrate(con)
+
+    def registrar():
+        exports.log_export(con, *filas, formato="HTML", digest=digest)
+        with con:
+            con.execute("DELETE FROM export_logs")
+            con.execute("DELETE FROM export_batches")
+    return registrar
+
+
+def _filter_query(name, **filters):
+    @benchmark(f"consulta.{name}")
+    def prepare(env):
+        query, params = search.build_contact_query(
+            env.con, link_id=env.link_id, order_by="id", limit=PAGE_ROWS + 1, **filters
+        )
+        return lambda: frames.read_frame(env.con, query, params)
+    return prepare
+
+
+_filter_query("pagina")
+_filter_query("nombre (texto completo)", nombre="gonz")
+_filter_query("auto (subcadena corta)", auto="ri")
+_filter_query("telefono", telefono="912")
+
+
+@benchmark("consulta.conteo_filtrado")
+def bench_count(env):
+    query, params = search.build_count_query(env.con, link_id=env.link_id, nombre="gonz")
+    return lambda: frames.read_frame(env.con, query, params)
+
+
+@benchmark("consulta.cache (acierto)")
+def bench_cache_hit(env):
+    cache = query_cache.QueryCache(env.path)
+    query, params = search.build_contact_query(env.con, link_id=env.link_id, limit=PAGE_ROWS)
+    cache.read(query, params)
+    return lambda: cache.read(query, params)
+
+
+def _page_query(name, params):
+    @benchmark(f"consulta.{name}")
+    def prepare(env):
+        query = queries.PAGE_QUERIES[name][0]
+        return lambda: env.con.execute(query, params(env)).fetchall()
+    return prepare
+
+
+_page_query("resumen_exportaciones_contacto", lambda env: (1,))
+_page_query("exportaciones_por_mensaje", lambda env: (env.mensaje_ids[0],))
+
+
+def _ficha():
+    with open(os.path.join(FIXTURES, "ficha.html"), "rb") as fh:
+        return fh.read()
+
+
+@benchmark("scraping.parse_vehicle_page")
+def bench_parse(env):
+    from src import scraping
+
+    body = _ficha()
+    return lambda: scraping.parse_vehicle_page(body)
+
+
+def _scrape(env, warm):
+    from src import scraping
+    from src.http_cache import ResponseCache
+    from src.images import ImageStore
+
+    url = "https://www.chileautos.cl/vehiculos/detalles/2019-toyota-rav4/CP-AD-1"
+    body = _ficha()
+    cache = ResponseCache(os.path.join(env.workdir, "http_cache.db"), ttl=10 ** 9)
+    store = ImageStore(os.path.join(env.workdir, "imagenes"))
+    cache.put(url, body)
+    if warm:
+        scraping.scrape_vehicle_details(url, cache=cache, store=store)
+        return lambda: scraping.scrape_vehicle_details(url, cache=cache, store=store)
+
+    def cold():
+        # La página está en caché pero sin extraer: se mide extracción + imagen
+        cache.put(url, body)
+        return scraping.scrape_vehicle_details(url, cache=cache, store=store)
+    return cold
+
+
+@benchmark("scraping.scrape_vehicle_details (sin extraer)")
+def bench_scrape_cold(env):
+    return _scrape(env, warm=False)
+
+
+@benchmark("scraping.scrape_vehicle_details (extraída)")
+def bench_scrape_warm(env):
+    return _scrape(env, warm=True)
+
+
+# =============================================================================
+# MEDICIÓN
+# =============================================================================
+def measure(fn, rounds=ROUNDS, min_time=MIN_TIME, clock=time.perf_counter):
+    """Segundos por llamada de ``fn`` en cada ronda.
+
+    Como ``timeit.Timer.autorange``: el número de llamadas por ronda se
+    duplica hasta que una ronda dura al menos ``min_time``.
+    """
+    def ronda(number):
+        inicio = clock()
+        for _ in range(number):
+            fn()
+        return clock() - inicio
+
+    number = 1
+    while True:
+        elapsed = ronda(number)
+        if elapsed >= min_time:
+            break
+        number *= 2
+    tiempos = [elapsed / number] + [ronda(number) / number for _ in range(rounds - 1)]
+    return number, tiempos
+
+
+def summarize(number, tiempos):
+    return {
+        "min": min(tiempos),
+        "median": statistics.median(tiempos),
+        "mean": statistics.fmean(tiempos),
+        "stdev": statistics.stdev(tiempos) if len(tiempos) > 1 else 0.0,
+        "rounds": len(tiempos),
+        "number": number,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=synthetic.ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(path, pattern="*", rounds=ROUNDS, min_time=MIN_TIME, on_result=None, names=None):
+    """Ejecuta las mediciones cuyo nombre calza con ``pattern`` y retorna el resultado.
+
+    Con ``names`` solo se ejecutan las mediciones de esa lista.
+    """
+    with tempfile.TemporaryDirectory(prefix="bench_") as workdir:
+        env = Entorno(path, workdir)
+        try:
+            resultados = {}
+            for name, prepare in BENCHMARKS.items():
+                if not fnmatch.fnmatch(name, pattern) and pattern not in name:
+                    continue
+                if names is not None and name not in names:
+                    continue
+                try:
+                    fn = prepare(env)
+                except ImportError as e:
+                    # Dependencia opcional ausente (por ejemplo, la extracción)
+                    resultados[name] = {"skipped": str(e)}
+                else:
+                    resultados[name] = summarize(*measure(fn, rounds, min_time))
+                if on_result:
+                    on_result(name, resultados[name])
+            return {
+                "meta": {
+                    "fecha": datetime.now().isoformat(timespec="seconds"),
+                    "commit": git_commit(),
+                    "python": platform.python_version(),
+                    "sqlite": sqlite3.sqlite_version,
+                    "plataforma": platform.platform(),
+                    "base": os.path.abspath(path),
+                    "tamanos": env.sizes(),
+                },
+                "resultados": resultados,
+            }
+        finally:
+            env.close()
+
+
+def compare(base, actual):
+    """``[(nombre, base, actual, razón, razón_mínima)]`` de las mediciones presentes en ambos.
+
+    Se comparan las medianas de las rondas; ``razón_mínima`` compara la ronda
+    más rápida de ``actual`` con la mediana de la base (ver ``regressions``).
+    """
+    filas = []
+    for name, medida in actual["resultados"].items():
+        anterior = base["resultados"].get(name)
+        if not anterior or "median" not in anterior or "min" not in medida:
+            continue
+        filas.append((
+            name, anterior["median"], medida["median"],
+            medida["median"] / anterior["median"], medida["min"] / anterior["median"],
+        ))
+    return filas
+
+
+def regressions(filas, threshold=THRESHOLD):
+    """Filas de ``compare`` más de ``threshold`` más lentas que la base.
+
+    Además de la mediana, incluso la ronda más rápida tiene que superar el
+    umbral: una sola ronda lenta por ruido de la máquina no basta.
+    """
+    return [fila for fila in filas if fila[3] > 1 + threshold and fila[4] > 1 + threshold]
+
+
+def _format_time(segundos):
+    for unidad, escala in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if segundos >= escala:
+            return f"{segundos / escala:.3g} {unidad}"
+    return f"{segundos / 1e-9:.3g} ns"
+
+
+def _print_result(name, medida):
+    if "skipped" in medida:
+        print(f"{name:55} omitida: {medida['skipped']}")
+    else:
+        print(f"{name:55} {_format_time(medida['min']):>10} (mediana {_format_time(medida['median'])})")
+
+
+# =============================================================================
+# LÍNEA DE COMANDOS
+# =============================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide las rutas críticas sobre una base sintética.")
+    parser.add_argument("--db", default=synthetic.DEFAULT_PATH,
+                        help="Base sintética (se genera con los valores por defecto si no existe).")
+    parser.add_argument("--filtro", default="*", help="Solo las mediciones cuyo nombre calce (glob o texto).")
+    parser.add_argument("--rondas", type=int, default=ROUNDS,
+                        help=f"Rondas por medición (al comparar, al menos {ROUNDS}).")
+    parser.add_argument("--tiempo-minimo", type=float, default=MIN_TIME,
+                        help="Segundos mínimos por ronda.")
+    parser.add_argument("--salida", "-o", help="Archivo JSON (por defecto en benchmarks/results/).")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior con que comparar.")
+    parser.add_argument("--umbral", type=float, default=THRESHOLD,
+                        help="Fracción de lentitud que se considera regresión (0.10 = 10 %%).")
+    args = parser.parse_args(argv)
+
+    base = None
+    rondas = args.rondas
+    if args.comparar:
+        # Se lee antes de medir: la salida puede ser el mismo archivo
+        with open(args.comparar, encoding="utf-8") as fh:
+            base = json.load(fh)
+        # Con pocas rondas la mediana no es estable
+        rondas = max(rondas, ROUNDS)
+    if not os.path.exists(args.db):
+        print(f"Generando la base sintética {args.db}...", file=sys.stderr)
+        synthetic.populate(args.db)
+    resultado = run(args.db, args.filtro, rondas, args.tiempo_minimo, on_result=_print_result)
+
+    salida = args.salida
+    if salida is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        nombre = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if resultado["meta"]["commit"]:
+            nombre += "_" + resultado["meta"]["commit"]
+        salida = os.path.join(RESULTS_DIR, nombre + ".json")
+    with open(salida, "w", encoding="utf-8") as fh:
+        json.dump(resultado, fh, indent=2, ensure_ascii=False)
+    print(f"Resultados: {salida}")
+
+    if base is not None:
+        filas = compare(base, resultado)
+        for name, anterior, actual, razon, _ in filas:
+            print(f"{name:55} {_format_time(anterior):>10} -> {_format_time(actual):>10} ({razon:.2f}x)")
+        lentas = regressions(filas, args.umbral)
+        if lentas:
+            # Solo cuenta la regresión que se repite al medir de nuevo
+            print(f"Midiendo de nuevo {len(lentas)} posibles regresiones...", file=sys.stderr)
+            repetido = run(
+                args.db, args.filtro, rondas, args.tiempo_minimo,
+                names={fila[0] for fila in lentas},
+            )
+            lentas = regressions(compare(base, repetido), args.umbral)
+            for name, anterior, actual, razon, _ in lentas:
+                print(f"{name:55} {_format_time(anterior):>10} -> {_format_time(actual):>10} ({razon:.2f}x)")
+        if lentas:
+            print(f"Regresiones: {len(lentas)} (más de {args.umbral:.0%} más lentas)", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""Base de datos sintética para las mediciones de rendimiento.
+
+Llena una base nueva (por defecto benchmarks/data/datos_consignacion.db) con
+el esquema de src/migrations.py y volúmenes configurables de links,
+contactos, mensajes y registros de exportación, con una semilla fija para
+que dos corridas generen los mismos datos. Nunca escribe en la base real de
+la aplicación.
+
+Ejemplos::
+
+    python -m benchmarks.synthetic
+    python -m benchmarks.synthetic --contactos 1000000 --export-logs 3000000
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from src.db import connect
+from src.migrations import migrate
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_PATH = os.path.join(ROOT, "benchmarks", "data", "datos_consignacion.db")
+# Base de la aplicación: el generador se niega a tocarla
+PROTECTED_PATH = os.path.join(ROOT, "data", "datos_consignacion.db")
+
+BATCH_ROWS = 50000      # filas por transacción
+LOGS_PER_BATCH = 1000   # registros de export_logs por exportación (export_batches)
+FIRST_DAY = date(2024, 1, 1)
+
+NOMBRES = (
+    "Juan", "María", "José", "Ana", "Luis", "Carmen", "Pedro", "Rosa", "Jorge", "Camila",
+    "Diego", "Valentina", "Felipe", "Francisca", "Matías", "Javiera", "Cristián", "Daniela",
+)
+APELLIDOS = (
+    "González", "Muñoz", "Rojas", "Díaz", "Pérez", "Soto", "Contreras", "Silva",
+    "Martínez", "Sepúlveda", "Morales", "Rodríguez", "López", "Fuentes", "Hernández",
+)
+MARCAS = {
+    "Toyota": ("RAV4", "Yaris", "Corolla", "Hilux"),
+    "Chevrolet": ("Sail", "Spark", "Tracker", "Colorado"),
+    "Hyundai": ("Accent", "Tucson", "Santa Fe", "i10"),
+    "Kia": ("Rio", "Morning", "Sportage", "Cerato"),
+    "Nissan": ("Versa", "Kicks", "Navara", "X-Trail"),
+    "Suzuki": ("Swift", "Baleno", "Vitara", "Jimny"),
+}
+MENSAJES = (
+    "Hola {nombre}, vi su {auto} publicado. ¿Sigue disponible?",
+    "Buenas tardes {nombre}, ¿le interesa consignar su {auto} con nosotros?",
+    "Estimado/a {nombre}: tenemos compradores para su {auto} de {precio}.",
+)
+
+
+def _check_path(path):
+    if os.path.abspath(path) == PROTECTED_PATH:
+        raise ValueError(f"No se generan datos sintéticos en la base de la aplicación ({path})")
+
+
+def _remove(path):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def _chunks(rows, size=BATCH_ROWS):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _insert(con, sql, rows):
+    for chunk in _chunks(rows):
+        with con:
+            con.executemany(sql, chunk)
+
+
+def _contactos(rnd, contactos, links):
+    modelos = [(marca, modelo) for marca, lista in MARCAS.items() for modelo in lista]
+    for i in range(1, contactos + 1):
+        marca, modelo = rnd.choice(modelos)
+        anio = rnd.randint(2005, 2024)
+        yield (
+            f"https://www.chileautos.cl/vehiculos/detalles/{anio}-{marca.lower()}-{i}",
+            f"9{rnd.randrange(10 ** 8):08d}",
+            f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)}",
+            f"{anio} {marca} {modelo}",
+            float(rnd.randrange(3000, 40000) * 1000),
+            f"{marca} {modelo} {anio}, {rnd.randrange(5, 250)}.000 km, único dueño.",
+            (i - 1) % links + 1,
+        )
+
+
+def _export_logs(rnd, export_logs, contactos, mensajes):
+    """Registros de exportaciones de ``LOGS_PER_BATCH`` contactos consecutivos."""
+    for inicio in range(0, export_logs, LOGS_PER_BATCH):
+        batch_id = inicio // LOGS_PER_BATCH + 1
+        fecha = (FIRST_DAY + timedelta(days=batch_id % 600)).isoformat()
+        primero = rnd.randrange(contactos)
+        for k in range(min(LOGS_PER_BATCH, export_logs - inicio)):
+            contact_id = (primero + k) % contactos + 1
+            yield (
+                contact_id,
+                (batch_id + k) % mensajes + 1,
+                f"https://wa.me/569{contact_id:08d}?text=Hola%20{contact_id}",
+                fecha,
+                batch_id,
+            )
+
+
+def populate(path=DEFAULT_PATH, links=50, contactos=10000, export_logs=100000,
+             mensajes=len(MENSAJES), seed=1, overwrite=True):
+    """Crea en ``path`` una base sintética y retorna ``{tabla: filas}``.
+
+    Los contactos se reparten por igual entre los links; los registros de
+    exportación se agrupan en exportaciones (``export_batches``) de
+    ``LOGS_PER_BATCH`` contactos, repartidas en distintos días.
+    """
+    _check_path(path)
+    if os.path.exists(path):
+        if not overwrite:
+            raise FileExistsError(path)
+        _remove(path)
+    if contactos < 1 or links < 1 or mensajes < 1:
+        raise ValueError("Se necesita al menos un link, un contacto y un mensaje")
+
+    rnd = random.Random(seed)
+    con = connect(path)
+    try:
+        migrate(con)
+        _insert(
+            con,
+            "INSERT INTO links_contactos (id, link_general, fecha_creacion, marca, descripcion) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                (
+                    i, f"https://www.chileautos.cl/vehiculos/?q=lote{i}",
+                    (FIRST_DAY + timedelta(days=i)).isoformat(),
+                    rnd.choice(list(MARCAS)), f"Lote sintético {i}",
+                )
+                for i in range(1, links + 1)
+            ),
+        )
+        _insert(
+            con,
+            "INSERT INTO mensajes (id, descripcion) VALUES (?, ?)",
+            ((i + 1, MENSAJES[i % len(MENSAJES)]) for i in range(mensajes)),
+        )
+        _insert(
+            con,
+            "INSERT INTO contactos (link_auto, telefono, nombre, auto, precio, descripcion, id_link) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            _contactos(rnd, contactos, links),
+        )
+        lotes = -(-export_logs // LOGS_PER_BATCH)
+        _insert(
+            con,
+            "INSERT INTO export_batches (id, hash, fecha_exportacion, formato, total, creado) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    b, hashlib.sha256(f"{seed}:{b}".encode()).hexdigest(),
+                    (FIRST_DAY + timedelta(days=b % 600)).isoformat(), "HTML",
+                    min(LOGS_PER_BATCH, export_logs - (b - 1) * LOGS_PER_BATCH),
+                    (FIRST_DAY + timedelta(days=b % 600)).isoformat() + "T12:00:00",
+                )
+                for b in range(1, lotes + 1)
+            ),
+        )
+        _insert(
+            con,
+            "INSERT INTO export_logs (contact_id, mensaje_id, link_generado, fecha_exportacion, batch_id) "
+            "VALUES (?, ?, ?, ?, ?)",
+            _export_logs(rnd, export_logs, contactos, mensajes),
+        )
+        con.execute("ANALYZE")
+        return {
+            tabla: con.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+            for tabla in ("links_contactos", "contactos", "mensajes", "export_batches", "export_logs")
+        }
+    finally:
+        con.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera una base sintética para las mediciones.")
+    parser.add_argument("--db", default=DEFAULT_PATH, help="Base a crear (se reemplaza si existe).")
+    parser.add_argument("--links", type=int, default=50)
+    parser.add_argument("--contactos", type=int, default=10000)
+    parser.add_argument("--export-logs", type=int, default=100000)
+    parser.add_argument("--mensajes", type=int, default=len(MENSAJES))
+    parser.add_argument("--semilla", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    try:
+        filas = populate(
+            args.db, links=args.links, contactos=args.contactos, export_logs=args.export_logs,
+            mensajes=args.mensajes, seed=args.semilla,
+        )
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    for tabla, total in filas.items():
+        print(f"{tabla}: {total}")
+    print(f"Base generada en {time.perf_counter() - inicio:.1f} s: {args.db} "
+          f"({os.path.getsize(args.db) / 1e6:.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,7 @@
+import sys
+
+from src.cli import main
+
+if __name__ == "__main__":
+    # Tareas sin interfaz (carga masiva, exportaciones, mantención); ver src/cli.py
+    sys.exit(main())
@@ -1,14 +1,23 @@
 import streamlit as st
 import sqlite3
-import pandas as pd
 import datetime
-from io import BytesIO
-import requests
-from bs4 import BeautifulSoup
-import re
-import base64
-import urllib.parse
 import os
+import sys
+
+# Con "streamlit run src/app.py" solo la carpeta src queda en sys.path;
+# se agrega la raíz del proyecto para poder importar el paquete src.
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from src.db import data_version, get_connection
+from src.migrations import ensure_schema
+# Solo módulos livianos: pandas, requests, xlsxwriter y el OCR se importan
+# recién cuando una página los necesita (ver src/frames.py y src/excel.py).
+from src import (
+    bulk, excel, exports, images, jobs, links, ocr, queries, query_cache, records, report,
+    search, templates, writer,
+)
 
 # =============================================================================
 # CONFIGURACIÓN BÁSICA Y ESTILOS
@@ -42,251 +51,98 @@ st.markdown(disable_enter_js, unsafe_allow_html=True)
 # =============================================================================
 # CONEXIÓN A LA BASE DE DATOS Y CREACIÓN DE TABLAS
 # =============================================================================
-db_filename = os.path.join('data', 'datos_consignacion.db')
-
-def get_connection():
-    """Retorna una nueva conexión a la base de datos."""
-    os.makedirs('data', exist_ok=True)
-    return sqlite3.connect(db_filename, check_same_thread=False)
-
-# -----------------------------------------------------------------------------
-# MIGRACIÓN DE LA TABLA CONTACTOS
-# -----------------------------------------------------------------------------
-def migrate_contactos_schema():
-    """Ajusta la tabla contactos si el esquema anterior tenia restricciones incorrectas."""
-    with get_connection() as con:
-        cur = con.cursor()
-        # Verificar si la tabla existe
-        cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='contactos'")
-        if not cur.fetchone():
-            return
-
-        # Obtener definición SQL de la tabla
-        cur.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='contactos'")
-        row = cur.fetchone()
-        if not row:
-            return
-        table_sql = row[0].upper()
-
-        telefono_unique = (
-            re.search(r"TELEFONO\s+TEXT\s+UNIQUE", table_sql) or
-            "UNIQUE(\"TELEFONO\"" in table_sql
-        )
-        link_auto_unique = (
-            re.search(r"LINK_AUTO\s+TEXT\s+UNIQUE", table_sql) or
-            "UNIQUE(\"LINK_AUTO\"" in table_sql
-        )
+# get_connection() (src/db.py) entrega una conexión reutilizable del pool del
+# proceso, ya configurada en modo WAL; no debe cerrarse tras cada consulta.
 
-        if telefono_unique or not link_auto_unique:
-            cur.execute("ALTER TABLE contactos RENAME TO contactos_old")
-            cur.execute(
-                """
-                CREATE TABLE contactos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    link_auto TEXT UNIQUE NOT NULL,
-                    telefono TEXT NOT NULL,
-                    nombre TEXT NOT NULL,
-                    auto TEXT NOT NULL,
-                    precio REAL NOT NULL,
-                    descripcion TEXT NOT NULL,
-                    id_link INTEGER,
-                    FOREIGN KEY (id_link) REFERENCES links_contactos(id)
-                )
-                """
-            )
-            cur.execute(
-                """
-                INSERT OR IGNORE INTO contactos (id, link_auto, telefono, nombre, auto, precio, descripcion, id_link)
-                SELECT id, link_auto, telefono, nombre, auto, precio, descripcion, id_link
-                FROM contactos_old
-                """
-            )
-            cur.execute("DROP TABLE contactos_old")
-            con.commit()
-
-def create_tables():
-    """Crea las tablas necesarias si no existen."""
-    with get_connection() as con:
-        cursor = con.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS links_contactos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                link_general TEXT NOT NULL,
-                fecha_creacion TEXT NOT NULL,
-                marca TEXT NOT NULL,
-                descripcion TEXT NOT NULL
-            )
-        ''')
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS contactos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                link_auto TEXT UNIQUE NOT NULL,
-                telefono TEXT NOT NULL,
-                nombre TEXT NOT NULL,
-                auto TEXT NOT NULL,
-                precio REAL NOT NULL,
-                descripcion TEXT NOT NULL,
-                id_link INTEGER,
-                FOREIGN KEY (id_link) REFERENCES links_contactos(id)
-            )
-        ''')
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS mensajes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                descripcion TEXT NOT NULL
-            )
-        ''')
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS export_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                contact_id INTEGER NOT NULL,
-                mensaje_id INTEGER NOT NULL,
-                link_generado TEXT NOT NULL,
-                fecha_exportacion TEXT NOT NULL,
-                FOREIGN KEY (contact_id) REFERENCES contactos(id),
-                FOREIGN KEY (mensaje_id) REFERENCES mensajes(id)
-            )
-        ''')
-        con.commit()
+# Las migraciones (src/migrations.py) se aplican una sola vez por proceso; en
+# los reruns siguientes ensure_schema() retorna de inmediato.
+ensure_schema()
 
-migrate_contactos_schema()
-create_tables()
+def read_query(query, params=None, columns=None):
+    """Ejecuta una consulta SQL y retorna un DataFrame con tipos compactos.
 
-def read_query(query, params=None):
-    """Ejecuta una consulta SQL y retorna un DataFrame."""
-    with get_connection() as con:
-        return pd.read_sql_query(query, con, params=params)
+    ``columns`` limita la lectura a esas columnas. Los resultados quedan en la
+    caché del proceso (src/query_cache.py); las escrituras pasan por el escritor
+    único (src/writer.py), que la invalida tras cada commit.
+    """
+    return query_cache.read_query(query, params, columns)
 
 # =============================================================================
-# FUNCIONES DE SCRAPING
+# TRABAJOS EN SEGUNDO PLANO
 # =============================================================================
-def extract_whatsapp_number(soup):
-    """
-    Extrae el número de WhatsApp de un enlace en la página.
-    
-    Parámetros:
-    - soup (BeautifulSoup): Objeto BeautifulSoup con el contenido HTML parseado.
-    
-    Retorna:
-    - str: Número de WhatsApp sin el prefijo "56" si se encuentra, de lo contrario None.
-    """
-    whatsapp_link = soup.find("a", href=re.compile(r"https://wa\.me/56\d{9}"))
-    if whatsapp_link:
-        match = re.search(r"https://wa\.me/56(\d{9})", whatsapp_link["href"])
-        if match:
-            return match.group(1)  # Extrae solo los 9 dígitos sin el prefijo "56"
-    return None
-
-def scrape_vehicle_details(url):
-    """Extrae detalles de un vehículo desde la URL dada."""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/98.0.4758.102 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'es-ES,es;q=0.9,en-US;q=0.8,en;q=0.7',
-        'Referer': 'https://www.chileautos.cl/'
-    }
+# Las descargas de fichas, la carga masiva y las exportaciones corren en el
+# pool de src/jobs.py; la página solo muestra su avance, así que una respuesta
+# lenta de chileautos no congela el script. Los trabajos se vuelven a
+# encontrar por su tipo y clave, también después de recargar el navegador.
+# Una ficha descargada se reutiliza durante este tiempo (segundos).
+SCRAPE_JOB_MAX_AGE = 3600
+
+
+def enviar_trabajo(tipo, func, *args, clave=None, **kwargs):
+    """Envía un trabajo al pool del proceso y retorna su id (None si la cola está llena)."""
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code != 200:
-            st.error(f"Error al obtener la página: {response.status_code}")
-            return None
-    except requests.RequestException as e:
-        st.error(f"Error de conexión: {e}")
+        return jobs.get_runner().submit(tipo, func, *args, clave=clave, **kwargs)
+    except jobs.JobQueueFull as e:
+        st.warning(str(e))
         return None
-    soup = BeautifulSoup(response.content, "html.parser")
-    # Extraer imagen de contacto
-    contact_img_tag = soup.find("img", src=lambda src: src and src.startswith("data:image"))
-    if contact_img_tag:
-        img_src = contact_img_tag.get("src", "")
-        if "base64," in img_src:
-            base64_data = img_src.split("base64,", 1)[1].strip()
-            base64_data = "".join(base64_data.split())
-            try:
-                image_bytes = base64.b64decode(base64_data)
-                os.makedirs('data', exist_ok=True)
-                img_path = os.path.join('data', 'contact_image.png')
-                with open(img_path, "wb") as f:
-                    f.write(image_bytes)
-                contact_image_file = img_path
-            except Exception as e:
-                st.error("Error al decodificar la imagen: " + str(e))
-                contact_image_file = "Error al decodificar"
-        else:
-            contact_image_file = "Formato de imagen no reconocido"
-    else:
-        contact_image_file = "No encontrado"
-    
-    # --- Extracción del número de WhatsApp ---
-    whatsapp_number = extract_whatsapp_number(soup)
-
-    # Extraer datos del vehículo
-    nombre, anio, precio = None, None, None
-    vehiculo_elem = soup.find("div", class_="features-item-value-vehculo")
-    if vehiculo_elem:
-        texto_vehiculo = vehiculo_elem.get_text(strip=True)
-        partes = texto_vehiculo.split(" ", 1)
-        if partes and partes[0].isdigit() and len(partes[0]) == 4:
-            anio = partes[0]
-            nombre = partes[1] if len(partes) > 1 else ""
-        else:
-            nombre = texto_vehiculo
-    if not nombre:
-        h1_elem = soup.find("h1")
-        if h1_elem:
-            titulo_texto = h1_elem.get_text(strip=True)
-            partes = titulo_texto.split(" ", 1)
-            if partes and partes[0].isdigit() and len(partes[0]) == 4:
-                anio = partes[0]
-                nombre = partes[1] if len(partes) > 1 else titulo_texto
-            else:
-                nombre = titulo_texto
-    nombre_completo = f"{anio} {nombre}" if anio else nombre
-    precio_elem = soup.find("div", class_="features-item-value-precio")
-    if precio_elem:
-        precio_texto = precio_elem.get_text(strip=True)
-        match = re.search(r"\$(\d{1,3}(?:,\d{3})+)", precio_texto)
-        precio = match.group(1) if match else precio_texto
-    descripcion = "No disponible"
-    descripcion_container = soup.find("div", class_="view-more-container")
-    if descripcion_container:
-        view_more_target = descripcion_container.find("div", class_="view-more-target")
-        if view_more_target:
-            p_elem = view_more_target.find("p")
-            if p_elem:
-                descripcion = p_elem.get_text(strip=True)
-    return {
-        "nombre": nombre_completo if nombre_completo else "No disponible",
-        "anio": anio if anio else "No disponible",
-        "precio": precio if precio else "No disponible",
-        "descripcion": descripcion,
-        "contact_image_file": contact_image_file,
-        "whatsapp_number": whatsapp_number if whatsapp_number else "No disponible"
-    }
+
+
+@st.fragment(run_every=1.0)
+def seguimiento_trabajo(job_id, texto):
+    """Muestra el avance de un trabajo activo; al terminar se redibuja la página."""
+    trabajo = jobs.get_runner().get(job_id)
+    if trabajo is None or trabajo.estado not in jobs.ACTIVE:
+        st.rerun()
+    st.progress(trabajo.progreso, text=trabajo.mensaje or texto)
+    if st.button("Cancelar", key=f"cancelar_{job_id}"):
+        jobs.get_runner().cancel(job_id)
+
+
+def descargar_resultado(trabajo, etiqueta, **kwargs):
+    """Botón de descarga del archivo generado por un trabajo terminado."""
+    resultado = trabajo.resultado or {}
+    try:
+        with open(resultado["archivo"], "rb") as archivo:
+            contenido = archivo.read()
+    except (KeyError, OSError):
+        return False  # el archivo ya se borró: hay que generarlo de nuevo
+    st.download_button(
+        etiqueta,
+        data=contenido,
+        file_name=resultado["nombre"],
+        mime=resultado["mime"],
+        **kwargs,
+    )
+    st.caption(f"Generado el {jobs.fecha(trabajo)}.")
+    return True
+
+
+def estado_trabajo(trabajo, texto):
+    """Muestra el avance, el error o la cancelación de ``trabajo``.
+
+    Retorna True si el trabajo terminó bien (y su resultado puede usarse).
+    """
+    if trabajo is None:
+        return False
+    if trabajo.estado in jobs.ACTIVE:
+        seguimiento_trabajo(trabajo.id, texto)
+    elif trabajo.estado == jobs.ERROR:
+        st.error(trabajo.error)
+    elif trabajo.estado == jobs.CANCELADO:
+        st.info("El trabajo fue cancelado.")
+    return trabajo.estado == jobs.TERMINADO
 
 # =============================================================================
 # FUNCIONES DE ACTUALIZACIÓN Y ELIMINACIÓN EN LA BASE DE DATOS
 # =============================================================================
+# Las escrituras están en src/records.py y pasan por el escritor único
+# (src/writer.py), que las agrupa con las de las demás sesiones. Aquí solo se
+# muestran los errores en la página.
 def update_link_record(link_id, new_link_general, new_fecha, new_marca, new_descripcion):
     """Actualiza un registro en la tabla links_contactos."""
     try:
-        with get_connection() as con:
-            cursor = con.cursor()
-            cursor.execute(
-                """
-                UPDATE links_contactos
-                SET link_general = ?, fecha_creacion = ?, marca = ?, descripcion = ?
-                WHERE id = ?
-                """,
-                (
-                    new_link_general.strip(),
-                    new_fecha.strftime("%Y-%m-%d"),
-                    new_marca.strip(),
-                    new_descripcion.strip(),
-                    link_id,
-                ),
-            )
-            con.commit()
-            return True
+        records.update_link(link_id, new_link_general, new_fecha, new_marca, new_descripcion)
+        return True
     except sqlite3.Error as e:
         st.error(f"Error al actualizar link: {e}")
         return False
@@ -294,28 +150,8 @@ def update_link_record(link_id, new_link_general, new_fecha, new_marca, new_desc
 def update_contact(contact_id, link_auto, telefono, nombre, auto, precio, descripcion):
     """Actualiza un registro en la tabla contactos, limpiando el campo teléfono."""
     try:
-        with get_connection() as con:
-            cursor = con.cursor()
-            telefono = "".join(telefono.split())
-            link_auto = "".join(link_auto.split())
-            cursor.execute(
-                """
-                UPDATE contactos
-                SET link_auto = ?, telefono = ?, nombre = ?, auto = ?, precio = ?, descripcion = ?
-                WHERE id = ?
-                """,
-                (
-                    link_auto,
-                    telefono,
-                    nombre.strip(),
-                    auto.strip(),
-                    float(precio),
-                    descripcion.strip(),
-                    contact_id,
-                ),
-            )
-            con.commit()
-            return True
+        records.update_contact(contact_id, link_auto, telefono, nombre, auto, precio, descripcion)
+        return True
     except Exception as e:
         st.error(f"Error al actualizar el contacto: {e}")
         return False
@@ -323,10 +159,8 @@ def update_contact(contact_id, link_auto, telefono, nombre, auto, precio, descri
 def delete_link_record(link_id):
     """Elimina un registro de la tabla links_contactos."""
     try:
-        with get_connection() as con:
-            con.execute("DELETE FROM links_contactos WHERE id = ?", (link_id,))
-            con.commit()
-            return True
+        records.delete_link(link_id)
+        return True
     except Exception as e:
         st.error(f"Error al eliminar el link: {e}")
         return False
@@ -334,11 +168,8 @@ def delete_link_record(link_id):
 def delete_contact(contact_id):
     """Elimina un registro de la tabla contactos."""
     try:
-        with get_connection() as con:
-            cursor = con.cursor()
-            cursor.execute("DELETE FROM contactos WHERE id = ?", (contact_id,))
-            con.commit()
-            return True
+        records.delete_contact(contact_id)
+        return True
     except Exception as e:
         st.error(f"Error al eliminar el contacto: {e}")
         return False
@@ -349,14 +180,7 @@ def delete_contact(contact_id):
 def add_message(texto):
     """Agrega un nuevo mensaje y retorna su id."""
     try:
-        with get_connection() as con:
-            cur = con.cursor()
-            cur.execute(
-                "INSERT INTO mensajes (descripcion) VALUES (?)",
-                (texto.strip(),),
-            )
-            con.commit()
-            return cur.lastrowid
+        return records.add_message(texto)
     except Exception as e:
         st.error(f"Error al agregar mensaje: {e}")
         return None
@@ -365,14 +189,7 @@ def add_message(texto):
 def update_message(msg_id, nuevo_texto):
     """Actualiza el texto de un mensaje."""
     try:
-        with get_connection() as con:
-            cur = con.cursor()
-            cur.execute(
-                "UPDATE mensajes SET descripcion = ? WHERE id = ?",
-                (nuevo_texto.strip(), msg_id),
-            )
-            con.commit()
-            return cur.rowcount > 0
+        return records.update_message(msg_id, nuevo_texto)
     except Exception as e:
         st.error(f"Error al actualizar el mensaje: {e}")
         return False
@@ -381,58 +198,94 @@ def update_message(msg_id, nuevo_texto):
 def delete_message(msg_id):
     """Elimina un mensaje por id."""
     try:
-        with get_connection() as con:
-            cur = con.cursor()
-            cur.execute("DELETE FROM mensajes WHERE id = ?", (msg_id,))
-            con.commit()
-            return cur.rowcount > 0
+        return records.delete_message(msg_id)
     except Exception as e:
         st.error(f"Error al eliminar el mensaje: {e}")
         return False
 
 # =============================================================================
-# FUNCION: GENERAR ARCHIVO HTML
+# FUNCION: SELECTOR DE LINKS
 # =============================================================================
-def apply_template(template, contacto):
-    """Reemplaza los marcadores de la plantilla con los datos del contacto."""
-    def repl(match):
-        key = match.group(1)
-        return str(contacto.get(key, match.group(0)))
-    return re.sub(r"{(.*?)}", repl, template)
+def selector_link(etiqueta, key, vacio, columns=queries.LINK_OPCION_COLUMNAS, mostrar_tabla=False):
+    """Selector de link con búsqueda.
 
+    Muestra solo las mejores coincidencias del texto buscado (o los links más
+    recientes) y retorna la fila elegida, identificada por su id. Si no hay
+    links que mostrar, avisa (con ``vacio`` si la tabla está vacía) y retorna
+    None.
+    """
+    texto = st.text_input("Buscar link (marca, descripción o URL)", key=f"{key}_buscar")
+    sql, params = search.build_link_query(get_connection(), texto)
+    opciones = read_query(sql, params=params, columns=columns)
+    if opciones.empty:
+        st.warning("Ningún link coincide con la búsqueda." if texto.strip() else vacio)
+        return None
+    if mostrar_tabla:
+        st.dataframe(opciones)
+    etiquetas = dict(zip(
+        opciones['id'].tolist(),
+        (opciones['id'].astype(str) + " - " + opciones['marca'].astype(str)
+         + " - " + opciones['descripcion']).tolist(),
+    ))
+    link_id = st.selectbox(etiqueta, list(etiquetas), format_func=etiquetas.get, key=key)
+    return opciones[opciones['id'] == link_id].iloc[0]
 
-def generate_html(df, message_template):
-    """Genera un archivo HTML con enlaces de WhatsApp.
-
-    Si ``message_template`` es una lista de textos, se rotan en orden para cada
-    contacto. Esto permite que los enlaces no utilicen siempre el mismo mensaje
-    y ayuda a evitar que WhatsApp los marque como spam.
+# =============================================================================
+# FUNCION: REGISTRAR EXPORTACION
+# =============================================================================
+def registrar_exportacion(registro):
+    """Callback de los botones de descarga: registra la sesión de exportación.
+
+    Solo se registra al descargar (no en cada recarga de la página) y la misma
+    selección descargada de nuevo en el mismo formato el mismo día no vuelve a
+    registrarse. ``registro`` lo dejó el trabajo que generó el archivo (ver
+    ``exports.SelectionRecorder``): las filas son las del archivo descargado y
+    el escritor solo las inserta.
     """
-    timestamp = datetime.datetime.now().strftime("%d-%m-%Y_%H%M")
-    html_lines = [
-        "<html>",
-        "<head>",
-        "<title>Enlaces</title>",
-        "</head>",
-        "<body>",
-        f"<h1>REPORTE {timestamp}</h1>"
-    ]
-    templates = message_template if isinstance(message_template, list) else [message_template]
-    for idx, (_, row) in enumerate(df.iterrows(), start=1):
-        telefono = "".join(str(row.get("telefono", "")).split())
-        contacto = row.get("auto") or row.get("nombre", "")
-        template = templates[(idx - 1) % len(templates)]
-        personalizado = apply_template(template, row.to_dict())
-        encoded = urllib.parse.quote(personalizado)
-        link = f"https://wa.me/56{telefono}?text={encoded}"
-        html_lines.append(f'<a href="{link}">CONTACTO {idx}</a> {contacto}<br>')
-    html_lines.extend(["</body>", "</html>"])
-    file_name = f"REPORTE_{timestamp}.html"
-    return "\n".join(html_lines).encode("utf-8"), file_name
+    if not registro:
+        return
+    try:
+        filas = exports.load_rows(registro["archivo"])
+        lote = writer.call(
+            exports.log_export, *filas, formato=registro["formato"], digest=registro["hash"]
+        )
+        st.session_state['ultima_exportacion'] = lote
+    except Exception as e:
+        st.session_state['ultima_exportacion'] = None
+        st.error(f"Error al registrar la exportación: {e}")
+
+
+def pagina_siguiente(grilla, cursor):
+    """Callback: avanza la grilla de contactos a la página que sigue a ``cursor``."""
+    if cursor is not None:
+        grilla['cursores'].append(cursor)
+
+
+def pagina_anterior(grilla):
+    """Callback: vuelve a la página anterior de la grilla de contactos."""
+    if len(grilla['cursores']) > 1:
+        grilla['cursores'].pop()
+
+
+def aceptar_telefono_ocr(link_auto):
+    """Callback: el operador confirma el teléfono leído (con poca confianza) de la imagen."""
+    st.session_state['telefono_ocr_aceptado'] = link_auto
+
+# =============================================================================
+# FUNCION: VALIDAR PLANTILLAS
+# =============================================================================
+def unknown_placeholders(texto):
+    """Marcadores de ``texto`` que no son columnas de contactos."""
+    return templates.unknown_placeholders(get_connection(), texto)
 
 # =============================================================================
 # INTERFAZ DE USUARIO: MENÚ Y NAVEGACIÓN
 # =============================================================================
+# Máximo de coincidencias que muestra la búsqueda por teléfono de "Editar"
+PHONE_SEARCH_LIMIT = 50
+# Opciones de filas por página de la grilla de contactos
+PAGE_SIZES = (25, 50, 100, 250)
+
 if 'page' not in st.session_state:
     st.session_state.page = "Crear Link Contactos"
 
@@ -449,6 +302,19 @@ default_index = menu_options.index(st.session_state.page)
 page = st.sidebar.radio("Ir a:", menu_options, index=default_index)
 st.session_state.page = page
 
+metricas = query_cache.stats()
+st.sidebar.caption(
+    f"Caché de consultas: {metricas['hit_ratio']:.0%} de aciertos "
+    f"({metricas['hits']} aciertos, {metricas['misses']} lecturas, "
+    f"{metricas['invalidations']} invalidaciones)"
+)
+escrituras = writer.stats()
+if escrituras['commits']:
+    st.sidebar.caption(
+        f"Escrituras: {escrituras['commands']} en {escrituras['commits']} commits "
+        f"({escrituras['per_commit']:.1f} por commit)"
+    )
+
 # =============================================================================
 # PÁGINA: CREAR LINK CONTACTOS
 # =============================================================================
@@ -464,13 +330,7 @@ if page == "Crear Link Contactos":
         if not link_general.strip() or not marca.strip() or not descripcion.strip():
             st.error("Todos los campos son requeridos.")
         else:
-            with get_connection() as con:
-                cursor = con.cursor()
-                cursor.execute('''
-                    INSERT INTO links_contactos (link_general, fecha_creacion, marca, descripcion)
-                    VALUES (?, ?, ?, ?)
-                ''', (link_general.strip(), fecha_creacion.strftime("%Y-%m-%d"), marca.strip(), descripcion.strip()))
-                con.commit()
+            records.add_link(link_general, fecha_creacion, marca, descripcion)
             st.success("Link Contactos creado exitosamente.")
 
 # =============================================================================
@@ -478,29 +338,28 @@ if page == "Crear Link Contactos":
 # =============================================================================
 elif page == "Links Contactos":
     st.title("Links de Contactos")
-    df_links = read_query("SELECT * FROM links_contactos")
-    if df_links.empty:
-        st.warning("No existen links.")
-    else:
-        st.dataframe(df_links)
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-            df_links.to_excel(writer, index=False, sheet_name="Links")
+    # El Excel se genera solo al pedirlo y queda en caché hasta que cambien los datos
+    clave_excel = excel.cache_key(queries.LINKS)
+    archivo_excel = excel.cached(clave_excel)
+    if archivo_excel is None and st.button("Preparar Excel"):
+        archivo_excel = excel.export_xlsx(
+            get_connection(), queries.LINKS, sheet_name="Links", key=clave_excel
+        )
+    if archivo_excel is not None:
         st.download_button(
             "Exportar Excel",
-            data=output.getvalue(),
+            data=archivo_excel,
             file_name="links.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            mime=excel.MIME,
+            on_click="ignore",
         )
 
-        opciones = df_links.apply(
-            lambda row: f"{row['id']} - {row['marca']} - {row['descripcion']}",
-            axis=1,
-        )
-        seleccionado = st.selectbox(
-            "Selecciona el Link a modificar o eliminar", opciones)
-        link_id = int(seleccionado.split(" - ")[0])
-        selected = df_links[df_links["id"] == link_id].iloc[0]
+    selected = selector_link(
+        "Selecciona el Link a modificar o eliminar", "links_link", "No existen links.",
+        columns=None, mostrar_tabla=True,
+    )
+    if selected is not None:
+        link_id = int(selected["id"])
         col1, col2 = st.columns(2)
         with col1:
             with st.form("editar_link_manage_form"):
@@ -531,20 +390,44 @@ elif page == "Links Contactos":
 # =============================================================================
 elif page == "Agregar Contactos":
     st.title("Agregar Contactos")
-    df_links = read_query("SELECT * FROM links_contactos")
-    if df_links.empty:
-        st.warning("No existen links. Cree un Link Contactos primero.")
-    else:
-        df_links['display'] = df_links.apply(
-            lambda row: f"{row['marca']} - {row['descripcion']}",
-            axis=1,
-        )
-        opcion = st.selectbox("Selecciona el Link Contactos", df_links['display'])
-        selected_link = df_links[df_links['display'] == opcion].iloc[0]
+    selected_link = selector_link(
+        "Selecciona el Link Contactos", "agregar_link",
+        "No existen links. Cree un Link Contactos primero.",
+    )
+    if selected_link is not None:
         st.markdown(f"**Fecha de Creación:** {selected_link['fecha_creacion']}")
         st.markdown(f"**Marca:** {selected_link['marca']}")
         st.markdown(f"**Descripción:** {selected_link['descripcion']}")
-        link_id = selected_link["id"]
+        # int() evita que el entero de numpy se guarde como BLOB
+        link_id = int(selected_link["id"])
+
+        with st.expander("Carga masiva de links"):
+            urls_texto = st.text_area("Links de autos (uno por línea)", key="bulk_urls")
+            archivo_urls = st.file_uploader(
+                "O sube un archivo .txt / .csv con los links", type=["txt", "csv"], key="bulk_file"
+            )
+            if st.button("Procesar links", key="bulk_submit"):
+                texto = urls_texto
+                if archivo_urls is not None:
+                    texto += "\n" + archivo_urls.getvalue().decode("utf-8", errors="ignore")
+                urls = bulk.parse_url_list(texto)
+                if not urls:
+                    st.warning("No hay links para procesar.")
+                else:
+                    enviar_trabajo("carga_masiva", bulk.import_job, urls, link_id, clave=str(link_id))
+            carga = jobs.get_runner().latest("carga_masiva", str(link_id))
+            if estado_trabajo(carga, "Procesando links..."):
+                resultado = carga.resultado
+                st.success(
+                    f"Última carga ({jobs.fecha(carga)}): {resultado['insertados']} contactos agregados."
+                )
+                if resultado["omitidos"]:
+                    st.info(f"{resultado['omitidos']} links ya estaban registrados y se omitieron.")
+                if resultado["problemas"]:
+                    st.warning(
+                        f"{len(resultado['problemas'])} links no se pudieron agregar; complételos a mano."
+                    )
+                    st.dataframe(resultado["problemas"])
 
         if st.button("Borrar Campos"):
             for k in [
@@ -558,6 +441,10 @@ elif page == "Agregar Contactos":
                 st.session_state[k] = ""
 
         st.text_input("Link del Auto", key="link_auto")
+        force_refresh = st.button(
+            "Volver a descargar",
+            help="Ignora la caché y obtiene nuevamente los datos del link.",
+        )
 
         # Después de obtener el valor del link verifica si existe y ejecuta el scraping
         link_auto_value = "".join(st.session_state.get("link_auto", "").split())
@@ -566,23 +453,56 @@ elif page == "Agregar Contactos":
         if link_auto_value:
             with get_connection() as con:
                 cur = con.cursor()
-                cur.execute(
-                    "SELECT 1 FROM contactos WHERE link_auto = ? LIMIT 1",
-                    (link_auto_value,),
-                )
+                cur.execute(queries.LINK_AUTO_EXISTE, (link_auto_value,))
                 link_exists = cur.fetchone() is not None
             if link_exists:
                 st.warning("El link del auto ya está registrado en la base de datos.")
-            scraped_data = scrape_vehicle_details(link_auto_value)
+            fichas = jobs.get_runner()
+            ficha = fichas.latest("ficha", link_auto_value, max_age=SCRAPE_JOB_MAX_AGE)
+            if ficha is None or force_refresh:
+                from src import scraping  # requests solo se carga al descargar una ficha
+                job_id = enviar_trabajo(
+                    "ficha", scraping.scrape_job, link_auto_value,
+                    clave=link_auto_value, force_refresh=force_refresh,
+                )
+                ficha = fichas.get(job_id) if job_id else None
+            if estado_trabajo(ficha, "Descargando la ficha..."):
+                scraped_data = ficha.resultado or {}
+                if scraped_data.get("contact_image_error"):
+                    st.error(scraped_data["contact_image_error"])
+            if scraped_data.get("from_cache"):
+                st.caption("Datos obtenidos de la caché local.")
+            # El trabajo de la ficha ya leyó el teléfono desde la imagen si no venía
+            lectura = scraped_data.get("telefono_ocr")
+            if lectura and scraped_data.get("whatsapp_number") == lectura["telefono"]:
+                st.caption(
+                    f"Teléfono leído desde la imagen (confianza {lectura['confianza']:.0%}). "
+                    "Verifíquelo antes de guardar."
+                )
+            elif lectura and st.session_state.get("telefono_ocr_aceptado") != link_auto_value:
+                st.warning(
+                    f"Posible teléfono en la imagen: {lectura['telefono']} "
+                    f"(confianza {lectura['confianza']:.0%}, bajo el mínimo de "
+                    f"{ocr.MIN_CONFIDENCE:.0%}). Compárelo con la imagen antes de usarlo."
+                )
+                st.button(
+                    "Usar este teléfono", key="usar_telefono_ocr",
+                    on_click=aceptar_telefono_ocr, args=(link_auto_value,),
+                )
 
         # Prellenar los campos con los datos extraídos (si existen)
         whatsapp_prefill = scraped_data.get("whatsapp_number", "") if scraped_data else ""
+        lectura = scraped_data.get("telefono_ocr")
+        if lectura and st.session_state.get("telefono_ocr_aceptado") == link_auto_value:
+            whatsapp_prefill = lectura["telefono"]
         nombre_prefill = scraped_data.get("nombre", "") if scraped_data else ""
         precio_prefill = scraped_data.get("precio", "") if scraped_data else ""
         descripcion_prefill = scraped_data.get("descripcion", "") if scraped_data else ""
 
-        if scraped_data.get("contact_image_file") and scraped_data["contact_image_file"] != "No encontrado":
-            st.image(scraped_data["contact_image_file"], caption="Imagen de contacto")
+        imagen_hash = scraped_data.get("contact_image_hash")
+        if imagen_hash:
+            # Se sirve desde la memoria del almacén, sin volver a leer el archivo.
+            st.image(images.get_store().get(imagen_hash), caption="Imagen de contacto")
 
         with st.form("agregar_contacto_form"):
             telefono = st.text_input("Teléfono", value=whatsapp_prefill, key="telefono_input")
@@ -603,13 +523,11 @@ elif page == "Agregar Contactos":
                     st.error("Precio inválido. Ejemplo: 10,500,000")
                     st.stop()
                 try:
-                    with get_connection() as con:
-                        cursor = con.cursor()
-                        cursor.execute('''
-                            INSERT INTO contactos (link_auto, telefono, nombre, auto, precio, descripcion, id_link)
-                            VALUES (?, ?, ?, ?, ?, ?, ?)
-                        ''', (link_auto_value, telefono, nombre.strip(), auto_modelo.strip(), precio, descripcion_contacto.strip(), link_id))
-                        con.commit()
+                    records.add_contact(
+                        link_auto_value, telefono, nombre, auto_modelo, precio,
+                        descripcion_contacto, link_id, imagen_hash,
+                    )
+                    images.collect_garbage(get_connection())
                     st.success("Contacto agregado exitosamente.")
                 except sqlite3.IntegrityError:
                     st.error("El link del auto ya existe. Ingrese otro enlace.")
@@ -619,17 +537,12 @@ elif page == "Agregar Contactos":
 # =============================================================================
 elif page == "Ver Contactos & Exportar":
     st.title("Ver Contactos & Exportar")
-    df_links = read_query("SELECT * FROM links_contactos")
-    if df_links.empty:
-        st.warning("No existen links. Cree un Link Contactos primero.")
-    else:
-        df_links['display'] = df_links.apply(
-            lambda row: f"{row['marca']} - {row['descripcion']}",
-            axis=1,
-        )
-        link_selected = st.selectbox("Selecciona el Link Contactos", df_links['display'])
-        selected_link = df_links[df_links['display'] == link_selected].iloc[0]
-        link_id = selected_link["id"]
+    selected_link = selector_link(
+        "Selecciona el Link Contactos", "exportar_link",
+        "No existen links. Cree un Link Contactos primero.",
+    )
+    if selected_link is not None:
+        link_id = int(selected_link["id"])
         st.markdown(f"**Fecha de Creación:** {selected_link['fecha_creacion']}")
         st.markdown(f"**Marca:** {selected_link['marca']}")
         st.markdown(f"**Descripción:** {selected_link['descripcion']}")
@@ -637,85 +550,130 @@ elif page == "Ver Contactos & Exportar":
         filter_nombre = st.text_input("Filtrar por Nombre")
         filter_auto = st.text_input("Filtrar por Auto")
         filter_telefono = st.text_input("Filtrar por Teléfono")
-        query = "SELECT * FROM contactos WHERE id_link = ?"
-        params = [link_id]
-        if filter_nombre:
-            query += " AND nombre LIKE ?"
-            params.append(f"%{filter_nombre}%")
-        if filter_auto:
-            query += " AND auto LIKE ?"
-            params.append(f"%{filter_auto}%")
-        if filter_telefono:
-            query += " AND telefono LIKE ?"
-            params.append(f"%{filter_telefono}%")
-        df_contactos = read_query(query, params=params)
-        st.session_state['df_contactos'] = df_contactos
         st.subheader("Contactos Registrados")
-        mensajes_df = read_query("SELECT * FROM mensajes")
+        col_orden, col_sentido, col_tamano = st.columns(3)
+        orden = col_orden.selectbox("Ordenar por", search.SORT_COLUMNS)
+        descendente = col_sentido.selectbox("Sentido", ("Ascendente", "Descendente")) == "Descendente"
+        tamano = col_tamano.selectbox("Filas por página", PAGE_SIZES, index=1)
+        filtros = dict(
+            link_id=link_id,
+            nombre=filter_nombre,
+            auto=filter_auto,
+            telefono=filter_telefono,
+        )
+        con = get_connection()
+        # Sin límite: la exportación usa el conjunto filtrado completo, en el
+        # mismo orden que la grilla
+        query, params = search.build_contact_query(
+            con, order_by=orden, descending=descendente, **filtros
+        )
+        # La página Mensajes vuelve a armar la consulta desde este descriptor;
+        # la sesión no guarda las filas.
+        st.session_state['seleccion_contactos'] = search.ContactSelection(
+            link_id, filter_nombre, filter_auto, filter_telefono, orden, descendente,
+            data_version(),
+        )
+        total = int(read_query(*search.build_count_query(con, **filtros))['total'].iloc[0])
+
+        # Grilla paginada por clave: solo la página visible se lee y se envía
+        # al navegador. Cambiar filtros u orden vuelve a la primera página.
+        firma = (link_id, filter_nombre, filter_auto, filter_telefono, orden, descendente, tamano)
+        grilla = st.session_state.get('grilla_contactos')
+        if grilla is None or grilla['firma'] != firma:
+            grilla = st.session_state['grilla_contactos'] = {'firma': firma, 'cursores': [None]}
+        inicio = (len(grilla['cursores']) - 1) * tamano
+        pagina_sql, pagina_params = search.build_contact_query(
+            con, order_by=orden, descending=descendente,
+            after=grilla['cursores'][-1], limit=tamano + 1, **filtros
+        )
+        pagina = read_query(pagina_sql, params=pagina_params)
+        hay_siguiente = len(pagina) > tamano
+        pagina = pagina.iloc[:tamano].reset_index(drop=True)
+
+        mensajes_df = read_query(queries.MENSAJES)
         if mensajes_df.empty:
             st.warning("No existen mensajes. Agregue uno en la sección Mensajes.")
-            selected_message = None
         else:
             st.info("Los mensajes se alternarán automáticamente para cada contacto.")
-            templates = mensajes_df['descripcion'].tolist()
+            mensajes_texto = mensajes_df['descripcion'].tolist()
             template_ids = mensajes_df['id'].tolist()
+            if not pagina.empty:
+                # Enlaces de la página, con la rotación que tendrán en la exportación
+                enlaces = links.build_links(pagina, mensajes_texto, template_ids, start=inicio)
+                pagina['whatsapp_link'] = enlaces['whatsapp_link']
+
+        st.dataframe(pagina)
+        col_anterior, col_posicion, col_siguiente = st.columns([1, 3, 1])
+        col_anterior.button(
+            "Anterior", on_click=pagina_anterior, args=(grilla,),
+            disabled=len(grilla['cursores']) == 1,
+        )
+        if total:
+            col_posicion.caption(f"Contactos {inicio + 1}–{inicio + len(pagina)} de {total}")
+        siguiente = search.page_cursor(pagina, orden) if hay_siguiente else None
+        col_siguiente.button(
+            "Siguiente", on_click=pagina_siguiente, args=(grilla, siguiente),
+            disabled=not hay_siguiente,
+        )
 
-        if not df_contactos.empty and not mensajes_df.empty:
-            df_contactos = df_contactos.reset_index(drop=True)
-            links = []
-            ids_asignados = []
-            for i, row in df_contactos.iterrows():
-                template = templates[i % len(templates)]
-                msg_id = template_ids[i % len(template_ids)]
-                personalizado = apply_template(template, row.to_dict())
-                encoded = urllib.parse.quote(personalizado)
-                links.append(
-                    f"https://wa.me/56{''.join(str(row['telefono']).split())}?text={encoded}"
-                )
-                ids_asignados.append(msg_id)
-
-            df_contactos['whatsapp_link'] = links
-            df_contactos['mensaje_id'] = ids_asignados
-            st.dataframe(df_contactos)
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                df_contactos.drop(columns=['mensaje_id']).to_excel(writer, index=False, sheet_name='Contactos')
-
+        if total and not mensajes_df.empty:
+            # Los archivos se asocian a la búsqueda y a la versión de los contactos:
+            # cualquier cambio en ellos obliga a generarlos de nuevo.
+            version = get_connection().execute(queries.VERSION_CONTACTOS).fetchone()[0]
             col1, col2 = st.columns(2)
             with col1:
-                st.download_button(
-                    "Descargar Excel",
-                    data=output.getvalue(),
-                    file_name="contactos.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                )
+                # Se genera en segundo plano desde la base al pedirlo
+                def agregar_enlaces(bloque, inicio):
+                    bloque['whatsapp_link'] = links.build_links(
+                        bloque, mensajes_texto, start=inicio
+                    )['whatsapp_link']
+                    return bloque
+
+                clave = jobs.make_key(query, params, mensajes_texto, version)
+                if st.button("Preparar Excel"):
+                    enviar_trabajo(
+                        "excel", excel.export_job, query, params, clave=clave,
+                        sheet_name='Contactos', transform=agregar_enlaces, total=total,
+                        registro=exports.SelectionRecorder(mensajes_texto, template_ids),
+                    )
+                trabajo = jobs.get_runner().latest_file("excel", clave)
+                if estado_trabajo(trabajo, "Generando Excel..."):
+                    descargar_resultado(
+                        trabajo, "Descargar Excel",
+                        on_click=registrar_exportacion, args=(trabajo.resultado.get("registro"),),
+                    )
             with col2:
-                html_content, html_name = generate_html(df_contactos, templates)
-                st.download_button(
-                    "Generar HTML",
-                    data=html_content,
-                    file_name=html_name,
-                    mime="text/html",
-                )
-
-            with get_connection() as con:
-                for _, row in df_contactos.iterrows():
-                    con.execute(
-                        "INSERT INTO export_logs (contact_id, mensaje_id, link_generado, fecha_exportacion) VALUES (?, ?, ?, ?)",
-                        (row['id'], row['mensaje_id'], row['whatsapp_link'], datetime.date.today().isoformat()),
+                formato = st.selectbox("Formato del reporte HTML", list(report.FORMATS))
+                # El reporte se arma en segundo plano, por bloques desde la base, y
+                # queda en un archivo asociado a la búsqueda que lo generó.
+                clave = jobs.make_key(query, params, mensajes_texto, formato, version)
+                if st.button("Generar HTML"):
+                    enviar_trabajo(
+                        "reporte", report.report_job, query, params, mensajes_texto, formato,
+                        clave=clave, total=total,
+                        registro=exports.SelectionRecorder(mensajes_texto, template_ids),
+                    )
+                trabajo = jobs.get_runner().latest_file("reporte", clave)
+                if estado_trabajo(trabajo, "Generando reporte..."):
+                    descargar_resultado(
+                        trabajo, "Descargar reporte",
+                        on_click=registrar_exportacion, args=(trabajo.resultado.get("registro"),),
                     )
-                con.commit()
-            df_contactos.drop(columns=['mensaje_id'], inplace=True)
-        else:
-            st.dataframe(df_contactos)
+
+            lote = st.session_state.pop('ultima_exportacion', None)
+            if lote is not None:
+                if lote.created:
+                    st.caption(f"Exportación registrada: {lote.total} contactos.")
+                else:
+                    st.caption("Esta selección ya estaba registrada hoy; no se duplicó el registro.")
 
 # =============================================================================
 # PÁGINA: MENSAJES
 # =============================================================================
 elif page == "Mensajes":
     st.title("Plantillas de Mensaje")
-    df_contactos = st.session_state.get('df_contactos')
-    df_mensajes = read_query("SELECT * FROM mensajes")
+    seleccion = st.session_state.get('seleccion_contactos')
+    df_mensajes = read_query(queries.MENSAJES)
     st.subheader("Mensajes Registrados")
     st.dataframe(df_mensajes)
 
@@ -723,21 +681,40 @@ elif page == "Mensajes":
         mensaje_nuevo = st.text_area("Nuevo Mensaje")
         submit_mensaje = st.form_submit_button("Guardar Mensaje")
     if submit_mensaje and mensaje_nuevo.strip():
-        add_message(mensaje_nuevo)
-        st.success("Mensaje guardado")
-        df_mensajes = read_query("SELECT * FROM mensajes")
-        st.dataframe(df_mensajes)
+        desconocidos = unknown_placeholders(mensaje_nuevo)
+        if desconocidos:
+            st.error(
+                "Marcadores desconocidos: " + ", ".join("{" + m + "}" for m in desconocidos)
+                + ". Use nombres de columnas de contactos, por ejemplo {nombre} o {auto}."
+            )
+        else:
+            add_message(mensaje_nuevo)
+            st.success("Mensaje guardado")
+            df_mensajes = read_query(queries.MENSAJES)
+            st.dataframe(df_mensajes)
 
     mensaje_default = st.session_state.get('mensaje_html', '')
     mensaje = st.text_input("Mensaje para WhatsApp", mensaje_default, key="mensaje_html")
-    if df_contactos is not None and not df_contactos.empty:
-        html_content, html_name = generate_html(df_contactos, mensaje)
-        st.download_button(
-            "Generar HTML",
-            data=html_content,
-            file_name=html_name,
-            mime="text/html",
-        )
+    total = 0
+    if seleccion is not None:
+        con = get_connection()
+        query, params = search.selection_query(con, seleccion)
+        total = int(read_query(*search.selection_count_query(con, seleccion))['total'].iloc[0])
+    if total:
+        if seleccion.data_version != data_version():
+            st.caption("La base cambió desde la búsqueda; el reporte usará los contactos actuales.")
+        # Se genera al pedirlo, leyendo los contactos por bloques desde la base
+        if st.button("Generar HTML"):
+            html_content, html_name, mime = report.export_report(
+                get_connection(), query, params, [mensaje]
+            )
+            st.download_button(
+                "Descargar HTML",
+                data=html_content,
+                file_name=html_name,
+                mime=mime,
+                on_click="ignore",
+            )
     else:
         st.warning(
             "No hay contactos para exportar. Ve a 'Ver Contactos & Exportar' y realiza una búsqueda primero."
@@ -761,13 +738,16 @@ elif page == "Editar":
         st.subheader("Editar Contactos por Teléfono")
         phone_query = st.text_input("Ingrese parte o el número completo del teléfono a buscar")
         if phone_query:
-            query = "SELECT * FROM contactos WHERE telefono LIKE ?"
-            params = [f"%{phone_query}%"]
+            query, params = search.build_contact_query(
+                get_connection(), telefono=phone_query, limit=PHONE_SEARCH_LIMIT
+            )
             df_search = read_query(query, params=params)
             if df_search.empty:
                 st.warning("No se encontraron contactos para ese número.")
             else:
                 st.write("Contactos encontrados:")
+                if len(df_search) == PHONE_SEARCH_LIMIT:
+                    st.caption(f"Se muestran los {PHONE_SEARCH_LIMIT} resultados más relevantes; escriba más dígitos para acotar.")
                 # Mostrar resultados en un selectbox (solo se muestran los datos relevantes)
                 # Usamos ID y teléfono para identificarlos
                 opciones = df_search["id"].astype(str) + " - " + df_search["telefono"]
@@ -779,6 +759,12 @@ elif page == "Editar":
                 st.write("Contacto seleccionado:")
                 df_contact = contact.to_frame().T.reset_index(drop=True)
                 st.dataframe(df_contact, height=150)
+                with get_connection() as con:
+                    exportaciones, ultima = con.execute(
+                        queries.RESUMEN_EXPORTACIONES_CONTACTO, (contact_id,)
+                    ).fetchone()
+                if exportaciones:
+                    st.caption(f"Exportado {exportaciones} veces. Última exportación: {ultima}")
                 
                 # Formulario para editar con dos columnas de botones: actualizar y eliminar
                 col1, col2 = st.columns(2)
@@ -794,7 +780,7 @@ elif page == "Editar":
                     if submit_update:
                         if update_contact(contact_id, new_link_auto, new_telefono, new_nombre, new_auto, new_precio, new_descripcion):
                             st.success("Contacto actualizado correctamente!")
-                            updated = read_query("SELECT * FROM contactos WHERE id = ?", params=[contact_id])
+                            updated = read_query(queries.CONTACTO_POR_ID, params=[contact_id])
                             st.write("Contacto actualizado:", updated)
                         else:
                             st.error("No se pudo actualizar el contacto.")
@@ -812,14 +798,12 @@ elif page == "Editar":
     # --------------------------------------------------------------------------
     elif opcion_editar == "Editar Links":
         st.subheader("Editar Links")
-        df_links = read_query("SELECT * FROM links_contactos")
-        if df_links.empty:
-            st.warning("No existen links. Cree uno primero.")
-        else:
-            opciones = df_links["id"].astype(str) + " - " + df_links["link_general"]
-            seleccionado = st.selectbox("Seleccione el Link a editar", opciones)
-            link_id = int(seleccionado.split(" - ")[0])
-            selected_link = df_links[df_links["id"] == link_id].iloc[0]
+        selected_link = selector_link(
+            "Seleccione el Link a editar", "editar_link", "No existen links. Cree uno primero.",
+            columns=None,
+        )
+        if selected_link is not None:
+            link_id = int(selected_link["id"])
             
             st.write("Link seleccionado:")
             df_contact = selected_link.to_frame().T.reset_index(drop=True)
@@ -834,7 +818,7 @@ elif page == "Editar":
             if submit_button:
                 if update_link_record(link_id, new_link_general, new_fecha, new_marca, new_descripcion):
                     st.success("Link actualizado correctamente!")
-                    updated = read_query("SELECT * FROM links_contactos WHERE id = ?", params=[link_id])
+                    updated = read_query(queries.LINK_POR_ID, params=[link_id])
                     st.write("Link actualizado:", updated)
                 else:
                     st.error("No se pudo actualizar el Link.")
@@ -844,7 +828,7 @@ elif page == "Editar":
     # --------------------------------------------------------------------------
     else:
         st.subheader("Editar Mensajes")
-        df_mensajes = read_query("SELECT * FROM mensajes")
+        df_mensajes = read_query(queries.MENSAJES)
         if df_mensajes.empty:
             st.warning("No existen mensajes.")
         else:
@@ -862,14 +846,24 @@ elif page == "Editar":
                 with st.form("editar_mensaje_update_form"):
                     nuevo_texto = st.text_area("Mensaje", value=mensaje['descripcion'])
                     submit_update_msg = st.form_submit_button("Confirmar Actualización")
-                if submit_update_msg:
+                desconocidos = unknown_placeholders(nuevo_texto) if submit_update_msg else []
+                if desconocidos:
+                    st.error(
+                        "Marcadores desconocidos: " + ", ".join("{" + m + "}" for m in desconocidos)
+                        + ". Use nombres de columnas de contactos, por ejemplo {nombre} o {auto}."
+                    )
+                elif submit_update_msg:
                     if update_message(msg_id, nuevo_texto):
                         st.success("Mensaje actualizado correctamente!")
-                        updated = read_query("SELECT * FROM mensajes WHERE id = ?", params=[msg_id])
+                        updated = read_query(queries.MENSAJE_POR_ID, params=[msg_id])
                         st.write("Mensaje actualizado:", updated)
                     else:
                         st.error("No se pudo actualizar el mensaje.")
             with col2:
+                with get_connection() as con:
+                    usos = con.execute(queries.EXPORTACIONES_POR_MENSAJE, (msg_id,)).fetchone()[0]
+                if usos:
+                    st.caption(f"Este mensaje se usó en {usos} enlaces exportados.")
                 with st.form("editar_mensaje_delete_form"):
                     submit_delete_msg = st.form_submit_button("Eliminar Mensaje")
                 if submit_delete_msg:
@@ -878,5 +872,5 @@ elif page == "Editar":
                     else:
                         st.error("Error al eliminar el mensaje.")
 
-            df_mensajes = read_query("SELECT * FROM mensajes")
+            df_mensajes = read_query(queries.MENSAJES)
             st.dataframe(df_mensajes)
@@ -0,0 +1,208 @@
+"""Carga masiva de contactos a partir de muchos links de vehículos.
+
+Las fichas se descargan en paralelo con un pool de hilos acotado. Por cada
+sitio se limita la cantidad de descargas simultáneas y se respeta una pausa
+mínima entre solicitudes, para no saturar chileautos. Los contactos obtenidos
+se insertan en lotes, cada uno en una sola transacción.
+"""
+import re
+import threading
+import time
+import urllib.parse
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+
+MAX_WORKERS = 8
+PER_HOST = 3          # descargas simultáneas por sitio
+POLITENESS_DELAY = 0.5  # segundos mínimos entre solicitudes al mismo sitio
+BATCH_SIZE = 200
+
+BulkResult = namedtuple("BulkResult", "url data error")
+
+INSERT_CONTACTO = '''
+    INSERT OR IGNORE INTO contactos (link_auto, telefono, nombre, auto, precio, descripcion, id_link, imagen_hash)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def parse_url_list(text):
+    """Extrae los links (uno por línea, o separados por comas/espacios) sin repetir."""
+    urls = []
+    seen = set()
+    for token in re.split(r"[\s,;]+", text or ""):
+        token = token.strip().strip('"\'')
+        if token.lower().startswith(("http://", "https://")) and token not in seen:
+            seen.add(token)
+            urls.append(token)
+    return urls
+
+
+class HostThrottle:
+    """Limita la concurrencia y la frecuencia de solicitudes por sitio."""
+
+    def __init__(self, per_host=PER_HOST, delay=POLITENESS_DELAY):
+        self.per_host = per_host
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._next_start = {}
+
+    @contextmanager
+    def slot(self, url):
+        host = urllib.parse.urlsplit(url).netloc.lower()
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+        with semaphore:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start.get(host, now))
+                self._next_start[host] = start + self.delay
+            if start > now:
+                time.sleep(start - now)
+            yield
+
+
+def scrape_many(urls, scrape=None, max_workers=MAX_WORKERS, throttle=None, cache=None):
+    """Descarga varias fichas en paralelo.
+
+    Retorna un generador de ``BulkResult`` en el orden en que terminan, para
+    que quien lo consume pueda ir mostrando el avance. Las URLs que ya están
+    vigentes en la caché no esperan turno ni pausa.
+    """
+    if scrape is None:
+        from src import scraping
+        cache = cache or scraping.get_cache()
+
+        def scrape(url):
+            return scraping.scrape_vehicle_details(url, cache=cache)
+
+    throttle = throttle or HostThrottle()
+
+    def work(url):
+        try:
+            entry = cache.get(url) if cache is not None else None
+            if entry is not None and entry.parsed is not None and cache.is_fresh(entry):
+                return BulkResult(url, scrape(url), None)
+            with throttle.slot(url):
+                return BulkResult(url, scrape(url), None)
+        except Exception as e:
+            return BulkResult(url, None, str(e))
+
+    if not urls:
+        return
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(urls)))
+    try:
+        futures = [executor.submit(work, url) for url in urls]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        # Si quien consume deja de iterar (p. ej. un trabajo cancelado), las
+        # descargas que no alcanzaron a empezar se descartan.
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def contact_row(url, data, link_id):
+    """Arma la fila de ``contactos`` para un link descargado.
+
+    Retorna ``(fila, None)`` o ``(None, motivo)`` si faltan datos obligatorios
+    (teléfono o precio); esos links deben completarse a mano.
+    """
+    telefono = data.get("whatsapp_number") or ""
+    if telefono == "No disponible":
+        telefono = ""
+    telefono = "".join(str(telefono).split())
+    if not telefono:
+        return None, "Sin teléfono"
+    try:
+        precio = float(str(data.get("precio", "")).replace(",", "").strip())
+    except ValueError:
+        return None, "Precio inválido"
+    return (
+        "".join(url.split()),
+        telefono,
+        "",
+        str(data.get("nombre", "")).strip(),
+        precio,
+        str(data.get("descripcion", "")).strip(),
+        int(link_id),
+        data.get("contact_image_hash"),
+    ), None
+
+
+def existing_links(con, urls):
+    """Retorna el subconjunto de ``urls`` que ya está registrado."""
+    found = set()
+    urls = list(urls)
+    for i in range(0, len(urls), 500):
+        chunk = urls[i:i + 500]
+        placeholders = ",".join("?" * len(chunk))
+        found.update(
+            row[0] for row in con.execute(
+                f"SELECT link_auto FROM contactos WHERE link_auto IN ({placeholders})", chunk
+            )
+        )
+    return found
+
+
+def insert_contacts(con, rows, batch_size=BATCH_SIZE):
+    """Inserta contactos en lotes (una transacción por lote) y retorna cuántos entraron.
+
+    Los links repetidos se ignoran gracias a la restricción UNIQUE de link_auto.
+    """
+    inserted = 0
+    for i in range(0, len(rows), batch_size):
+        with con:
+            inserted += con.executemany(INSERT_CONTACTO, rows[i:i + batch_size]).rowcount
+    return inserted
+
+
+def import_job(ctx, urls, link_id, usar_ocr=None):
+    """Trabajo en segundo plano (ver src/jobs.py): carga masiva de ``urls`` al link.
+
+    Descarga las fichas, lee con OCR los teléfonos que vengan solo en imagen e
+    inserta los contactos por lotes. Retorna ``{"insertados", "omitidos",
+    "problemas"}``; los problemas son ``{"link", "motivo"}`` para completar a
+    mano. Si se cancela, los lotes ya insertados se conservan.
+    """
+    from src import images, ocr, writer
+    from src.db import get_connection
+
+    con = get_connection()
+    ya_registrados = existing_links(con, urls)
+    pendientes = [u for u in urls if u not in ya_registrados]
+    if usar_ocr is None:
+        usar_ocr = ocr.ocr_available()
+    filas, problemas, sin_telefono, insertados = [], [], [], 0
+    total = len(pendientes)
+    ctx.progress(0, f"0 de {total} links procesados", force=True)
+    for i, resultado in enumerate(scrape_many(pendientes), start=1):
+        if resultado.error:
+            problemas.append({"link": resultado.url, "motivo": resultado.error})
+        elif (usar_ocr and resultado.data.get("whatsapp_number") == "No disponible"
+              and resultado.data.get("contact_image_hash")):
+            sin_telefono.append(resultado)  # se leen juntos con OCR al final
+        else:
+            fila, motivo = contact_row(resultado.url, resultado.data, link_id)
+            if fila:
+                filas.append(fila)
+            else:
+                problemas.append({"link": resultado.url, "motivo": motivo})
+        if len(filas) >= BATCH_SIZE:
+            insertados += writer.call(insert_contacts, filas)
+            filas = []
+        ctx.progress(i / total, f"{i} de {total} links procesados")
+    if sin_telefono:
+        ctx.progress(1, f"Leyendo {len(sin_telefono)} teléfonos desde las imágenes...", force=True)
+        ocr.fill_phones([r.data for r in sin_telefono], images.get_store())
+        for resultado in sin_telefono:
+            fila, motivo = contact_row(resultado.url, resultado.data, link_id)
+            if fila:
+                filas.append(fila)
+            else:
+                problemas.append({"link": resultado.url, "motivo": motivo})
+    insertados += writer.call(insert_contacts, filas)
+    images.collect_garbage(con)
+    return {"insertados": insertados, "omitidos": len(ya_registrados), "problemas": problemas}
@@ -0,0 +1,277 @@
+"""Línea de comandos sin Streamlit: carga masiva, exportaciones y mantención.
+
+Permite programar tareas (por ejemplo con cron) y procesar lotes grandes sin
+abrir el navegador. Reutiliza los mismos módulos que la aplicación: la carga
+masiva de src/bulk.py, los reportes de src/report.py, el Excel de
+src/excel.py y el escritor único de src/writer.py. La base de datos se elige
+con la variable de entorno ``CONSIGNACION_DB``, igual que en la aplicación.
+
+Ejemplos::
+
+    python cli.py cargar 3 links.txt
+    python cli.py exportar 3 --formato xlsx --salida contactos.xlsx
+    python cli.py migrar --status
+    python cli.py vacuum
+"""
+import argparse
+import os
+import sys
+import time
+
+from src import bulk, excel, exports, frames, links, migrations, queries, report, search, writer
+from src.db import DB_FILENAME, get_connection
+from src.migrations import ensure_schema
+
+# Formato pedido en la línea de comandos -> nombre con que se registra la exportación
+FORMATOS = {
+    "html": "HTML",
+    "html.gz": "HTML comprimido (.gz)",
+    "zip": "ZIP por partes",
+    "xlsx": "Excel",
+    "parquet": "Parquet",
+}
+
+
+class ConsoleProgress:
+    """Contexto de trabajo (como ``jobs.JobContext``) que informa el avance en la consola."""
+
+    def __init__(self, stream=None, interval=1.0):
+        self.stream = stream or sys.stderr
+        self.interval = interval
+        self._last = None
+
+    def cancelled(self):
+        return False
+
+    def progress(self, fraction, mensaje=None, force=False):
+        now = time.monotonic()
+        if force or self._last is None or now - self._last >= self.interval:
+            self._last = now
+            print(f"[{fraction:4.0%}] {mensaje or ''}", file=self.stream, flush=True)
+
+
+def read_urls(paths):
+    """Links de los archivos ``paths`` (``-`` es la entrada estándar), sin repetir."""
+    textos = []
+    for path in paths or ["-"]:
+        if path == "-":
+            textos.append(sys.stdin.read())
+        else:
+            with open(path, encoding="utf-8-sig") as fh:
+                textos.append(fh.read())
+    return bulk.parse_url_list("\n".join(textos))
+
+
+def _link_exists(con, link_id):
+    if con.execute(queries.LINK_POR_ID, (link_id,)).fetchone() is None:
+        print(f"No existe el link {link_id}.", file=sys.stderr)
+        return False
+    return True
+
+
+def _mensajes(con, ids=None):
+    """``(textos, ids)`` de los mensajes registrados (o solo de ``ids``, en ese orden)."""
+    filas = con.execute(frames.projected(queries.MENSAJES, ("id", "descripcion"))).fetchall()
+    if ids:
+        por_id = dict(filas)
+        faltan = [i for i in ids if i not in por_id]
+        if faltan:
+            raise ValueError(f"No existen los mensajes {', '.join(map(str, faltan))}")
+        filas = [(i, por_id[i]) for i in ids]
+    return [texto for _, texto in filas], [i for i, _ in filas]
+
+
+def _con_enlaces(mensajes, avance, registro=None):
+    """Transformación de Excel que agrega el enlace de WhatsApp a cada bloque."""
+    def agregar(bloque, inicio):
+        avance(inicio)
+        if registro is not None:
+            registro.add(bloque, inicio)
+        bloque["whatsapp_link"] = links.build_links(bloque, mensajes, start=inicio)["whatsapp_link"]
+        return bloque
+    return agregar
+
+
+def _frames_con_enlaces(con, query, params, mensajes, mensaje_ids, avance, registro=None):
+    inicio = 0
+    for bloque in frames.iter_frames(con, query, params):
+        if registro is not None:
+            registro.add(bloque, inicio)
+        generados = links.build_links(bloque, mensajes, mensaje_ids, start=inicio)
+        bloque["mensaje_id"] = generados["mensaje_id"]
+        bloque["whatsapp_link"] = generados["whatsapp_link"]
+        inicio += len(bloque)
+        avance(inicio)
+        yield bloque
+
+
+# =============================================================================
+# COMANDOS
+# =============================================================================
+def cmd_cargar(args):
+    ensure_schema()
+    con = get_connection()
+    if not _link_exists(con, args.link_id):
+        return 1
+    urls = read_urls(args.archivos)
+    if not urls:
+        print("No se encontraron links.", file=sys.stderr)
+        return 1
+    usar_ocr = False if args.sin_ocr else None
+    resultado = bulk.import_job(ConsoleProgress(), urls, args.link_id, usar_ocr=usar_ocr)
+    print(f"Contactos agregados: {resultado['insertados']}")
+    print(f"Links ya registrados (omitidos): {resultado['omitidos']}")
+    if resultado["problemas"]:
+        print(f"Links para completar a mano: {len(resultado['problemas'])}")
+        for problema in resultado["problemas"]:
+            print(f"{problema['link']}\t{problema['motivo']}")
+    return 0
+
+
+def cmd_exportar(args):
+    ensure_schema()
+    con = get_connection()
+    if not _link_exists(con, args.link_id):
+        return 1
+    try:
+        mensajes, mensaje_ids = _mensajes(con, args.mensaje)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if not mensajes:
+        print("No existen mensajes. Agregue uno antes de exportar.", file=sys.stderr)
+        return 1
+    filtros = dict(nombre=args.nombre, auto=args.auto, telefono=args.telefono)
+    query, params = search.build_contact_query(
+        con, link_id=args.link_id, order_by=args.orden, descending=args.desc, **filtros
+    )
+    total = con.execute(*search.build_count_query(con, link_id=args.link_id, **filtros)).fetchone()[0]
+    progreso = ConsoleProgress()
+
+    def avance(filas):
+        progreso.progress(filas / total if total else 1, f"{filas} de {total} contactos procesados")
+
+    formato = FORMATOS[args.formato]
+    # Las filas a registrar se reúnen mientras se escribe el archivo
+    registro = None if args.sin_registro else exports.SelectionRecorder(mensajes, mensaje_ids)
+    if formato in report.FORMATS:
+        with open(args.salida, "wb") as fileobj:
+            report.write_report(
+                fileobj, con, query, params, mensajes, formato,
+                links_per_file=args.links_por_archivo, on_batch=avance,
+                record=registro.add if registro is not None else None,
+            )
+    elif args.formato == "xlsx":
+        with open(args.salida, "wb") as fileobj:
+            excel.write_query_xlsx(
+                fileobj, con, query, params, sheet_name="Contactos",
+                transform=_con_enlaces(mensajes, avance, registro),
+            )
+    else:
+        frames.write_parquet(
+            args.salida, _frames_con_enlaces(con, query, params, mensajes, mensaje_ids, avance, registro)
+        )
+    print(f"Archivo escrito: {args.salida} ({total} contactos)")
+    if registro is not None:
+        lote = writer.call(exports.log_export, *registro.rows(), formato=formato)
+        if lote.created:
+            print(f"Exportación registrada: {lote.total} contactos.")
+        else:
+            print("Esta selección ya estaba registrada hoy; no se duplicó el registro.")
+    return 0
+
+
+def cmd_migrar(args):
+    return migrations.main(args.opciones)
+
+
+def cmd_vacuum(args):
+    ensure_schema()
+    con = get_connection()
+    antes = os.path.getsize(DB_FILENAME)
+    con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    con.execute("VACUUM")
+    con.execute("PRAGMA optimize")
+    despues = os.path.getsize(DB_FILENAME)
+    print(f"Base compactada: {antes / 1e6:.1f} MB -> {despues / 1e6:.1f} MB")
+    return 0
+
+
+def cmd_reindexar(args):
+    ensure_schema()
+    migrations.reindex(get_connection())
+    print("Índices reconstruidos.")
+    return 0
+
+
+# =============================================================================
+# LÍNEA DE COMANDOS
+# =============================================================================
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Tareas de Consignación sin abrir la aplicación (base: CONSIGNACION_DB)."
+    )
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    cargar = sub.add_parser("cargar", help="Carga masiva de links de autos a un link de contactos.")
+    cargar.add_argument("link_id", type=int, help="Id del link de contactos (links_contactos).")
+    cargar.add_argument(
+        "archivos", nargs="*",
+        help="Archivos .txt/.csv con los links (por defecto, o con '-', la entrada estándar).",
+    )
+    cargar.add_argument("--sin-ocr", action="store_true", help="No leer teléfonos desde las imágenes.")
+    cargar.set_defaults(func=cmd_cargar)
+
+    exportar = sub.add_parser("exportar", help="Exporta los contactos de un link con sus enlaces de WhatsApp.")
+    exportar.add_argument("link_id", type=int, help="Id del link de contactos.")
+    exportar.add_argument("--formato", choices=list(FORMATOS), default="html")
+    exportar.add_argument("--salida", "-o", required=True, help="Archivo a escribir.")
+    exportar.add_argument(
+        "--mensaje", type=int, action="append",
+        help="Id de un mensaje a usar (se puede repetir; por defecto, todos en rotación).",
+    )
+    exportar.add_argument("--nombre", default="", help="Filtrar por nombre.")
+    exportar.add_argument("--auto", default="", help="Filtrar por auto.")
+    exportar.add_argument("--telefono", default="", help="Filtrar por teléfono.")
+    exportar.add_argument("--orden", choices=search.SORT_COLUMNS, default="id")
+    exportar.add_argument("--desc", action="store_true", help="Orden descendente.")
+    exportar.add_argument(
+        "--links-por-archivo", type=int, default=report.LINKS_PER_FILE,
+        help="Enlaces por archivo del formato zip.",
+    )
+    exportar.add_argument(
+        "--sin-registro", action="store_true", help="No registrar la exportación en export_logs."
+    )
+    exportar.set_defaults(func=cmd_exportar)
+
+    # Las opciones de "migrar" (--status, --target, --reindex) pasan tal cual a src.migrations
+    migrar = sub.add_parser(
+        "migrar", add_help=False,
+        help="Aplica las migraciones (mismas opciones que python -m src.migrations).",
+    )
+    migrar.set_defaults(func=cmd_migrar)
+
+    vacuum = sub.add_parser("vacuum", help="Compacta la base de datos.")
+    vacuum.set_defaults(func=cmd_vacuum)
+
+    reindexar = sub.add_parser("reindexar", help="Reconstruye los índices y actualiza estadísticas.")
+    reindexar.set_defaults(func=cmd_reindexar)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, resto = parser.parse_known_args(argv)
+    if args.comando == "migrar":
+        args.opciones = resto
+    elif resto:
+        parser.error(f"argumentos no reconocidos: {' '.join(resto)}")
+    try:
+        return args.func(args)
+    finally:
+        # Espera a que el escritor confirme lo pendiente antes de salir
+        writer.close_all()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""Conexiones SQLite compartidas por todo el proceso de Streamlit.
+
+Streamlit vuelve a ejecutar ``app.py`` en cada interacción, pero los módulos
+importados se conservan. Por eso el pool vive aquí: cada hilo de ejecución toma
+una conexión ya configurada y la devuelve al pool cuando el hilo termina, de
+modo que las siguientes ejecuciones (de cualquier sesión) la reutilizan.
+"""
+import os
+import queue
+import sqlite3
+import threading
+
+DB_FILENAME = os.environ.get(
+    "CONSIGNACION_DB", os.path.join('data', 'datos_consignacion.db')
+)
+
+# WAL permite lecturas concurrentes mientras otro operador escribe; con WAL,
+# synchronous=NORMAL sigue siendo seguro ante caídas de la aplicación.
+PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", -20000),      # ~20 MB de caché de páginas por conexión
+    ("mmap_size", 268435456),    # 256 MB mapeados en memoria
+    ("temp_store", "MEMORY"),
+    ("busy_timeout", 5000),
+)
+
+# Sentencias preparadas que cada conexión mantiene en caché.
+STATEMENT_CACHE_SIZE = 256
+
+# Conexiones inactivas que se conservan para reutilizar.
+POOL_SIZE = 8
+
+
+def connect(path, **kwargs):
+    """Abre una conexión nueva a ``path`` con los PRAGMAS de la aplicación."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    con = sqlite3.connect(
+        path,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        **kwargs,
+    )
+    for name, value in PRAGMAS:
+        con.execute(f"PRAGMA {name} = {value}")
+    return con
+
+
+class _Lease:
+    """Devuelve la conexión al pool cuando termina el hilo que la tomó."""
+
+    __slots__ = ("pool", "con")
+
+    def __init__(self, pool, con):
+        self.pool = pool
+        self.con = con
+
+    def __del__(self):
+        self.pool.release(self.con)
+
+
+class ConnectionPool:
+    """Pool de conexiones configuradas para una base de datos."""
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._local = threading.local()
+        self._closed = False
+        self._watcher = None
+        self._watcher_lock = threading.Lock()
+
+    def _connect(self):
+        return connect(self.path)
+
+    def connection(self):
+        """Retorna la conexión asignada al hilo actual."""
+        lease = getattr(self._local, "lease", None)
+        if lease is None:
+            try:
+                con = self._idle.get_nowait()
+            except queue.Empty:
+                con = self._connect()
+            lease = _Lease(self, con)
+            self._local.lease = lease
+        return lease.con
+
+    def release(self, con):
+        """Devuelve una conexión al pool o la cierra si ya no cabe."""
+        if self._closed:
+            con.close()
+            return
+        try:
+            if con.in_transaction:
+                con.rollback()
+            self._idle.put_nowait(con)
+        except (queue.Full, sqlite3.Error):
+            con.close()
+
+    def data_version(self):
+        """Número que cambia cada vez que se confirman cambios en la base.
+
+        Se consulta en una conexión propia que nunca escribe: ``PRAGMA
+        data_version`` solo cambia con los commits de *otras* conexiones, y así
+        todas las del pool (y las de otros procesos) cuentan como otras.
+        """
+        with self._watcher_lock:
+            if self._watcher is None:
+                self._watcher = self._connect()
+            return self._watcher.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        """Cierra las conexiones inactivas y deja de aceptar devoluciones."""
+        self._closed = True
+        with self._watcher_lock:
+            if self._watcher is not None:
+                self._watcher.close()
+                self._watcher = None
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path=None):
+    """Retorna el pool del proceso para ``path`` (por defecto, la base principal)."""
+    path = path or DB_FILENAME
+    pool = _pools.get(path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(path)
+            if pool is None:
+                pool = _pools[path] = ConnectionPool(path)
+    return pool
+
+
+def get_connection(path=None):
+    """Retorna la conexión compartida del hilo actual."""
+    return get_pool(path).connection()
+
+
+def data_version(path=None):
+    """Versión de los datos de ``path``; sirve como clave de caché."""
+    return get_pool(path).data_version()
+
+
+def close_all():
+    """Cierra todos los pools (útil para herramientas de línea de comandos y pruebas)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,165 @@
+"""Exportación a Excel bajo demanda.
+
+Los archivos se escriben con xlsxwriter en modo ``constant_memory`` (fila por
+fila, directo desde un cursor) solo cuando alguien los pide. El resultado
+queda en una caché en memoria con clave ``(consulta, parámetros, extra,
+versión de los datos)``: mientras nadie modifique la base, volver a
+descargar no cuesta nada, y cualquier cambio invalida la entrada por sí solo.
+Las exportaciones grandes se generan con ``export_job``, que escribe directo
+a un archivo sin pasar por la caché.
+"""
+import tempfile
+import threading
+from collections import OrderedDict
+
+from src import report
+from src.db import data_version, get_connection
+
+MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+FORMAT_NAME = "Excel"  # formato con que se registran las exportaciones
+CACHE_MAX_BYTES = 64 * 1024 * 1024  # 64 MB de archivos generados
+
+
+class ExportCache:
+    """Archivos generados, con límite de tamaño (se descartan los menos usados)."""
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            if len(data) > self.max_bytes:
+                return
+            self._items[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, dropped = self._items.popitem(last=False)
+                self._size -= len(dropped)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+
+
+_cache = ExportCache()
+
+
+def cache_key(query, params=(), extra=None, path=None):
+    """Clave de caché: la consulta, sus filtros, datos adicionales y la versión de la base."""
+    return (query, tuple(params or ()), extra, data_version(path))
+
+
+def cached(key):
+    """Archivo ya generado para ``key`` o None."""
+    return _cache.get(key)
+
+
+def write_xlsx(fileobj, batches, sheet_name="Hoja1"):
+    """Escribe en ``fileobj`` una hoja con los bloques ``{columna: lista}``.
+
+    Usa el modo ``constant_memory`` de xlsxwriter: cada fila se escribe y se
+    libera enseguida. Retorna la cantidad de filas de datos.
+    """
+    import xlsxwriter  # solo al generar un archivo
+
+    workbook = xlsxwriter.Workbook(fileobj, {"constant_memory": True})
+    worksheet = workbook.add_worksheet(sheet_name)
+    header = workbook.add_format({"bold": True})
+    rows = 0
+    for index, batch in enumerate(batches):
+        if index == 0:
+            worksheet.write_row(0, 0, list(batch), header)
+        for values in zip(*batch.values()):
+            rows += 1
+            worksheet.write_row(rows, 0, values)
+    workbook.close()
+    return rows
+
+
+def export_xlsx(con, query, params=(), sheet_name="Hoja1", transform=None, key=None):
+    """Genera (o toma de la caché) el Excel con el resultado de ``query``.
+
+    ``transform(bloque, inicio)`` puede agregar o quitar columnas a cada bloque
+    (por ejemplo, el enlace de WhatsApp). Si se entrega ``key`` (ver
+    ``cache_key``) el archivo queda en caché. Retorna los bytes del archivo.
+    """
+    if key is not None:
+        data = _cache.get(key)
+        if data is not None:
+            return data
+    with tempfile.TemporaryFile() as tmp:
+        write_query_xlsx(tmp, con, query, params, sheet_name, transform)
+        tmp.seek(0)
+        data = tmp.read()
+    if key is not None:
+        _cache.put(key, data)
+    return data
+
+
+def write_query_xlsx(fileobj, con, query, params=(), sheet_name="Hoja1", transform=None):
+    """Escribe en ``fileobj`` el Excel con el resultado de ``query``, sin caché.
+
+    Retorna la cantidad de filas de datos.
+    """
+    cursor = con.execute(query, params or [])
+    batches = _at_least_one(report.cursor_batches(cursor), cursor)
+    if transform is not None:
+        batches = _transformed(batches, transform)
+    return write_xlsx(fileobj, batches, sheet_name)
+
+
+def _transformed(batches, transform):
+    start = 0
+    for batch in batches:
+        size = len(next(iter(batch.values()), []))
+        yield transform(batch, start)
+        start += size
+
+
+def _at_least_one(batches, cursor):
+    # Sin filas se entrega un bloque vacío, para que igual se escriba el encabezado
+    empty = True
+    for batch in batches:
+        empty = False
+        yield batch
+    if empty:
+        yield {d[0]: [] for d in cursor.description}
+
+
+def export_job(ctx, query, params=(), sheet_name="Hoja1", transform=None, total=None,
+               registro=None):
+    """Trabajo en segundo plano (ver src/jobs.py): genera el Excel en un archivo.
+
+    Escribe directo sobre el archivo del trabajo, por bloques desde la base,
+    sin armar el libro en memoria. Con ``registro``
+    (``exports.SelectionRecorder``) las filas a registrar al descargar se
+    reúnen mientras se escribe y quedan en ``resultado["registro"]``. Retorna
+    ``{"archivo", "nombre", "mime"[, "registro"]}``.
+    """
+    def con_avance(bloque, inicio):
+        ctx.progress(inicio / total if total else 0, f"{inicio} filas escritas")
+        if registro is not None:
+            registro.add(bloque, inicio)
+        return transform(bloque, inicio) if transform is not None else bloque
+
+    path = ctx.file_path("xlsx")
+    with open(path, "wb") as fileobj:
+        write_query_xlsx(fileobj, get_connection(), query, params, sheet_name, transform=con_avance)
+    resultado = {"archivo": path, "nombre": f"{sheet_name.lower()}.xlsx", "mime": MIME}
+    if registro is not None:
+        resultado["registro"] = registro.save(ctx.file_path("filas"), FORMAT_NAME)
+    return resultado
@@ -0,0 +1,122 @@
+"""Registro de exportaciones (sesiones de exportación).
+
+Cada descarga de contactos crea una fila en ``export_batches`` identificada
+por el hash de su formato y su contenido (contacto, mensaje y enlace de cada
+fila) y sus registros de ``export_logs`` se insertan juntos, en una sola
+transacción con ``executemany``. Repetir la misma exportación en el mismo
+formato el mismo día no agrega nada.
+
+Los trabajos que generan los archivos reúnen las filas a registrar mientras
+escriben (``SelectionRecorder``) y las dejan en un archivo junto al
+exportado, con su hash ya calculado. Al descargar solo queda insertarlas:
+lo registrado es exactamente lo que contiene el archivo y el escritor único
+no se ocupa de armar enlaces ni de calcular el hash.
+"""
+import datetime
+import hashlib
+from collections import namedtuple
+
+from src import links, queries
+
+ExportBatch = namedtuple("ExportBatch", "id created total")
+
+INSERT_LOG = """
+    INSERT INTO export_logs (contact_id, mensaje_id, link_generado, fecha_exportacion, batch_id)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+
+def selection_hash(contact_ids, mensaje_ids, links, formato=None):
+    """Hash del formato y el contenido de una exportación."""
+    digest = hashlib.sha256(f"{formato or ''}\n".encode("utf-8"))
+    for contact_id, mensaje_id, link in zip(contact_ids, mensaje_ids, links):
+        digest.update(f"{int(contact_id)}\t{int(mensaje_id)}\t{link}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def log_export(con, contact_ids, mensaje_ids, links, formato=None, fecha=None, digest=None):
+    """Registra una exportación y retorna ``ExportBatch``.
+
+    Si ya existe una exportación con el mismo formato y contenido en la misma fecha se
+    retorna esa (``created=False``) sin escribir registros. ``digest`` es el
+    ``selection_hash`` de las filas, si ya se calculó.
+    """
+    contact_ids, mensaje_ids, links = list(contact_ids), list(mensaje_ids), list(links)
+    fecha = fecha or datetime.date.today().isoformat()
+    digest = digest or selection_hash(contact_ids, mensaje_ids, links, formato)
+    existing = con.execute(queries.EXPORTACION_POR_HASH, (digest, fecha)).fetchone()
+    if existing:
+        return ExportBatch(existing[0], False, len(links))
+    with con:
+        # INSERT OR IGNORE: si otra sesión registró lo mismo entre medio, gana la primera
+        cur = con.execute(
+            """
+            INSERT OR IGNORE INTO export_batches (hash, fecha_exportacion, formato, total, creado)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (digest, fecha, formato, len(links), datetime.datetime.now().isoformat(timespec="seconds")),
+        )
+        if cur.rowcount == 0:
+            batch_id = con.execute(queries.EXPORTACION_POR_HASH, (digest, fecha)).fetchone()[0]
+            return ExportBatch(batch_id, False, len(links))
+        batch_id = cur.lastrowid
+        con.executemany(
+            INSERT_LOG,
+            (
+                (int(contact_id), int(mensaje_id), link, fecha, batch_id)
+                for contact_id, mensaje_id, link in zip(contact_ids, mensaje_ids, links)
+            ),
+        )
+    return ExportBatch(batch_id, True, len(links))
+
+
+class SelectionRecorder:
+    """Filas de ``export_logs`` de una exportación, reunidas bloque a bloque.
+
+    ``add(bloque, inicio)`` recibe los mismos bloques de contactos (con su
+    posición) con que se escribe el archivo y arma sus enlaces con la misma
+    rotación de mensajes.
+    """
+
+    def __init__(self, mensajes, mensaje_ids):
+        self.mensajes = list(mensajes)
+        self.mensaje_ids = list(mensaje_ids)
+        self.contact_ids, self.asignados, self.links = [], [], []
+
+    def add(self, bloque, inicio):
+        generados = links.build_links(bloque, self.mensajes, self.mensaje_ids, start=inicio)
+        self.contact_ids.extend(int(i) for i in links.column_values(bloque, "id"))
+        self.asignados.extend(int(i) for i in generados["mensaje_id"])
+        self.links.extend(generados["whatsapp_link"])
+
+    def rows(self):
+        """``(contact_ids, mensaje_ids, links)``, los argumentos de ``log_export``."""
+        return self.contact_ids, self.asignados, self.links
+
+    def save(self, path, formato=None):
+        """Guarda las filas en ``path`` y retorna ``{"archivo", "hash", "total", "formato"}``.
+
+        El resultado se guarda en el trabajo y se entrega a ``load_rows`` y
+        ``log_export`` al descargar.
+        """
+        with open(path, "w", encoding="utf-8") as fh:
+            for row in zip(*self.rows()):
+                fh.write("%d\t%d\t%s\n" % row)
+        return {
+            "archivo": path,
+            "hash": selection_hash(*self.rows(), formato),
+            "total": len(self.links),
+            "formato": formato,
+        }
+
+
+def load_rows(path):
+    """Filas guardadas por ``SelectionRecorder.save``: ``(contact_ids, mensaje_ids, links)``."""
+    contact_ids, mensaje_ids, enlaces = [], [], []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            contact_id, mensaje_id, link = line.rstrip("\n").split("\t", 2)
+            contact_ids.append(int(contact_id))
+            mensaje_ids.append(int(mensaje_id))
+            enlaces.append(link)
+    return contact_ids, mensaje_ids, enlaces
@@ -0,0 +1,179 @@
+"""Motor de extracción de campos de una ficha en una sola pasada.
+
+Los campos se declaran como reglas (``Field``): etiqueta, clases, atributo
+con patrón y, opcionalmente, los contenedores dentro de los cuales debe
+estar. ``Extractor`` compila las reglas una vez (agrupadas por etiqueta) y
+recorre el HTML con el parser de la librería estándar en modo streaming: no
+construye el árbol del documento y cada etiqueta se compara solo con las
+reglas de su nombre. Para agregar un campo basta con sumar una regla.
+"""
+import re
+import time
+from collections import defaultdict, namedtuple
+from html.parser import HTMLParser
+
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+}
+
+Extraction = namedtuple("Extraction", "values timings")
+
+
+class Field:
+    """Regla declarativa para un campo.
+
+    Parámetros:
+    - name: nombre del campo en el resultado.
+    - tag: etiqueta HTML a buscar.
+    - classes: clases que debe tener el elemento (todas).
+    - attr / pattern: atributo cuyo valor debe coincidir con la expresión regular.
+    - within: contenedores ``(etiqueta, clase)`` dentro de los cuales debe estar,
+      del más externo al más interno.
+    - extract: ``"text"`` (texto del elemento, como ``get_text(strip=True)``) o
+      ``"attr"`` (valor de ``attr``).
+
+    Se conserva el primer elemento que cumple la regla.
+    """
+
+    def __init__(self, name, tag, classes=(), attr=None, pattern=None, within=(), extract="text"):
+        self.name = name
+        self.tag = tag
+        self.classes = frozenset(classes)
+        self.attr = attr
+        self.pattern = re.compile(pattern) if pattern else None
+        self.within = tuple(within)
+        self.extract = extract
+
+    def matches(self, attrs, stack):
+        if self.classes and not self.classes <= _classes(attrs):
+            return False
+        if self.attr:
+            value = attrs.get(self.attr)
+            if value is None or (self.pattern and not self.pattern.search(value)):
+                return False
+        if self.within:
+            pending = list(self.within)
+            for tag, classes, _ in stack:
+                wanted_tag, wanted_class = pending[0]
+                if tag == wanted_tag and wanted_class in classes:
+                    pending.pop(0)
+                    if not pending:
+                        break
+            if pending:
+                return False
+        return True
+
+
+def _classes(attrs):
+    return frozenset((attrs.get("class") or "").split())
+
+
+class _Pass(HTMLParser):
+    """Una pasada de parseo que aplica las reglas compiladas."""
+
+    def __init__(self, by_tag, track_classes):
+        super().__init__(convert_charrefs=True)
+        self.by_tag = by_tag
+        # Las clases de los contenedores solo importan si hay reglas con "within".
+        self.track_classes = track_classes
+        self.values = {}
+        self.timings = defaultdict(float)
+        self.stack = []       # (tag, clases, capturas abiertas en este elemento)
+        self.capturing = []   # [campo, partes de texto]
+        self.pending = len({f.name for fields in by_tag.values() for f in fields})
+
+    def handle_starttag(self, tag, attrs_list):
+        fields = self.by_tag.get(tag)
+        started = []
+        if fields:
+            attrs = {k: (v or "") for k, v in attrs_list}
+            for field in fields:
+                if field.name in self.values:
+                    continue
+                t0 = time.perf_counter()
+                if field.matches(attrs, self.stack):
+                    if field.extract == "attr":
+                        self.values[field.name] = attrs.get(field.attr, "")
+                        self.pending -= 1
+                    elif tag not in VOID_TAGS:
+                        self.values[field.name] = None  # reservado hasta el cierre
+                        capture = [field, []]
+                        self.capturing.append(capture)
+                        started.append(capture)
+                self.timings[field.name] += time.perf_counter() - t0
+            classes = _classes(attrs)
+        elif self.track_classes:
+            classes = _classes(dict(attrs_list))
+        else:
+            classes = frozenset()
+        if tag not in VOID_TAGS:
+            self.stack.append((tag, classes, started))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.stack and self.stack[-1][0] == tag:
+            self._close(len(self.stack) - 1)
+
+    def handle_endtag(self, tag):
+        # Igual que BeautifulSoup: se cierra el último elemento abierto con ese
+        # nombre; un cierre sin apertura se ignora.
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index][0] == tag:
+                self._close(index)
+                break
+
+    def _close(self, index):
+        while len(self.stack) > index:
+            _, _, started = self.stack.pop()
+            for capture in started:
+                field, parts = capture
+                t0 = time.perf_counter()
+                self.values[field.name] = "".join(p.strip() for p in parts if p.strip())
+                self.capturing.remove(capture)
+                self.pending -= 1
+                self.timings[field.name] += time.perf_counter() - t0
+
+    def handle_data(self, data):
+        for _, parts in self.capturing:
+            parts.append(data)
+
+
+class Extractor:
+    """Conjunto de reglas compiladas, reutilizable entre páginas."""
+
+    # El HTML se entrega al parser por bloques para poder detenerse apenas
+    # se encontraron todos los campos.
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, fields):
+        self.fields = list(fields)
+        self.by_tag = defaultdict(list)
+        for field in self.fields:
+            self.by_tag[field.tag].append(field)
+        self.by_tag = dict(self.by_tag)
+        self.has_within = any(field.within for field in self.fields)
+
+    def extract(self, html):
+        """Extrae todos los campos en una pasada.
+
+        Retorna ``Extraction(values, timings)``: los valores por campo (None si
+        no se encontró) y los segundos dedicados a cada campo, más
+        ``"_parse"`` con el tiempo total.
+        """
+        if isinstance(html, bytes):
+            html = html.decode("utf-8", errors="replace")
+        t0 = time.perf_counter()
+        parser = _Pass(self.by_tag, self.has_within)
+        for start in range(0, len(html), self.CHUNK_SIZE):
+            parser.feed(html[start:start + self.CHUNK_SIZE])
+            if parser.pending <= 0:
+                break
+        else:
+            parser.close()
+        # Elementos sin cierre al final del documento: se cierran todos
+        parser._close(0)
+        timings = dict(parser.timings)
+        timings["_parse"] = time.perf_counter() - t0
+        values = {field.name: parser.values.get(field.name) for field in self.fields}
+        return Extraction(values, timings)
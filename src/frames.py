@@ -0,0 +1,102 @@
+"""DataFrames tipados y proyectados a partir de consultas SQL.
+
+``pd.read_sql_query`` entrega ``object`` para todo texto y ``float64`` para
+los ids con nulos. Aquí cada columna conocida del esquema recibe un tipo
+compacto: enteros con nulos (``Int64``), categorías para valores muy repetidos
+(``marca``) y textos respaldados por Arrow cuando pyarrow está instalado.
+``projected`` limita una consulta a las columnas que la página usa, de modo
+que textos largos como ``descripcion`` no se lean si no se muestran.
+"""
+import importlib.util
+import re
+
+# pandas y pyarrow tardan en importarse: se cargan en la primera lectura.
+STRING_DTYPE = "string[pyarrow]" if importlib.util.find_spec("pyarrow") else "string"
+
+CHUNK_ROWS = 5000
+
+# Tipo de cada columna por nombre (los nombres no chocan entre tablas).
+INT_COLUMNS = ("id", "id_link", "contact_id", "mensaje_id", "batch_id", "total")
+CATEGORY_COLUMNS = ("marca",)
+STRING_COLUMNS = (
+    "telefono", "nombre", "auto", "descripcion", "link_auto", "link_general",
+    "link_generado", "fecha_creacion", "fecha_exportacion", "imagen_hash", "formato",
+)
+DTYPES = {
+    **{name: "Int64" for name in INT_COLUMNS},
+    **{name: "category" for name in CATEGORY_COLUMNS},
+    **{name: STRING_DTYPE for name in STRING_COLUMNS},
+}
+
+_IDENTIFIER = re.compile(r"\w+")
+
+
+def projected(query, columns):
+    """Consulta que retorna solo ``columns`` de ``query``.
+
+    SQLite aplana la subconsulta, así que las columnas no pedidas no se leen.
+    """
+    columns = list(columns)
+    bad = [c for c in columns if not _IDENTIFIER.fullmatch(c)]
+    if bad or not columns:
+        raise ValueError(f"Columnas inválidas: {bad or columns}")
+    return f"SELECT {', '.join(columns)} FROM ({query})"
+
+
+def compact(frame):
+    """Aplica a ``frame`` los tipos compactos de sus columnas conocidas."""
+    for name in frame.columns:
+        dtype = DTYPES.get(name)
+        if dtype is None:
+            continue
+        try:
+            frame[name] = frame[name].astype(dtype)
+        except (TypeError, ValueError):
+            pass  # datos antiguos con otro tipo: la columna queda como venía
+    return frame
+
+
+def read_frame(con, query, params=None, columns=None):
+    """DataFrame tipado con el resultado de ``query`` (solo ``columns``, si se indican)."""
+    import pandas as pd
+
+    if columns is not None:
+        query = projected(query, columns)
+    return compact(pd.read_sql_query(query, con, params=params))
+
+
+def iter_frames(con, query, params=None, columns=None, chunksize=CHUNK_ROWS):
+    """Igual que ``read_frame``, pero por bloques de ``chunksize`` filas."""
+    import pandas as pd
+
+    if columns is not None:
+        query = projected(query, columns)
+    for chunk in pd.read_sql_query(query, con, params=params, chunksize=chunksize):
+        yield compact(chunk)
+
+
+def write_parquet(path, frames):
+    """Escribe en ``path`` un archivo Parquet con los DataFrames de ``frames``.
+
+    Se escribe un grupo de filas por bloque, sin juntar todo en memoria; el
+    esquema lo fija el primer bloque. Requiere pyarrow. Retorna la cantidad
+    de filas escritas.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    rows = 0
+    try:
+        for frame in frames:
+            if writer is None:
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                writer = pq.ParquetWriter(path, table.schema)
+            else:
+                table = pa.Table.from_pandas(frame, schema=writer.schema, preserve_index=False)
+            writer.write_table(table)
+            rows += len(frame)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
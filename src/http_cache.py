@@ -0,0 +1,169 @@
+"""Caché en disco de páginas descargadas y de sus datos extraídos.
+
+Las entradas se guardan en una base SQLite aparte (``data/http_cache.db``) con
+la URL canónica como clave. Una entrada vigente (más nueva que ``ttl``) se usa
+sin tocar la red; una vencida se revalida con ``If-None-Match`` /
+``If-Modified-Since``. Cuando el tamaño total supera ``max_bytes`` se eliminan
+las entradas usadas hace más tiempo (LRU).
+"""
+import json
+import os
+import threading
+import time
+import urllib.parse
+from collections import namedtuple
+
+from src.db import get_connection
+
+CACHE_FILENAME = os.environ.get(
+    "CONSIGNACION_HTTP_CACHE", os.path.join('data', 'http_cache.db')
+)
+DEFAULT_TTL = 6 * 60 * 60            # 6 horas
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024  # 200 MB
+
+# Parámetros de seguimiento de chileautos que no cambian el contenido.
+TRACKING_PARAMS = {"cr", "gts", "gtssaleid", "gtsviewtype", "rankingtype"}
+
+# Solo se registra un nuevo acceso si el anterior es más antiguo que esto,
+# para que las lecturas repetidas no escriban en disco en cada rerun.
+ACCESS_RESOLUTION = 60
+
+CacheEntry = namedtuple(
+    "CacheEntry", "url body etag last_modified fetched_at parsed"
+)
+
+
+def canonical_url(url):
+    """Normaliza una URL para usarla como clave de caché."""
+    parts = urllib.parse.urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme, netloc.rsplit(":", 1)[-1]) in (("http", "80"), ("https", "443")):
+        netloc = netloc.rsplit(":", 1)[0]
+    query = sorted(
+        (key, value)
+        for key, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_")
+    )
+    return urllib.parse.urlunsplit(
+        (scheme, netloc, parts.path or "/", urllib.parse.urlencode(query), "")
+    )
+
+
+class ResponseCache:
+    """Caché de respuestas HTTP y resultados de extracción por URL canónica."""
+
+    def __init__(self, path=CACHE_FILENAME, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        con = get_connection(self.path)
+        if not self._ready:
+            with self._lock:
+                con.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS respuestas (
+                        url TEXT PRIMARY KEY,
+                        body BLOB NOT NULL,
+                        etag TEXT,
+                        last_modified TEXT,
+                        fetched_at REAL NOT NULL,
+                        accessed_at REAL NOT NULL,
+                        size INTEGER NOT NULL,
+                        parsed TEXT
+                    )
+                    """
+                )
+                con.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_respuestas_accessed ON respuestas(accessed_at)"
+                )
+                con.commit()
+                self._ready = True
+        return con
+
+    def get(self, url):
+        """Retorna la entrada de ``url`` (vigente o no) o None."""
+        key = canonical_url(url)
+        con = self._connection()
+        row = con.execute(
+            "SELECT body, etag, last_modified, fetched_at, accessed_at, parsed FROM respuestas WHERE url = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        body, etag, last_modified, fetched_at, accessed_at, parsed = row
+        now = time.time()
+        if now - accessed_at > ACCESS_RESOLUTION:
+            with con:
+                con.execute("UPDATE respuestas SET accessed_at = ? WHERE url = ?", (now, key))
+        return CacheEntry(
+            key, body, etag, last_modified, fetched_at,
+            json.loads(parsed) if parsed else None,
+        )
+
+    def is_fresh(self, entry):
+        """Indica si la entrada puede usarse sin revalidar."""
+        return time.time() - entry.fetched_at < self.ttl
+
+    def put(self, url, body, etag=None, last_modified=None, parsed=None):
+        """Guarda (o reemplaza) la respuesta de ``url``."""
+        key = canonical_url(url)
+        now = time.time()
+        con = self._connection()
+        with con:
+            con.execute(
+                """
+                INSERT OR REPLACE INTO respuestas
+                    (url, body, etag, last_modified, fetched_at, accessed_at, size, parsed)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    key, body, etag, last_modified, now, now, len(body),
+                    json.dumps(parsed) if parsed is not None else None,
+                ),
+            )
+        self.evict()
+
+    def touch(self, url):
+        """Marca como recién descargada una entrada revalidada (HTTP 304)."""
+        now = time.time()
+        with self._connection() as con:
+            con.execute(
+                "UPDATE respuestas SET fetched_at = ?, accessed_at = ? WHERE url = ?",
+                (now, now, canonical_url(url)),
+            )
+
+    def set_parsed(self, url, parsed):
+        """Guarda los datos extraídos de la página de ``url``."""
+        with self._connection() as con:
+            con.execute(
+                "UPDATE respuestas SET parsed = ? WHERE url = ?",
+                (json.dumps(parsed), canonical_url(url)),
+            )
+
+    def evict(self):
+        """Elimina las entradas menos usadas hasta respetar ``max_bytes``."""
+        con = self._connection()
+        total = con.execute("SELECT COALESCE(SUM(size), 0) FROM respuestas").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        removed = 0
+        with con:
+            for key, size in con.execute(
+                "SELECT url, size FROM respuestas ORDER BY accessed_at, rowid"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                con.execute("DELETE FROM respuestas WHERE url = ?", (key,))
+                total -= size
+                removed += 1
+        return removed
+
+    def clear(self):
+        """Vacía la caché."""
+        with self._connection() as con:
+            con.execute("DELETE FROM respuestas")
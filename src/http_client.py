@@ -0,0 +1,154 @@
+"""Cliente HTTP compartido para el scraping.
+
+Una sola ``requests.Session`` por proceso mantiene abiertas (keep-alive) las
+conexiones a chileautos, de modo que las descargas siguientes no repiten el
+handshake TCP + TLS. Las respuestas 429/5xx y los errores de conexión se
+reintentan con espera exponencial con jitter, respetando ``Retry-After``. Si
+un sitio falla repetidamente, el cortocircuito (circuit breaker) deja de
+enviarle solicitudes durante un tiempo.
+"""
+import email.utils
+import random
+import threading
+import time
+import urllib.parse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5   # segundos
+BACKOFF_MAX = 30     # tope de espera entre intentos
+POOL_MAXSIZE = 16    # conexiones abiertas por sitio
+
+FAILURE_THRESHOLD = 5  # fallas seguidas para abrir el cortocircuito
+RESET_TIMEOUT = 60     # segundos antes de permitir un intento de prueba
+
+
+class CircuitOpenError(requests.RequestException):
+    """El sitio falló demasiadas veces seguidas y se dejó de consultar."""
+
+
+class CircuitBreaker:
+    """Cortocircuito por sitio: cerrado, abierto o semiabierto (un intento de prueba)."""
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = {}
+        self._opened_at = {}
+        self._trial = set()
+
+    def allow(self, host):
+        """Indica si se puede enviar una solicitud a ``host``."""
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return True
+            if self._clock() - opened_at < self.reset_timeout or host in self._trial:
+                return False
+            self._trial.add(host)
+            return True
+
+    def retry_in(self, host):
+        """Segundos que faltan para volver a intentar con ``host``."""
+        opened_at = self._opened_at.get(host)
+        if opened_at is None:
+            return 0
+        return max(0, self.reset_timeout - (self._clock() - opened_at))
+
+    def record_success(self, host):
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+            self._trial.discard(host)
+
+    def record_failure(self, host):
+        with self._lock:
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if host in self._trial or failures >= self.failure_threshold:
+                self._opened_at[host] = self._clock()
+            self._trial.discard(host)
+
+
+def parse_retry_after(value):
+    """Convierte un encabezado Retry-After (segundos o fecha HTTP) en segundos."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class ScraperClient:
+    """Sesión HTTP con conexiones persistentes, reintentos y cortocircuito."""
+
+    def __init__(
+        self,
+        headers=None,
+        max_retries=MAX_RETRIES,
+        backoff_base=BACKOFF_BASE,
+        backoff_max=BACKOFF_MAX,
+        pool_maxsize=POOL_MAXSIZE,
+        breaker=None,
+        session=None,
+        sleep=time.sleep,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self._sleep = sleep
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        if headers:
+            session.headers.update(headers)
+        self.session = session
+
+    def backoff(self, attempt):
+        """Espera antes del reintento ``attempt`` (full jitter)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def get(self, url, **kwargs):
+        """GET con reintentos. Retorna la última respuesta o lanza la última excepción."""
+        host = urllib.parse.urlsplit(url).netloc.lower()
+        if not self.breaker.allow(host):
+            raise CircuitOpenError(
+                f"{host} no responde; se reintentará en {self.breaker.retry_in(host):.0f} s"
+            )
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if last_attempt:
+                    self.breaker.record_failure(host)
+                    raise
+                self._sleep(self.backoff(attempt))
+                continue
+            except requests.RequestException:
+                # Redirecciones infinitas, respuestas cortadas...: no se
+                # reintentan, pero cuentan como falla (y cierran el intento de prueba)
+                self.breaker.record_failure(host)
+                raise
+            if response.status_code not in RETRY_STATUSES:
+                self.breaker.record_success(host)
+                return response
+            wait = parse_retry_after(response.headers.get("Retry-After"))
+            if last_attempt or (wait is not None and wait > self.backoff_max):
+                self.breaker.record_failure(host)
+                return response
+            self._sleep(wait if wait is not None else self.backoff(attempt))
+        return response
@@ -0,0 +1,166 @@
+"""Almacén de imágenes de contacto direccionado por contenido.
+
+Cada imagen se guarda una sola vez con el SHA-256 de sus bytes como nombre
+(``data/contact_images/ab/abcd...``) y el contacto guarda ese hash en
+``contactos.imagen_hash``. Dos sesiones que descargan la misma imagen escriben
+el mismo archivo (de forma atómica), por lo que no se pisan entre sí, y una
+imagen repetida no se vuelve a escribir. Las imágenes usadas recientemente
+se sirven desde memoria.
+
+Cuando el almacén supera ``max_bytes`` se eliminan las imágenes huérfanas (sin
+contacto que las referencie), empezando por las más antiguas.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+IMAGES_DIR = os.environ.get(
+    "CONSIGNACION_IMAGES", os.path.join('data', 'contact_images')
+)
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024  # 50 MB
+MEMORY_ITEMS = 64  # imágenes que se mantienen en memoria
+
+_store = None
+_store_lock = threading.Lock()
+
+
+class ImageStore:
+    """Imágenes en disco por hash de contenido, con las recientes en memoria."""
+
+    def __init__(self, root=IMAGES_DIR, max_bytes=DEFAULT_MAX_BYTES, memory_items=MEMORY_ITEMS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._total = None  # bytes en disco; se calcula al primer uso
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def _remember(self, digest, data):
+        with self._lock:
+            self._memory[digest] = data
+            self._memory.move_to_end(digest)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def put(self, data):
+        """Guarda ``data`` si no existe y retorna su hash."""
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            known = digest in self._memory
+        if not known:
+            path = self.path(digest)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+                try:
+                    with os.fdopen(fd, "wb") as f:
+                        f.write(data)
+                    os.replace(tmp, path)
+                except BaseException:
+                    if os.path.exists(tmp):
+                        os.remove(tmp)
+                    raise
+                with self._lock:
+                    if self._total is not None:
+                        self._total += len(data)
+        self._remember(digest, data)
+        return digest
+
+    def get(self, digest):
+        """Retorna los bytes de la imagen ``digest`` o None si no existe."""
+        with self._lock:
+            data = self._memory.get(digest)
+            if data is not None:
+                self._memory.move_to_end(digest)
+                return data
+        try:
+            with open(self.path(digest), "rb") as f:
+                data = f.read()
+        except (OSError, ValueError):
+            return None
+        self._remember(digest, data)
+        return data
+
+    def _files(self):
+        """Lista ``(mtime, tamaño, hash)`` de las imágenes en disco."""
+        files = []
+        if not os.path.isdir(self.root):
+            return files
+        for prefix in os.listdir(self.root):
+            folder = os.path.join(self.root, prefix)
+            if not os.path.isdir(folder):
+                continue
+            for name in os.listdir(folder):
+                if name.startswith(".tmp-"):
+                    continue
+                st = os.stat(os.path.join(folder, name))
+                files.append((st.st_mtime, st.st_size, name))
+        return files
+
+    def total_bytes(self):
+        with self._lock:
+            total = self._total
+        if total is None:
+            total = sum(size for _, size, _ in self._files())
+            with self._lock:
+                self._total = total
+        return total
+
+    def evict_orphans(self, referenced):
+        """Elimina imágenes no referenciadas hasta respetar ``max_bytes``.
+
+        ``referenced`` es el conjunto de hashes en uso. Retorna cuántas se eliminaron.
+        """
+        if self.total_bytes() <= self.max_bytes:
+            return 0
+        files = self._files()
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, digest in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if digest in referenced:
+                continue
+            try:
+                os.remove(self.path(digest))
+            except FileNotFoundError:
+                pass
+            with self._lock:
+                self._memory.pop(digest, None)
+            total -= size
+            removed += 1
+        with self._lock:
+            self._total = total
+        return removed
+
+
+def get_store():
+    """Retorna el almacén de imágenes del proceso."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ImageStore()
+    return _store
+
+
+def referenced_hashes(con):
+    """Hashes de imagen referenciados por algún contacto."""
+    return {
+        row[0] for row in con.execute(
+            "SELECT DISTINCT imagen_hash FROM contactos WHERE imagen_hash IS NOT NULL"
+        )
+    }
+
+
+def collect_garbage(con, store=None):
+    """Elimina imágenes huérfanas si el almacén superó su tamaño máximo."""
+    store = store or get_store()
+    if store.total_bytes() <= store.max_bytes:
+        return 0
+    return store.evict_orphans(referenced_hashes(con))
@@ -0,0 +1,285 @@
+"""Trabajos en segundo plano (descargas, cargas masivas y exportaciones).
+
+Las operaciones lentas no corren dentro del script de Streamlit: la página
+las envía a un ``JobRunner`` (un pool de hilos acotado del proceso) y solo
+consulta su estado. El estado, el avance y el resultado de cada trabajo se
+guardan en una base SQLite propia (``data/jobs.db``, aparte de la base
+principal para no invalidar sus cachés con cada avance), así que un trabajo
+sigue visible tras recargar el navegador: la página lo vuelve a encontrar
+por su tipo y su clave. Un trabajo puede cancelarse desde el proceso que lo
+ejecuta; la función revisa la cancelación en cada llamada a ``progress``.
+
+Los resultados deben poder guardarse como JSON. Los archivos generados se
+escriben en ``data/job_files`` y el resultado guarda su ruta.
+"""
+import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from src.db import get_connection
+
+JOBS_FILENAME = os.environ.get(
+    "CONSIGNACION_JOBS", os.path.join("data", "jobs.db")
+)
+FILES_DIR = os.environ.get(
+    "CONSIGNACION_JOB_FILES", os.path.join("data", "job_files")
+)
+MAX_WORKERS = 2
+MAX_QUEUED = 16            # trabajos pendientes como máximo
+PROGRESS_INTERVAL = 0.5    # segundos mínimos entre escrituras de avance
+FILE_MAX_AGE = 24 * 3600   # los archivos generados se borran tras un día
+
+PENDIENTE = "pendiente"
+EJECUTANDO = "ejecutando"
+TERMINADO = "terminado"
+ERROR = "error"
+CANCELADO = "cancelado"
+ACTIVE = (PENDIENTE, EJECUTANDO)
+
+Job = namedtuple(
+    "Job", "id tipo clave estado progreso mensaje resultado error creado actualizado"
+)
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        tipo TEXT NOT NULL,
+        clave TEXT,
+        estado TEXT NOT NULL,
+        progreso REAL NOT NULL DEFAULT 0,
+        mensaje TEXT,
+        resultado TEXT,
+        error TEXT,
+        creado REAL NOT NULL,
+        actualizado REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_jobs_tipo_clave ON jobs(tipo, clave, creado)",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_estado ON jobs(estado)",
+)
+
+
+class JobCancelled(Exception):
+    """Se lanza dentro de un trabajo cuando alguien pidió cancelarlo."""
+
+
+class JobQueueFull(Exception):
+    """Hay demasiados trabajos pendientes; se debe intentar más tarde."""
+
+
+class JobContext:
+    """Lo que recibe la función de un trabajo para informar su avance."""
+
+    def __init__(self, runner, job_id):
+        self.runner = runner
+        self.id = job_id
+        self._last = 0.0
+
+    def cancelled(self):
+        return self.runner._cancel_requested(self.id)
+
+    def progress(self, fraction, mensaje=None, force=False):
+        """Registra el avance (0 a 1) y lanza ``JobCancelled`` si corresponde."""
+        if self.cancelled():
+            raise JobCancelled()
+        now = time.monotonic()
+        if force or now - self._last >= PROGRESS_INTERVAL:
+            self._last = now
+            self.runner._update(self.id, progreso=min(max(float(fraction), 0.0), 1.0), mensaje=mensaje)
+
+    def file_path(self, extension):
+        """Ruta donde el trabajo puede escribir un archivo de resultado."""
+        os.makedirs(self.runner.files_dir, exist_ok=True)
+        return os.path.join(self.runner.files_dir, f"{self.id}.{extension}")
+
+
+class JobRunner:
+    """Ejecuta trabajos en un pool de hilos y guarda su estado en SQLite."""
+
+    def __init__(self, path=JOBS_FILENAME, files_dir=FILES_DIR,
+                 max_workers=MAX_WORKERS, max_queued=MAX_QUEUED):
+        self.path = path
+        self.files_dir = files_dir
+        self.max_queued = max_queued
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._futures = {}
+        self._cancel = set()
+        self._lock = threading.Lock()
+        con = get_connection(path)
+        with con:
+            for statement in SCHEMA:
+                con.execute(statement)
+            # Lo que quedó a medias en un proceso anterior ya no va a terminar
+            con.execute(
+                "UPDATE jobs SET estado = ?, error = ?, actualizado = ? WHERE estado IN (?, ?)",
+                (ERROR, "Interrumpido al reiniciar la aplicación", time.time(), *ACTIVE),
+            )
+        self.purge_files()
+
+    # ------------------------------------------------------------------ estado
+    def _update(self, job_id, **fields):
+        fields["actualizado"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with get_connection(self.path) as con:
+            con.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def _cancel_requested(self, job_id):
+        with self._lock:
+            return job_id in self._cancel
+
+    def get(self, job_id):
+        """Estado actual del trabajo ``job_id`` (``Job``) o None."""
+        row = get_connection(self.path).execute(
+            "SELECT id, tipo, clave, estado, progreso, mensaje, resultado, error, creado, actualizado "
+            "FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        return _job(row)
+
+    def latest(self, tipo, clave, max_age=None):
+        """Último trabajo de ``tipo`` con ``clave`` (para retomarlo tras recargar).
+
+        Con ``max_age`` (segundos) se ignoran los trabajos más antiguos.
+        """
+        since = time.time() - max_age if max_age is not None else 0
+        row = get_connection(self.path).execute(
+            "SELECT id, tipo, clave, estado, progreso, mensaje, resultado, error, creado, actualizado "
+            "FROM jobs WHERE tipo = ? AND clave = ? AND creado >= ? ORDER BY creado DESC LIMIT 1",
+            (tipo, clave, since),
+        ).fetchone()
+        return _job(row)
+
+    def latest_file(self, tipo, clave, max_age=FILE_MAX_AGE):
+        """Como ``latest``, para trabajos que generan un archivo.
+
+        Un trabajo terminado cuyo archivo ya se borró (ver ``purge_files``)
+        cuenta como inexistente: hay que generarlo de nuevo.
+        """
+        job = self.latest(tipo, clave, max_age=max_age)
+        if job is not None and job.estado == TERMINADO:
+            archivo = (job.resultado or {}).get("archivo")
+            if not archivo or not os.path.exists(archivo):
+                return None
+        return job
+
+    # -------------------------------------------------------------- ejecución
+    def submit(self, tipo, func, *args, clave=None, reuse=True, **kwargs):
+        """Envía ``func(ctx, *args, **kwargs)`` al pool y retorna el id del trabajo.
+
+        Con ``reuse`` (por defecto), si ya hay un trabajo activo del mismo tipo
+        y clave se retorna ese en vez de crear otro.
+        """
+        # Los archivos vencidos se borran a medida que se piden otros
+        self.purge_files()
+        if reuse and clave is not None:
+            previous = self.latest(tipo, clave)
+            if previous is not None and previous.estado in ACTIVE:
+                return previous.id
+        with self._lock:
+            queued = sum(1 for f in self._futures.values() if not f.running())
+            if queued >= self.max_queued:
+                raise JobQueueFull("Hay demasiados trabajos en espera; intente en unos momentos.")
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            with get_connection(self.path) as con:
+                con.execute(
+                    "INSERT INTO jobs (id, tipo, clave, estado, creado, actualizado) VALUES (?, ?, ?, ?, ?, ?)",
+                    (job_id, tipo, clave, PENDIENTE, now, now),
+                )
+            self._futures[job_id] = self._executor.submit(self._run, job_id, func, args, kwargs)
+        return job_id
+
+    def _run(self, job_id, func, args, kwargs):
+        ctx = JobContext(self, job_id)
+        try:
+            if self._cancel_requested(job_id):
+                raise JobCancelled()
+            self._update(job_id, estado=EJECUTANDO)
+            result = func(ctx, *args, **kwargs)
+            self._update(job_id, estado=TERMINADO, progreso=1.0, resultado=json.dumps(result))
+        except JobCancelled:
+            self._update(job_id, estado=CANCELADO)
+        except Exception as e:
+            self._update(job_id, estado=ERROR, error=str(e) or type(e).__name__)
+        finally:
+            with self._lock:
+                self._futures.pop(job_id, None)
+                self._cancel.discard(job_id)
+
+    def cancel(self, job_id):
+        """Pide cancelar un trabajo; uno pendiente se cancela de inmediato."""
+        with self._lock:
+            future = self._futures.get(job_id)
+            if future is None:
+                return False
+            self._cancel.add(job_id)
+            if future.cancel():
+                self._futures.pop(job_id, None)
+                self._cancel.discard(job_id)
+                self._update(job_id, estado=CANCELADO)
+        return True
+
+    def wait(self, job_id, timeout=None):
+        """Espera a que termine ``job_id`` (útil en pruebas y herramientas)."""
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            try:
+                future.result(timeout)
+            except Exception:
+                pass
+        return self.get(job_id)
+
+    def purge_files(self, max_age=FILE_MAX_AGE):
+        """Borra los archivos de resultados más antiguos que ``max_age`` segundos."""
+        if not os.path.isdir(self.files_dir):
+            return 0
+        limit = time.time() - max_age
+        removed = 0
+        for entry in os.scandir(self.files_dir):
+            if entry.is_file() and entry.stat().st_mtime < limit:
+                os.remove(entry.path)
+                removed += 1
+        return removed
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def _job(row):
+    if row is None:
+        return None
+    job = Job(*row)
+    resultado = json.loads(job.resultado) if job.resultado else None
+    return job._replace(resultado=resultado)
+
+
+def make_key(*parts):
+    """Clave compacta para identificar un trabajo a partir de sus parámetros."""
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+
+def fecha(job):
+    """Fecha de creación de ``job`` en formato legible."""
+    return datetime.datetime.fromtimestamp(job.creado).strftime("%d-%m-%Y %H:%M")
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_runner():
+    """``JobRunner`` compartido por el proceso."""
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner = JobRunner()
+    return _runner
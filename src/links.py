@@ -0,0 +1,76 @@
+"""Generación por columnas de los enlaces de WhatsApp de una exportación.
+
+En vez de recorrer el DataFrame fila por fila (``iterrows`` + ``to_dict``),
+se toman una sola vez las columnas necesarias (teléfono y las que usan las
+plantillas) y se arman en bloque el teléfono limpio, el id del mensaje
+asignado y el enlace codificado. Acepta un DataFrame de pandas, una tabla de
+Arrow o un diccionario ``{columna: lista}``.
+
+Los mensajes se rotan igual que antes: la fila ``i`` usa el mensaje
+``i % len(mensajes)``.
+"""
+from src.templates import compile_template
+
+WHATSAPP_URL = "https://wa.me/56"
+
+
+def column_names(data):
+    """Nombres de columna de un DataFrame, una tabla Arrow o un diccionario."""
+    if hasattr(data, "column_names"):  # pyarrow.Table
+        return list(data.column_names)
+    if hasattr(data, "columns"):  # pandas.DataFrame
+        return list(data.columns)
+    return list(data)
+
+
+def column_values(data, name):
+    """Valores de la columna ``name`` como lista de objetos de Python."""
+    if hasattr(data, "column_names"):
+        return data.column(name).to_pylist()
+    column = data[name]
+    if hasattr(column, "tolist"):
+        return column.tolist()
+    return list(column)
+
+
+def clean_phones(values):
+    """Quita todos los espacios de cada teléfono."""
+    return ["".join(str(value).split()) for value in values]
+
+
+def build_links(data, mensajes, mensaje_ids=None, start=0):
+    """Arma los enlaces de todos los contactos de ``data``.
+
+    Retorna un diccionario de columnas (listas del mismo largo que ``data``):
+    ``telefono`` (sin espacios), ``mensaje_id`` (si se entregan ``mensaje_ids``,
+    en paralelo a ``mensajes``) y ``whatsapp_link``. ``start`` es la posición
+    de la primera fila dentro de la exportación completa, para continuar la
+    rotación de mensajes cuando los contactos llegan por bloques.
+    """
+    if not mensajes:
+        raise ValueError("Se necesita al menos un mensaje")
+    planes = [compile_template(m) for m in mensajes]
+    names = set(column_names(data))
+    needed = {"telefono"} | {f for plan in planes for f in plan.fields if f in names}
+    columns = {name: column_values(data, name) for name in needed}
+    telefonos = clean_phones(columns["telefono"])
+    count = len(telefonos)
+
+    # Las filas de cada plantilla son i, i + n, i + 2n...: se renderizan juntas.
+    n = len(planes)
+    encoded = [None] * count
+    for k in range(min(n, count)):
+        plan = planes[(start + k) % n]
+        rows = {name: values[k::n] for name, values in columns.items()}
+        encoded[k::n] = plan.render_columns(rows, len(range(k, count, n)))
+
+    result = {
+        "telefono": telefonos,
+        "whatsapp_link": [
+            WHATSAPP_URL + telefono + "?text=" + texto
+            for telefono, texto in zip(telefonos, encoded)
+        ],
+    }
+    if mensaje_ids is not None:
+        result["mensaje_id"] = [mensaje_ids[(start + i) % n] for i in range(count)]
+    return result
@@ -0,0 +1,507 @@
+"""Migraciones versionadas del esquema de la base de datos.
+
+La versión aplicada se guarda en ``PRAGMA user_version``. Cada migración es una
+función que recibe un cursor dentro de una transacción; se aplican en orden y
+nunca se modifican una vez publicadas (los cambios nuevos van en una migración
+nueva al final de ``MIGRATIONS``).
+
+Uso sin Streamlit::
+
+    python -m src.migrations            # aplica las migraciones pendientes
+    python -m src.migrations --status   # muestra la versión actual
+    python -m src.migrations --reindex  # además reconstruye los índices
+"""
+import argparse
+import logging
+import re
+import sqlite3
+import sys
+import threading
+
+from src.db import DB_FILENAME, get_connection
+
+log = logging.getLogger(__name__)
+
+
+# =============================================================================
+# PASOS DE MIGRACIÓN
+# =============================================================================
+def _fix_contactos_unique(cur):
+    """Ajusta la tabla contactos si el esquema anterior tenia restricciones incorrectas."""
+    cur.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='contactos'")
+    row = cur.fetchone()
+    if not row:
+        return
+    table_sql = row[0].upper()
+
+    telefono_unique = (
+        re.search(r"TELEFONO\s+TEXT\s+UNIQUE", table_sql) or
+        "UNIQUE(\"TELEFONO\"" in table_sql
+    )
+    link_auto_unique = (
+        re.search(r"LINK_AUTO\s+TEXT\s+UNIQUE", table_sql) or
+        "UNIQUE(\"LINK_AUTO\"" in table_sql
+    )
+
+    if telefono_unique or not link_auto_unique:
+        cur.execute("ALTER TABLE contactos RENAME TO contactos_old")
+        cur.execute(
+            """
+            CREATE TABLE contactos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                link_auto TEXT UNIQUE NOT NULL,
+                telefono TEXT NOT NULL,
+                nombre TEXT NOT NULL,
+                auto TEXT NOT NULL,
+                precio REAL NOT NULL,
+                descripcion TEXT NOT NULL,
+                id_link INTEGER,
+                FOREIGN KEY (id_link) REFERENCES links_contactos(id)
+            )
+            """
+        )
+        cur.execute(
+            """
+            INSERT OR IGNORE INTO contactos (id, link_auto, telefono, nombre, auto, precio, descripcion, id_link)
+            SELECT id, link_auto, telefono, nombre, auto, precio, descripcion, id_link
+            FROM contactos_old
+            """
+        )
+        cur.execute("DROP TABLE contactos_old")
+
+
+def _create_base_tables(cur):
+    """Crea las tablas necesarias si no existen."""
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS links_contactos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            link_general TEXT NOT NULL,
+            fecha_creacion TEXT NOT NULL,
+            marca TEXT NOT NULL,
+            descripcion TEXT NOT NULL
+        )
+    ''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS contactos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            link_auto TEXT UNIQUE NOT NULL,
+            telefono TEXT NOT NULL,
+            nombre TEXT NOT NULL,
+            auto TEXT NOT NULL,
+            precio REAL NOT NULL,
+            descripcion TEXT NOT NULL,
+            id_link INTEGER,
+            FOREIGN KEY (id_link) REFERENCES links_contactos(id)
+        )
+    ''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS mensajes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            descripcion TEXT NOT NULL
+        )
+    ''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS export_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            contact_id INTEGER NOT NULL,
+            mensaje_id INTEGER NOT NULL,
+            link_generado TEXT NOT NULL,
+            fecha_exportacion TEXT NOT NULL,
+            FOREIGN KEY (contact_id) REFERENCES contactos(id),
+            FOREIGN KEY (mensaje_id) REFERENCES mensajes(id)
+        )
+    ''')
+
+
+# Índices secundarios administrados: nombre -> tabla(columnas). La prueba
+# tests/test_query_plan.py comprueba que las consultas de las páginas los usan.
+INDEXES = {
+    "idx_contactos_id_link": "contactos(id_link)",
+    "idx_export_logs_contacto_fecha": "export_logs(contact_id, fecha_exportacion)",
+    "idx_export_logs_mensaje": "export_logs(mensaje_id)",
+}
+
+
+def ensure_indexes(cur):
+    """Crea los índices administrados que falten."""
+    for name, target in INDEXES.items():
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+
+
+def _blob_to_int(value):
+    """Convierte un entero de numpy guardado como BLOB (8 bytes) a int."""
+    if isinstance(value, bytes) and len(value) == 8:
+        return int.from_bytes(value, "little", signed=True)
+    return value
+
+
+def _normalize_keys_and_indexes(cur):
+    """Normaliza claves y teléfonos antiguos y crea los índices secundarios.
+
+    Versiones anteriores guardaban ``id_link`` y ``mensaje_id`` como BLOB
+    (enteros de numpy); un BLOB nunca es igual a un INTEGER, así que esas filas
+    no se encontrarían al consultar con enteros normales.
+    """
+    for table, column in (("contactos", "id_link"), ("export_logs", "mensaje_id")):
+        rows = cur.execute(
+            f"SELECT id, {column} FROM {table} WHERE typeof({column}) = 'blob'"
+        ).fetchall()
+        cur.executemany(
+            f"UPDATE {table} SET {column} = ? WHERE id = ?",
+            [(_blob_to_int(value), row_id) for row_id, value in rows],
+        )
+    # Mismo criterio que al guardar: el teléfono se almacena sin espacios.
+    cur.execute(
+        """
+        UPDATE contactos
+        SET telefono = REPLACE(REPLACE(REPLACE(REPLACE(telefono, ' ', ''), char(9), ''), char(10), ''), char(13), '')
+        WHERE telefono GLOB '*[ ' || char(9) || char(10) || char(13) || ']*'
+        """
+    )
+    ensure_indexes(cur)
+
+
+def _create_contactos_fts(cur):
+    """Crea el índice de texto completo (trigramas) de contactos y sus triggers.
+
+    Si SQLite no trae FTS5 o es anterior a 3.34 (sin tokenizador trigram), la
+    migración no crea nada y la búsqueda sigue usando LIKE (ver src/search.py);
+    ``ensure_fts`` lo vuelve a intentar más adelante. Retorna si se creó.
+    """
+    try:
+        cur.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS contactos_fts USING fts5(
+                nombre, auto, telefono,
+                content='contactos', content_rowid='id', tokenize='trigram'
+            )
+            """
+        )
+    except sqlite3.OperationalError as e:
+        log.warning("Sin índice de texto de contactos (FTS5/trigram no disponible: %s)", e)
+        return False
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS contactos_fts_ai AFTER INSERT ON contactos BEGIN
+            INSERT INTO contactos_fts (rowid, nombre, auto, telefono)
+            VALUES (new.id, new.nombre, new.auto, new.telefono);
+        END
+        """
+    )
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS contactos_fts_ad AFTER DELETE ON contactos BEGIN
+            INSERT INTO contactos_fts (contactos_fts, rowid, nombre, auto, telefono)
+            VALUES ('delete', old.id, old.nombre, old.auto, old.telefono);
+        END
+        """
+    )
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS contactos_fts_au AFTER UPDATE OF nombre, auto, telefono ON contactos BEGIN
+            INSERT INTO contactos_fts (contactos_fts, rowid, nombre, auto, telefono)
+            VALUES ('delete', old.id, old.nombre, old.auto, old.telefono);
+            INSERT INTO contactos_fts (rowid, nombre, auto, telefono)
+            VALUES (new.id, new.nombre, new.auto, new.telefono);
+        END
+        """
+    )
+    cur.execute("INSERT INTO contactos_fts (contactos_fts) VALUES ('rebuild')")
+    return True
+
+
+def _add_contactos_imagen_hash(cur):
+    """Agrega la referencia a la imagen de contacto (ver src/images.py)."""
+    columns = {row[1] for row in cur.execute("PRAGMA table_info(contactos)")}
+    if "imagen_hash" not in columns:
+        cur.execute("ALTER TABLE contactos ADD COLUMN imagen_hash TEXT")
+
+
+def _create_export_batches(cur):
+    """Crea las sesiones de exportación y asocia a ellas los registros de export_logs."""
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS export_batches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            hash TEXT NOT NULL,
+            fecha_exportacion TEXT NOT NULL,
+            formato TEXT,
+            total INTEGER NOT NULL,
+            creado TEXT NOT NULL,
+            UNIQUE (hash, fecha_exportacion)
+        )
+        """
+    )
+    columns = {row[1] for row in cur.execute("PRAGMA table_info(export_logs)")}
+    if "batch_id" not in columns:
+        cur.execute(
+            "ALTER TABLE export_logs ADD COLUMN batch_id INTEGER REFERENCES export_batches(id)"
+        )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_export_logs_batch ON export_logs(batch_id)"
+    )
+
+
+def _create_links_search(cur):
+    """Índices del selector de links: prefijo de marca y texto completo (trigramas).
+
+    Igual que en la migración 4, sin FTS5/trigram solo se crea el índice de
+    prefijo y la búsqueda usa LIKE (ver src/search.py). Retorna si se creó
+    ``links_fts``.
+    """
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_links_marca_lower ON links_contactos(lower(marca))"
+    )
+    try:
+        cur.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS links_fts USING fts5(
+                marca, descripcion, link_general,
+                content='links_contactos', content_rowid='id', tokenize='trigram'
+            )
+            """
+        )
+    except sqlite3.OperationalError as e:
+        log.warning("Sin índice de texto de links (FTS5/trigram no disponible: %s)", e)
+        return False
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS links_fts_ai AFTER INSERT ON links_contactos BEGIN
+            INSERT INTO links_fts (rowid, marca, descripcion, link_general)
+            VALUES (new.id, new.marca, new.descripcion, new.link_general);
+        END
+        """
+    )
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS links_fts_ad AFTER DELETE ON links_contactos BEGIN
+            INSERT INTO links_fts (links_fts, rowid, marca, descripcion, link_general)
+            VALUES ('delete', old.id, old.marca, old.descripcion, old.link_general);
+        END
+        """
+    )
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS links_fts_au AFTER UPDATE OF marca, descripcion, link_general ON links_contactos BEGIN
+            INSERT INTO links_fts (links_fts, rowid, marca, descripcion, link_general)
+            VALUES ('delete', old.id, old.marca, old.descripcion, old.link_general);
+            INSERT INTO links_fts (rowid, marca, descripcion, link_general)
+            VALUES (new.id, new.marca, new.descripcion, new.link_general);
+        END
+        """
+    )
+    cur.execute("INSERT INTO links_fts (links_fts) VALUES ('rebuild')")
+    return True
+
+
+def _create_versiones(cur):
+    """Contador de cambios de contactos, mantenido por triggers.
+
+    Sirve de clave para los archivos exportados: a diferencia de
+    ``PRAGMA data_version``, no cambia al registrar una exportación.
+    """
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS versiones (
+            tabla TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    cur.execute("INSERT OR IGNORE INTO versiones (tabla) VALUES ('contactos')")
+    for nombre, evento in (("ai", "INSERT"), ("au", "UPDATE"), ("ad", "DELETE")):
+        cur.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS contactos_version_{nombre} AFTER {evento} ON contactos BEGIN
+                UPDATE versiones SET version = version + 1 WHERE tabla = 'contactos';
+            END
+            """
+        )
+
+
+def _drop_contactos_telefono_index(cur):
+    """Elimina el índice por teléfono de la migración 3.
+
+    Las búsquedas por teléfono son por subcadena (FTS o ``LIKE '%x%'``) y
+    nunca lo usan; solo encarecía cada alta o cambio de contactos.
+    """
+    cur.execute("DROP INDEX IF EXISTS idx_contactos_telefono")
+
+
+# (versión, descripción, función). Las versiones son consecutivas desde 1.
+MIGRATIONS = [
+    (1, "corregir restricciones UNIQUE de contactos", _fix_contactos_unique),
+    (2, "crear tablas base", _create_base_tables),
+    (3, "normalizar claves y crear índices secundarios", _normalize_keys_and_indexes),
+    (4, "índice de búsqueda por trigramas de contactos", _create_contactos_fts),
+    (5, "referencia a la imagen de contacto", _add_contactos_imagen_hash),
+    (6, "sesiones de exportación", _create_export_batches),
+    (7, "búsqueda de links para el selector", _create_links_search),
+    (8, "contador de cambios de contactos", _create_versiones),
+    (9, "eliminar índice por teléfono sin uso", _drop_contactos_telefono_index),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+# Índices de texto: tabla -> (migración que la crea, función). Sin FTS5 la
+# migración se registra igual; ``ensure_fts`` crea después los que falten.
+FTS_TABLES = {
+    "contactos_fts": (4, _create_contactos_fts),
+    "links_fts": (7, _create_links_search),
+}
+
+
+# =============================================================================
+# APLICACIÓN DE MIGRACIONES
+# =============================================================================
+def get_version(con):
+    """Retorna la versión de esquema registrada en la base de datos."""
+    return con.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(con, target=None):
+    """Aplica en orden las migraciones pendientes y retorna las versiones aplicadas.
+
+    Cada migración corre en su propia transacción junto con la actualización de
+    ``user_version``; si falla, la base queda en la versión anterior.
+    """
+    target = LATEST_VERSION if target is None else target
+    applied = []
+    for version, _, step in MIGRATIONS:
+        if version > target:
+            break
+        if get_version(con) >= version:
+            continue
+        # BEGIN IMMEDIATE bloquea a otros procesos que intenten migrar a la vez;
+        # la versión se vuelve a leer ya con el bloqueo tomado.
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            if get_version(con) >= version:
+                con.rollback()
+                continue
+            step(con.cursor())
+            con.execute(f"PRAGMA user_version = {int(version)}")
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+        applied.append(version)
+    return applied
+
+
+_current = set()
+_current_lock = threading.Lock()
+
+
+def ensure_schema(path=None):
+    """Deja el esquema al día una sola vez por proceso y base de datos.
+
+    Las llamadas siguientes (por ejemplo en cada rerun de Streamlit) solo
+    consultan un conjunto en memoria.
+    """
+    path = path or DB_FILENAME
+    if path in _current:
+        return
+    with _current_lock:
+        if path in _current:
+            return
+        con = get_connection(path)
+        if get_version(con) < LATEST_VERSION:
+            migrate(con)
+            con.execute("PRAGMA optimize")
+        ensure_fts(con)
+        _current.add(path)
+
+
+def ensure_fts(con):
+    """Crea los índices de texto que faltan y retorna sus nombres.
+
+    Una base migrada con un SQLite sin FTS5 queda sin ellos; al actualizar
+    SQLite se crean aquí (con sus triggers) en vez de quedar para siempre en
+    la búsqueda con LIKE.
+    """
+    created = []
+    for table, (version, step) in FTS_TABLES.items():
+        if get_version(con) < version or _table_exists(con, table):
+            continue
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            ok = step(con.cursor())
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+        if ok:
+            created.append(table)
+    return created
+
+
+def _table_exists(con, name):
+    return con.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+def reindex(con):
+    """Recrea los índices faltantes, reconstruye todos (incluidos los de texto) y actualiza estadísticas."""
+    ensure_indexes(con.cursor())
+    con.commit()
+    ensure_fts(con)
+    for table in FTS_TABLES:
+        if _table_exists(con, table):
+            con.execute(f"INSERT INTO {table} ({table}) VALUES ('rebuild')")
+            con.execute(f"INSERT INTO {table} ({table}) VALUES ('optimize')")
+            con.commit()
+    con.execute("REINDEX")
+    con.execute("ANALYZE")
+    con.commit()
+
+
+# =============================================================================
+# LÍNEA DE COMANDOS
+# =============================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Aplica las migraciones pendientes del esquema."
+    )
+    parser.add_argument("--db", default=DB_FILENAME, help="Ruta de la base SQLite.")
+    parser.add_argument(
+        "--status", action="store_true",
+        help="Solo muestra la versión actual y las migraciones pendientes.",
+    )
+    parser.add_argument(
+        "--target", type=int, default=None,
+        help="Versión hasta la cual migrar (por defecto, la última).",
+    )
+    parser.add_argument(
+        "--reindex", action="store_true",
+        help="Tras migrar, reconstruye los índices y actualiza estadísticas.",
+    )
+    args = parser.parse_args(argv)
+
+    con = get_connection(args.db)
+    version = get_version(con)
+    pending = [m for m in MIGRATIONS if m[0] > version]
+    if args.status:
+        print(f"Versión actual: {version} (última: {LATEST_VERSION})")
+        for number, description, _ in pending:
+            print(f"  pendiente {number}: {description}")
+        return 0
+    if version > LATEST_VERSION:
+        print(f"La base está en la versión {version}, más nueva que esta aplicación.")
+        return 1
+    try:
+        applied = migrate(con, args.target)
+    except sqlite3.Error as e:
+        print(f"Error al migrar: {e}", file=sys.stderr)
+        return 1
+    if applied:
+        print(f"Migraciones aplicadas: {', '.join(str(v) for v in applied)}")
+    else:
+        print("El esquema ya está al día.")
+    if args.reindex:
+        reindex(con)
+        print("Índices reconstruidos.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
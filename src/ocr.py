@@ -0,0 +1,241 @@
+"""Lectura (OCR) del teléfono desde la imagen de contacto.
+
+Cuando la ficha no trae un link ``wa.me``, el teléfono suele estar solo en la
+imagen de contacto. Las imágenes se leen con Tesseract (``pytesseract``) en un
+pool de procesos, por lotes, y el resultado queda en caché por hash de imagen
+(ver src/images.py): una imagen repetida nunca se lee dos veces.
+
+``pytesseract`` y Pillow son opcionales; sin ellos ``ocr_available()`` retorna
+False y el teléfono se sigue ingresando a mano.
+"""
+import functools
+import io
+import multiprocessing
+import re
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from src.db import get_connection
+from src.http_cache import CACHE_FILENAME
+
+MAX_WORKERS = 2
+BATCH_SIZE = 16         # imágenes por tarea enviada a un proceso
+MIN_CONFIDENCE = 0.6    # bajo esto el teléfono no se completa automáticamente
+SCALE = 3               # las imágenes de contacto son pequeñas; se amplían antes de leer
+TESSERACT_CONFIG = "--psm 7 -c tessedit_char_whitelist=+0123456789"
+
+OcrResult = namedtuple("OcrResult", "telefono confianza texto")
+
+# Celular chileno: 9 dígitos que empiezan con 9, con o sin el prefijo 56.
+PHONE_PATTERN = re.compile(r"(?:56)?(9\d{8})")
+
+
+@functools.lru_cache(maxsize=None)
+def ocr_available():
+    """Indica si están instalados pytesseract, Pillow y el programa tesseract."""
+    try:
+        import PIL.Image  # noqa: F401
+        import pytesseract
+    except ImportError:
+        return False
+    try:
+        pytesseract.get_tesseract_version()
+    except Exception:
+        return False
+    return True
+
+
+def parse_phone(text):
+    """Extrae el celular (9 dígitos, sin el 56) del texto leído, o None."""
+    match = PHONE_PATTERN.search(re.sub(r"\D", "", text or ""))
+    return match.group(1) if match else None
+
+
+def read_image(data):
+    """Lee una imagen con Tesseract y retorna ``OcrResult``.
+
+    La confianza es el promedio (0 a 1) de la confianza de Tesseract en las
+    palabras con dígitos.
+    """
+    import pytesseract
+    from PIL import Image, ImageOps
+
+    image = Image.open(io.BytesIO(data))
+    if image.mode in ("RGBA", "LA", "P"):
+        # Fondo transparente: se compone sobre blanco para no leerlo como negro
+        image = image.convert("RGBA")
+        background = Image.new("RGBA", image.size, "white")
+        image = Image.alpha_composite(background, image)
+    image = ImageOps.grayscale(image)
+    image = image.resize((image.width * SCALE, image.height * SCALE), Image.LANCZOS)
+    words = pytesseract.image_to_data(
+        image, config=TESSERACT_CONFIG, output_type=pytesseract.Output.DICT
+    )
+    texto, confianzas = [], []
+    for word, conf in zip(words["text"], words["conf"]):
+        word = word.strip()
+        if not word:
+            continue
+        texto.append(word)
+        if any(c.isdigit() for c in word) and float(conf) >= 0:
+            confianzas.append(float(conf) / 100)
+    texto = " ".join(texto)
+    telefono = parse_phone(texto)
+    confianza = sum(confianzas) / len(confianzas) if telefono and confianzas else 0.0
+    return OcrResult(telefono, round(confianza, 3), texto)
+
+
+def _read_batch(images, recognize=read_image):
+    """Lee un lote de imágenes dentro de un proceso del pool.
+
+    Una imagen que no se puede leer retorna None (no se guarda en la caché,
+    para reintentarla más adelante).
+    """
+    results = []
+    for data in images:
+        try:
+            results.append(recognize(data))
+        except Exception:
+            results.append(None)
+    return results
+
+
+class OcrCache:
+    """Resultados de OCR por hash de imagen, en la base de la caché HTTP."""
+
+    def __init__(self, path=CACHE_FILENAME):
+        self.path = path
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        con = get_connection(self.path)
+        if not self._ready:
+            with self._lock:
+                con.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS ocr (
+                        imagen_hash TEXT PRIMARY KEY,
+                        telefono TEXT,
+                        confianza REAL NOT NULL,
+                        texto TEXT NOT NULL,
+                        fecha REAL NOT NULL
+                    )
+                    """
+                )
+                con.commit()
+                self._ready = True
+        return con
+
+    def get_many(self, digests):
+        """Retorna ``{hash: OcrResult}`` para los hashes ya leídos."""
+        digests = list(digests)
+        found = {}
+        con = self._connection()
+        for i in range(0, len(digests), 500):
+            chunk = digests[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for digest, telefono, confianza, texto in con.execute(
+                f"SELECT imagen_hash, telefono, confianza, texto FROM ocr WHERE imagen_hash IN ({placeholders})",
+                chunk,
+            ):
+                found[digest] = OcrResult(telefono, confianza, texto)
+        return found
+
+    def put_many(self, results):
+        """Guarda ``{hash: OcrResult}``."""
+        now = time.time()
+        with self._connection() as con:
+            con.executemany(
+                "INSERT OR REPLACE INTO ocr (imagen_hash, telefono, confianza, texto, fecha) VALUES (?, ?, ?, ?, ?)",
+                [(digest, *result, now) for digest, result in results.items()],
+            )
+
+
+_cache = None
+
+
+def get_cache():
+    """Retorna la caché de OCR del proceso."""
+    global _cache
+    if _cache is None:
+        _cache = OcrCache()
+    return _cache
+
+
+def recognize_many(images, cache=None, max_workers=MAX_WORKERS, batch_size=BATCH_SIZE, recognize=read_image):
+    """Lee varias imágenes y retorna ``{hash: OcrResult}``.
+
+    ``images`` es un diccionario ``{hash: bytes}``. Las imágenes ya leídas se
+    toman de la caché; el resto se reparte en lotes entre ``max_workers``
+    procesos (con una sola imagen o ``max_workers=1`` se lee en el proceso
+    actual). ``recognize`` debe poder enviarse a otro proceso (función de módulo).
+    """
+    cache = cache or get_cache()
+    results = cache.get_many(images)
+    pending = [(digest, data) for digest, data in images.items() if digest not in results and data]
+    if not pending:
+        return results
+
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    read = {}
+    if max_workers > 1 and len(pending) > 1:
+        try:
+            # "spawn": el proceso de Streamlit tiene hilos y no conviene duplicarlo con fork
+            with ProcessPoolExecutor(
+                max_workers=min(max_workers, len(batches)),
+                mp_context=multiprocessing.get_context("spawn"),
+            ) as executor:
+                futures = [
+                    (batch, executor.submit(_read_batch, [data for _, data in batch], recognize))
+                    for batch in batches
+                ]
+                for batch, future in futures:
+                    for (digest, _), result in zip(batch, future.result()):
+                        read[digest] = result
+        except (BrokenProcessPool, OSError):
+            # Sin procesos disponibles (p. ej. ejecutable empaquetado): se lee aquí.
+            pass
+    rest = [(digest, data) for digest, data in pending if digest not in read]
+    if rest:
+        for (digest, _), result in zip(rest, _read_batch([data for _, data in rest], recognize)):
+            read[digest] = result
+    read = {digest: result for digest, result in read.items() if result is not None}
+    cache.put_many(read)
+    results.update(read)
+    return results
+
+
+def fill_phones(datas, store, cache=None, max_workers=MAX_WORKERS, min_confidence=MIN_CONFIDENCE, recognize=read_image):
+    """Completa el teléfono de los resultados de scraping que no lo traen.
+
+    ``datas`` son diccionarios de ``scrape_vehicle_details``. A los que no
+    tienen número pero sí imagen se les agrega ``telefono_ocr`` (OcrResult);
+    si la confianza alcanza ``min_confidence`` también se completa
+    ``whatsapp_number``. Retorna cuántos se completaron.
+    """
+    missing = [
+        data for data in datas
+        if data.get("whatsapp_number") in (None, "", "No disponible") and data.get("contact_image_hash")
+    ]
+    if not missing:
+        return 0
+    images = {}
+    for data in missing:
+        digest = data["contact_image_hash"]
+        if digest not in images:
+            images[digest] = store.get(digest)
+    results = recognize_many(images, cache=cache, max_workers=max_workers, recognize=recognize)
+    filled = 0
+    for data in missing:
+        result = results.get(data["contact_image_hash"])
+        if result is None or not result.telefono:
+            continue
+        data["telefono_ocr"] = result
+        if result.confianza >= min_confidence:
+            data["whatsapp_number"] = result.telefono
+            filled += 1
+    return filled
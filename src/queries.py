@@ -0,0 +1,41 @@
+"""Consultas SQL usadas por las páginas de la aplicación.
+
+Se reúnen aquí para que la prueba de planes de consulta
+(tests/test_query_plan.py) verifique con ``EXPLAIN QUERY PLAN`` que ninguna
+recorre completas las tablas grandes (``contactos`` y ``export_logs``). Las
+búsquedas con filtros de texto se construyen en src/search.py.
+"""
+
+LINKS = "SELECT * FROM links_contactos"
+LINK_POR_ID = "SELECT * FROM links_contactos WHERE id = ?"
+# Lo que necesitan los selectores de link (sin link_general)
+LINK_OPCION_COLUMNAS = ("id", "fecha_creacion", "marca", "descripcion")
+
+MENSAJES = "SELECT * FROM mensajes"
+MENSAJE_POR_ID = "SELECT * FROM mensajes WHERE id = ?"
+
+CONTACTOS_POR_LINK = "SELECT * FROM contactos WHERE id_link = ?"
+CONTACTO_POR_ID = "SELECT * FROM contactos WHERE id = ?"
+LINK_AUTO_EXISTE = "SELECT 1 FROM contactos WHERE link_auto = ? LIMIT 1"
+# Aumenta con cada alta, cambio o baja de contactos (migración 8)
+VERSION_CONTACTOS = "SELECT version FROM versiones WHERE tabla = 'contactos'"
+
+RESUMEN_EXPORTACIONES_CONTACTO = """
+    SELECT COUNT(*) AS exportaciones, MAX(fecha_exportacion) AS ultima_exportacion
+    FROM export_logs
+    WHERE contact_id = ?
+"""
+EXPORTACIONES_POR_MENSAJE = "SELECT COUNT(*) FROM export_logs WHERE mensaje_id = ?"
+
+EXPORTACION_POR_HASH = "SELECT id FROM export_batches WHERE hash = ? AND fecha_exportacion = ?"
+
+# Consultas sobre contactos y export_logs con parámetros de ejemplo, para
+# revisar sus planes de ejecución.
+PAGE_QUERIES = {
+    "contactos_por_link": (CONTACTOS_POR_LINK, (1,)),
+    "contacto_por_id": (CONTACTO_POR_ID, (1,)),
+    "link_auto_existe": (LINK_AUTO_EXISTE, ("https://example.com",)),
+    "resumen_exportaciones_contacto": (RESUMEN_EXPORTACIONES_CONTACTO, (1,)),
+    "exportaciones_por_mensaje": (EXPORTACIONES_POR_MENSAJE, (1,)),
+    "exportacion_por_hash": (EXPORTACION_POR_HASH, ("abc", "2024-01-01")),
+}
@@ -0,0 +1,139 @@
+"""Caché de resultados de consultas compartida por todas las sesiones.
+
+Las páginas vuelven a leer ``links_contactos`` o ``mensajes`` en cada rerun,
+aunque esas tablas cambian poco. Aquí cada resultado queda en memoria con
+clave ``(consulta, parámetros)`` junto con la *generación* de la base en que
+se leyó:
+
+- las escrituras de la aplicación llaman a ``invalidate()``, que avanza la
+  generación de inmediato;
+- las escrituras de otros procesos (u otras herramientas) se detectan con
+  ``PRAGMA data_version``, que se consulta a lo más una vez cada
+  ``CHECK_INTERVAL`` segundos.
+
+Así, la mayoría de los reruns responde desde memoria sin tocar SQLite. Los
+resultados se guardan con tipos compactos (ver src/frames.py).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from src import frames
+from src.db import DB_FILENAME, data_version, get_connection
+
+MAX_ENTRIES = 128
+MAX_ROWS = 50000       # resultados más grandes no se guardan
+CHECK_INTERVAL = 1.0   # segundos entre consultas a PRAGMA data_version
+
+
+class QueryCache:
+    """Resultados de consultas de una base de datos, con invalidación por escritura."""
+
+    def __init__(self, path, max_entries=MAX_ENTRIES, max_rows=MAX_ROWS,
+                 check_interval=CHECK_INTERVAL, clock=time.monotonic):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.check_interval = check_interval
+        self._clock = clock
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._data_version = None
+        self._checked = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def generation(self):
+        """Generación actual; revisa ``PRAGMA data_version`` si ya toca hacerlo."""
+        with self._lock:
+            now = self._clock()
+            if self._checked is None or now - self._checked >= self.check_interval:
+                self._checked = now
+                version = data_version(self.path)
+                if self._data_version is not None and version != self._data_version:
+                    self._advance()
+                self._data_version = version
+            return self._generation
+
+    def _advance(self):
+        self._generation += 1
+        self.invalidations += 1
+        self._items.clear()
+
+    def invalidate(self):
+        """Descarta los resultados guardados tras una escritura de la aplicación.
+
+        La versión de la base se vuelve a leer en este momento, para que el
+        mismo commit no cuente otra vez como cambio externo.
+        """
+        with self._lock:
+            self._advance()
+            self._data_version = data_version(self.path)
+            self._checked = self._clock()
+
+    def read(self, query, params=None, columns=None):
+        """DataFrame con el resultado de ``query`` (desde la caché si es posible).
+
+        ``columns`` limita el resultado a esas columnas. Se entrega una copia:
+        las páginas agregan columnas a los resultados.
+        """
+        key = (query, tuple(params or ()), tuple(columns) if columns else None)
+        generation = self.generation()
+        with self._lock:
+            frame = self._items.get(key)
+            if frame is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return frame.copy()
+            self.misses += 1
+        with get_connection(self.path) as con:
+            frame = frames.read_frame(con, query, params, columns)
+        with self._lock:
+            # Si hubo una escritura mientras se leía, el resultado no se guarda
+            if generation == self._generation and len(frame) <= self.max_rows:
+                self._items[key] = frame
+                while len(self._items) > self.max_entries:
+                    self._items.popitem(last=False)
+        return frame.copy()
+
+    def stats(self):
+        """Métricas de uso: aciertos, fallos, invalidaciones y entradas."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "invalidations": self.invalidations,
+                "entries": len(self._items),
+            }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(path=None):
+    """Caché del proceso para ``path`` (por defecto, la base principal)."""
+    path = path or DB_FILENAME
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = _caches[path] = QueryCache(path)
+        return cache
+
+
+def read_query(query, params=None, columns=None, path=None):
+    """Ejecuta una consulta de lectura usando la caché del proceso."""
+    return get_cache(path).read(query, params, columns)
+
+
+def invalidate(path=None):
+    """Marca como obsoletos los resultados guardados de ``path``."""
+    get_cache(path).invalidate()
+
+
+def stats(path=None):
+    return get_cache(path).stats()
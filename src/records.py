@@ -0,0 +1,102 @@
+"""Altas, cambios y bajas de links, contactos y mensajes.
+
+Funciones sin interfaz, usadas por la aplicación de Streamlit y por la línea
+de comandos. Todas escriben a través del escritor único (src/writer.py) y
+dejan pasar las excepciones de SQLite; quien las llama decide cómo mostrarlas.
+"""
+from src import writer
+
+
+def _fecha(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def _sin_espacios(value):
+    return "".join(str(value).split())
+
+
+# =============================================================================
+# LINKS
+# =============================================================================
+def add_link(link_general, fecha_creacion, marca, descripcion):
+    """Crea un link de contactos y retorna su id."""
+    return writer.execute(
+        """
+        INSERT INTO links_contactos (link_general, fecha_creacion, marca, descripcion)
+        VALUES (?, ?, ?, ?)
+        """,
+        (link_general.strip(), _fecha(fecha_creacion), marca.strip(), descripcion.strip()),
+    ).lastrowid
+
+
+def update_link(link_id, link_general, fecha_creacion, marca, descripcion):
+    """Actualiza un link de contactos; retorna True si existía."""
+    return writer.execute(
+        """
+        UPDATE links_contactos
+        SET link_general = ?, fecha_creacion = ?, marca = ?, descripcion = ?
+        WHERE id = ?
+        """,
+        (link_general.strip(), _fecha(fecha_creacion), marca.strip(), descripcion.strip(), link_id),
+    ).rowcount > 0
+
+
+def delete_link(link_id):
+    return writer.execute("DELETE FROM links_contactos WHERE id = ?", (link_id,)).rowcount > 0
+
+
+# =============================================================================
+# CONTACTOS
+# =============================================================================
+def add_contact(link_auto, telefono, nombre, auto, precio, descripcion, link_id, imagen_hash=None):
+    """Agrega un contacto y retorna su id.
+
+    Lanza ``sqlite3.IntegrityError`` si el link del auto ya está registrado.
+    """
+    return writer.execute(
+        """
+        INSERT INTO contactos (link_auto, telefono, nombre, auto, precio, descripcion, id_link, imagen_hash)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            _sin_espacios(link_auto), _sin_espacios(telefono), nombre.strip(), auto.strip(),
+            float(precio), descripcion.strip(), link_id, imagen_hash,
+        ),
+    ).lastrowid
+
+
+def update_contact(contact_id, link_auto, telefono, nombre, auto, precio, descripcion):
+    """Actualiza un contacto (sin espacios en el link ni en el teléfono)."""
+    return writer.execute(
+        """
+        UPDATE contactos
+        SET link_auto = ?, telefono = ?, nombre = ?, auto = ?, precio = ?, descripcion = ?
+        WHERE id = ?
+        """,
+        (
+            _sin_espacios(link_auto), _sin_espacios(telefono), nombre.strip(), auto.strip(),
+            float(precio), descripcion.strip(), contact_id,
+        ),
+    ).rowcount > 0
+
+
+def delete_contact(contact_id):
+    return writer.execute("DELETE FROM contactos WHERE id = ?", (contact_id,)).rowcount > 0
+
+
+# =============================================================================
+# MENSAJES
+# =============================================================================
+def add_message(texto):
+    """Agrega un mensaje y retorna su id."""
+    return writer.execute("INSERT INTO mensajes (descripcion) VALUES (?)", (texto.strip(),)).lastrowid
+
+
+def update_message(msg_id, texto):
+    return writer.execute(
+        "UPDATE mensajes SET descripcion = ? WHERE id = ?", (texto.strip(), msg_id)
+    ).rowcount > 0
+
+
+def delete_message(msg_id):
+    return writer.execute("DELETE FROM mensajes WHERE id = ?", (msg_id,)).rowcount > 0
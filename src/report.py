@@ -0,0 +1,231 @@
+"""Reporte HTML de enlaces de WhatsApp generado por bloques.
+
+El reporte se produce como una secuencia de bloques de bytes a partir de un
+cursor de la base de datos (``fetchmany``), sin cargar todos los contactos ni
+armar el documento completo en memoria. Los bloques pueden escribirse tal
+cual, comprimidos con gzip o repartidos en varios archivos HTML dentro de un
+ZIP que se escribe a medida que avanza.
+"""
+import datetime
+import tempfile
+import zipfile
+import zlib
+
+from src import links
+from src.db import get_connection
+
+CHUNK_ROWS = 2000        # contactos por bloque leído del cursor
+LINKS_PER_FILE = 5000    # enlaces por archivo en el ZIP por partes
+
+FORMATS = {
+    "HTML": ("html", "text/html"),
+    "HTML comprimido (.gz)": ("html.gz", "application/gzip"),
+    "ZIP por partes": ("zip", "application/zip"),
+}
+
+
+def timestamp_now():
+    return datetime.datetime.now().strftime("%d-%m-%Y_%H%M")
+
+
+def cursor_batches(cursor, size=CHUNK_ROWS):
+    """Lee ``cursor`` por bloques y retorna cada bloque como ``{columna: lista}``."""
+    columns = [d[0] for d in cursor.description]
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield dict(zip(columns, (list(values) for values in zip(*rows))))
+
+
+def _header(timestamp):
+    return "\n".join([
+        "<html>",
+        "<head>",
+        "<title>Enlaces</title>",
+        "</head>",
+        "<body>",
+        f"<h1>REPORTE {timestamp}</h1>",
+    ]).encode("utf-8")
+
+
+FOOTER = "\n</body>\n</html>".encode("utf-8")
+
+
+def _link_lines(batch, mensajes, start):
+    """Líneas ``<a>`` de un bloque; ``start`` es la posición de su primera fila."""
+    enlaces = links.build_links(batch, mensajes, start=start)["whatsapp_link"]
+    names = links.column_names(batch)
+    autos = links.column_values(batch, "auto") if "auto" in names else [None] * len(enlaces)
+    nombres = links.column_values(batch, "nombre") if "nombre" in names else [""] * len(enlaces)
+    lines = [
+        f'\n<a href="{link}">CONTACTO {idx}</a> {auto or nombre}<br>'
+        for idx, (link, auto, nombre) in enumerate(zip(enlaces, autos, nombres), start=start + 1)
+    ]
+    return "".join(lines).encode("utf-8"), len(enlaces)
+
+
+def iter_report(batches, mensajes, timestamp=None):
+    """Genera el reporte HTML como bloques de bytes.
+
+    ``batches`` es un iterable de bloques de contactos (cualquier formato que
+    acepte ``links.build_links``); los mensajes se rotan de forma continua
+    entre bloques.
+    """
+    yield _header(timestamp or timestamp_now())
+    start = 0
+    for batch in batches:
+        chunk, count = _link_lines(batch, mensajes, start)
+        start += count
+        if chunk:
+            yield chunk
+    yield FOOTER
+
+
+def gzip_chunks(chunks, level=6):
+    """Comprime con gzip una secuencia de bloques, bloque a bloque."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: formato gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _slice(batch, start, stop):
+    return {name: values[start:stop] for name, values in batch.items()}
+
+
+def write_zip(fileobj, batches, mensajes, links_per_file=LINKS_PER_FILE, timestamp=None):
+    """Escribe en ``fileobj`` un ZIP con el reporte repartido en partes.
+
+    Cada parte es un HTML completo con hasta ``links_per_file`` enlaces; la
+    numeración de contactos y la rotación de mensajes siguen entre partes.
+    ``batches`` deben ser bloques ``{columna: lista}`` (ver ``cursor_batches``).
+    Retorna la cantidad de partes.
+    """
+    timestamp = timestamp or timestamp_now()
+    parts = 0
+    with zipfile.ZipFile(fileobj, "w", zipfile.ZIP_DEFLATED) as zf:
+        part, in_part, start = None, 0, 0
+        for batch in batches:
+            size = len(batch["telefono"])
+            pos = 0
+            while pos < size:
+                if part is None:
+                    parts += 1
+                    part = zf.open(f"REPORTE_{timestamp}_parte_{parts:03d}.html", "w")
+                    part.write(_header(timestamp))
+                take = min(size - pos, links_per_file - in_part)
+                chunk, _ = _link_lines(_slice(batch, pos, pos + take), mensajes, start)
+                part.write(chunk)
+                pos += take
+                start += take
+                in_part += take
+                if in_part == links_per_file:
+                    part.write(FOOTER)
+                    part.close()
+                    part, in_part = None, 0
+        if part is not None:
+            part.write(FOOTER)
+            part.close()
+        elif parts == 0:
+            parts = 1
+            with zf.open(f"REPORTE_{timestamp}_parte_001.html", "w") as empty:
+                empty.write(_header(timestamp) + FOOTER)
+    return parts
+
+
+def write_report(fileobj, con, query, params, mensajes, fmt="HTML",
+                 links_per_file=LINKS_PER_FILE, timestamp=None, on_batch=None, record=None):
+    """Escribe en ``fileobj`` el reporte de los contactos de ``query``.
+
+    ``on_batch(filas)`` se llama tras leer cada bloque con el total de filas
+    leídas hasta ese momento (para informar avance). ``record(bloque, inicio)``
+    recibe cada bloque escrito (ver ``exports.SelectionRecorder``). Retorna el
+    nombre de archivo sugerido.
+    """
+    extension, _ = FORMATS[fmt]
+    timestamp = timestamp or timestamp_now()
+    cursor = con.execute(query, params or [])
+    batches = cursor_batches(cursor)
+    if record is not None:
+        batches = _recording(batches, record)
+    if on_batch is not None:
+        batches = _reporting(batches, on_batch)
+    if fmt == "ZIP por partes":
+        write_zip(fileobj, batches, mensajes, links_per_file=links_per_file, timestamp=timestamp)
+    else:
+        chunks = iter_report(batches, mensajes, timestamp)
+        if extension.endswith(".gz"):
+            chunks = gzip_chunks(chunks)
+        for chunk in chunks:
+            fileobj.write(chunk)
+    return f"REPORTE_{timestamp}.{extension}"
+
+
+def _reporting(batches, on_batch):
+    rows = 0
+    for batch in batches:
+        rows += len(next(iter(batch.values()), []))
+        on_batch(rows)
+        yield batch
+
+
+def _recording(batches, record):
+    start = 0
+    for batch in batches:
+        record(batch, start)
+        start += len(next(iter(batch.values()), []))
+        yield batch
+
+
+def export_report(con, query, params, mensajes, fmt="HTML", links_per_file=LINKS_PER_FILE):
+    """Genera el reporte de los contactos de ``query`` en el formato ``fmt``.
+
+    El reporte se escribe por bloques en un archivo temporal en disco; solo el
+    resultado final (comprimido, si se pidió) se lee a memoria para
+    entregarlo. Retorna ``(bytes, nombre_archivo, mime)``.
+    """
+    with tempfile.TemporaryFile() as tmp:
+        name = write_report(tmp, con, query, params, mensajes, fmt, links_per_file)
+        tmp.seek(0)
+        data = tmp.read()
+    return data, name, FORMATS[fmt][1]
+
+
+def generate_html(data, mensajes):
+    """Reporte HTML en memoria de los contactos de ``data`` (DataFrame o columnas).
+
+    Si ``mensajes`` es una lista de textos, se rotan en orden para cada
+    contacto, para que los enlaces no usen siempre el mismo mensaje y WhatsApp
+    no los marque como spam. Para exportaciones grandes se usa
+    ``export_report``, que lee de un cursor. Retorna ``(bytes, nombre_archivo)``.
+    """
+    timestamp = timestamp_now()
+    mensajes = mensajes if isinstance(mensajes, list) else [mensajes]
+    html = b"".join(iter_report([data], mensajes, timestamp))
+    return html, f"REPORTE_{timestamp}.html"
+
+
+def report_job(ctx, query, params, mensajes, fmt="HTML", total=None, registro=None):
+    """Trabajo en segundo plano (ver src/jobs.py): escribe el reporte a un archivo.
+
+    Con ``registro`` (``exports.SelectionRecorder``) también se guardan las
+    filas a registrar al descargar, en ``resultado["registro"]``. Retorna
+    ``{"archivo", "nombre", "mime"[, "registro"]}``.
+    """
+    def avance(filas):
+        ctx.progress(filas / total if total else 0, f"{filas} contactos procesados")
+
+    extension, mime = FORMATS[fmt]
+    path = ctx.file_path(extension)
+    with open(path, "wb") as fileobj:
+        name = write_report(
+            fileobj, get_connection(), query, params, mensajes, fmt, on_batch=avance,
+            record=registro.add if registro is not None else None,
+        )
+    resultado = {"archivo": path, "nombre": name, "mime": mime}
+    if registro is not None:
+        resultado["registro"] = registro.save(ctx.file_path("filas"), fmt)
+    return resultado
@@ -0,0 +1,224 @@
+"""Scraping de fichas de vehículos de chileautos.
+
+No depende de Streamlit: los errores de red se informan con ``ScrapingError``
+y la interfaz decide cómo mostrarlos.
+"""
+import base64
+import binascii
+import re
+import time
+
+import requests
+
+from src import ocr
+from src.extraction import Extractor, Field
+from src.http_cache import CacheEntry, ResponseCache, canonical_url
+from src.http_client import ScraperClient
+from src.images import get_store
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/98.0.4758.102 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'es-ES,es;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Referer': 'https://www.chileautos.cl/'
+}
+TIMEOUT = 10
+
+WHATSAPP_PATTERN = r"https://wa\.me/56(\d{9})"
+
+# Campos de la ficha, extraídos en una sola pasada (ver src/extraction.py).
+LISTING_FIELDS = [
+    Field("contact_image", "img", attr="src", pattern=r"^data:image", extract="attr"),
+    Field("whatsapp", "a", attr="href", pattern=r"https://wa\.me/56\d{9}", extract="attr"),
+    Field("vehiculo", "div", classes=["features-item-value-vehculo"]),
+    Field("titulo", "h1"),
+    Field("precio", "div", classes=["features-item-value-precio"]),
+    Field(
+        "descripcion", "p",
+        within=[("div", "view-more-container"), ("div", "view-more-target")],
+    ),
+]
+LISTING_EXTRACTOR = Extractor(LISTING_FIELDS)
+
+_cache = None
+_client = None
+
+
+class ScrapingError(Exception):
+    """No se pudo obtener la página del vehículo."""
+
+
+def get_cache():
+    """Retorna la caché de respuestas del proceso."""
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache()
+    return _cache
+
+
+def get_client():
+    """Retorna el cliente HTTP (sesión keep-alive con reintentos) del proceso."""
+    global _client
+    if _client is None:
+        _client = ScraperClient(headers=HEADERS)
+    return _client
+
+
+def fetch_page(url, force_refresh=False, cache=None):
+    """Descarga la página usando la caché en disco.
+
+    Una entrada vigente se retorna sin conexión. Si está vencida (o se pide
+    ``force_refresh``) se revalida con ETag / Last-Modified; un 304 solo renueva
+    la entrada. Retorna ``(entrada, desde_cache)``.
+    """
+    cache = cache or get_cache()
+    entry = cache.get(url)
+    if entry is not None and not force_refresh and cache.is_fresh(entry):
+        return entry, True
+
+    headers = {}
+    if entry is not None:
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+    try:
+        response = get_client().get(url, headers=headers, timeout=TIMEOUT)
+    except requests.RequestException as e:
+        raise ScrapingError(f"Error de conexión: {e}") from e
+    if response.status_code == 304 and entry is not None:
+        cache.touch(url)
+        return entry, True
+    if response.status_code != 200:
+        raise ScrapingError(f"Error al obtener la página: {response.status_code}")
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    cache.put(url, response.content, etag=etag, last_modified=last_modified)
+    entry = CacheEntry(
+        canonical_url(url), response.content, etag, last_modified, time.time(), None
+    )
+    return entry, False
+
+
+def _split_year(texto):
+    """Separa el año inicial (4 dígitos) del resto del texto."""
+    partes = texto.split(" ", 1)
+    if partes and partes[0].isdigit() and len(partes[0]) == 4:
+        return partes[0], partes[1] if len(partes) > 1 else ""
+    return None, texto
+
+
+def parse_vehicle_page(content, timings=None):
+    """Extrae los datos del vehículo del HTML de la ficha.
+
+    La imagen de contacto se retorna codificada en base64 (``contact_image_b64``)
+    para poder guardar el resultado en la caché como JSON. Si se entrega un
+    diccionario ``timings``, se completa con los segundos usados por campo.
+    """
+    values, field_timings = LISTING_EXTRACTOR.extract(content)
+    if timings is not None:
+        timings.update(field_timings)
+
+    # Extraer imagen de contacto
+    contact_image_b64, contact_image_status = None, "No encontrado"
+    img_src = values["contact_image"]
+    if img_src is not None:
+        if "base64," in img_src:
+            base64_data = img_src.split("base64,", 1)[1].strip()
+            contact_image_b64 = "".join(base64_data.split())
+            contact_image_status = None
+        else:
+            contact_image_status = "Formato de imagen no reconocido"
+
+    # --- Extracción del número de WhatsApp ---
+    whatsapp_number = None
+    if values["whatsapp"]:
+        match = re.search(WHATSAPP_PATTERN, values["whatsapp"])
+        if match:
+            whatsapp_number = match.group(1)  # 9 dígitos sin el prefijo "56"
+
+    # Extraer datos del vehículo
+    nombre, anio, precio = None, None, None
+    if values["vehiculo"] is not None:
+        anio, nombre = _split_year(values["vehiculo"])
+    if not nombre and values["titulo"] is not None:
+        titulo_texto = values["titulo"]
+        anio_titulo, resto = _split_year(titulo_texto)
+        if anio_titulo:
+            anio, nombre = anio_titulo, resto or titulo_texto
+        else:
+            nombre = titulo_texto
+    nombre_completo = f"{anio} {nombre}" if anio else nombre
+    if values["precio"] is not None:
+        match = re.search(r"\$(\d{1,3}(?:,\d{3})+)", values["precio"])
+        precio = match.group(1) if match else values["precio"]
+    descripcion = values["descripcion"] if values["descripcion"] is not None else "No disponible"
+    return {
+        "nombre": nombre_completo if nombre_completo else "No disponible",
+        "anio": anio if anio else "No disponible",
+        "precio": precio if precio else "No disponible",
+        "descripcion": descripcion,
+        "contact_image_b64": contact_image_b64,
+        "contact_image_status": contact_image_status,
+        "whatsapp_number": whatsapp_number if whatsapp_number else "No disponible"
+    }
+
+
+def scrape_vehicle_details(url, force_refresh=False, cache=None, store=None):
+    """Extrae detalles de un vehículo desde la URL dada.
+
+    Los datos extraídos quedan en la caché junto a la página, de modo que
+    repetir la misma URL no descarga ni vuelve a parsear nada. La imagen de
+    contacto se guarda en el almacén por contenido; ``contact_image_hash``
+    es la referencia que se registra en el contacto.
+    Lanza ``ScrapingError`` si la página no se puede obtener.
+    """
+    cache = cache or get_cache()
+    entry, from_cache = fetch_page(url, force_refresh=force_refresh, cache=cache)
+    parsed = entry.parsed
+    if parsed is None:
+        parsed = parse_vehicle_page(entry.body)
+        cache.set_parsed(url, parsed)
+
+    data = {k: v for k, v in parsed.items() if not k.startswith("contact_image_")}
+    contact_image_file = parsed["contact_image_status"]
+    contact_image_hash = None
+    if parsed["contact_image_b64"]:
+        try:
+            image_bytes = base64.b64decode(parsed["contact_image_b64"], validate=True)
+        except (binascii.Error, ValueError) as e:
+            data["contact_image_error"] = "Error al decodificar la imagen: " + str(e)
+            contact_image_file = "Error al decodificar"
+        else:
+            store = store or get_store()
+            try:
+                contact_image_hash = store.put(image_bytes)
+                contact_image_file = store.path(contact_image_hash)
+            except OSError as e:
+                data["contact_image_error"] = "Error al guardar la imagen: " + str(e)
+                contact_image_file = "Error al guardar"
+    data["contact_image_hash"] = contact_image_hash
+    data["contact_image_file"] = contact_image_file
+    data["from_cache"] = from_cache
+    return data
+
+
+def scrape_job(ctx, url, force_refresh=False, usar_ocr=None):
+    """Trabajo en segundo plano (ver src/jobs.py): descarga una ficha.
+
+    Si la ficha no trae link de WhatsApp, el teléfono se lee desde la imagen
+    de contacto (``usar_ocr``; por defecto, si Tesseract está instalado). Solo
+    una lectura con confianza de al menos ``ocr.MIN_CONFIDENCE`` completa
+    ``whatsapp_number``; toda lectura queda en ``telefono_ocr``
+    (``{"telefono", "confianza", "texto"}``) para que el operador la confirme.
+    """
+    ctx.progress(0, "Descargando la ficha...", force=True)
+    data = scrape_vehicle_details(url, force_refresh=force_refresh)
+    if usar_ocr is None:
+        usar_ocr = ocr.ocr_available()
+    if usar_ocr and data.get("whatsapp_number") == "No disponible" and data.get("contact_image_hash"):
+        ctx.progress(0.5, "Leyendo el teléfono desde la imagen...", force=True)
+        ocr.fill_phones([data], get_store(), max_workers=1)
+        if "telefono_ocr" in data:
+            data["telefono_ocr"] = data["telefono_ocr"]._asdict()
+    return data
@@ -0,0 +1,200 @@
+"""Búsqueda de contactos por nombre, auto y teléfono.
+
+Usa la tabla FTS5 ``contactos_fts`` (tokenizador trigram, creada por la
+migración 4), que resuelve búsquedas de subcadenas con el índice en lugar de
+recorrer la tabla como ``LIKE '%x%'``. Los términos de menos de tres
+caracteres no generan trigramas, así que esos filtros (y las bases sin FTS5)
+siguen usando LIKE.
+"""
+
+from collections import namedtuple
+
+# Largo mínimo de un término para buscarlo en el índice de trigramas.
+FTS_MIN_CHARS = 3
+
+SEARCH_COLUMNS = ("nombre", "auto", "telefono")
+
+
+def fts_available(con, table="contactos_fts"):
+    """Indica si la base tiene el índice de texto ``table`` (por defecto, el de contactos)."""
+    return con.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone() is not None
+
+
+def _fts_phrase(term):
+    """Escapa un término como frase FTS5 (coincidencia literal de subcadena)."""
+    return '"' + term.replace('"', '""') + '"'
+
+
+# Columnas por las que se puede ordenar la grilla paginada de contactos.
+SORT_COLUMNS = ("id", "nombre", "auto", "telefono", "precio")
+
+
+def _filtered_source(con, link_id, filters):
+    """FROM/WHERE comunes a las consultas de contactos filtrados.
+
+    Retorna ``(sql, params, ranked)``; ``ranked`` indica si se usa el índice
+    de texto (y por lo tanto existe ``f.rank``).
+    """
+    terms = {
+        column: (filters.get(column) or "").strip()
+        for column in SEARCH_COLUMNS
+    }
+    use_fts = fts_available(con)
+    match_parts, where, params = [], [], []
+    for column, term in terms.items():
+        if not term:
+            continue
+        if use_fts and len(term) >= FTS_MIN_CHARS:
+            match_parts.append(f"{column} : {_fts_phrase(term)}")
+        else:
+            where.append(f"c.{column} LIKE ?")
+            params.append(f"%{term}%")
+    if link_id is not None:
+        where.insert(0, "c.id_link = ?")
+        params.insert(0, link_id)
+
+    if match_parts:
+        sql = (
+            "FROM contactos_fts f "
+            "JOIN contactos c ON c.id = f.rowid "
+            "WHERE contactos_fts MATCH ?"
+        )
+        params.insert(0, " AND ".join(match_parts))
+        if where:
+            sql += " AND " + " AND ".join(where)
+    else:
+        sql = "FROM contactos c"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+    return sql, params, bool(match_parts)
+
+
+def build_contact_query(con, link_id=None, limit=None, columns="c.*",
+                        order_by=None, descending=False, after=None, **filters):
+    """Construye la consulta de contactos filtrados.
+
+    Parámetros:
+    - con: conexión usada para saber si existe el índice de texto.
+    - link_id: si se indica, restringe a los contactos de ese link.
+    - limit: máximo de filas a retornar (None = sin límite).
+    - order_by: columna de ``SORT_COLUMNS`` por la que ordenar (el id desempata).
+    - descending: orden descendente.
+    - after: ``(valor, id)`` de la última fila de la página anterior, para
+      paginar por clave (keyset) en vez de usar OFFSET.
+    - filters: subcadenas a buscar por columna (``nombre``, ``auto``, ``telefono``).
+
+    Retorna:
+    - (sql, params). Sin ``order_by``, si hay términos buscados en el índice
+      los resultados se ordenan por relevancia; si no, por id.
+    """
+    source, params, ranked = _filtered_source(con, link_id, filters)
+    sql = f"SELECT {columns} {source}"
+    if order_by is None:
+        if after is not None:
+            raise ValueError("La paginación por clave necesita order_by")
+        sql += " ORDER BY f.rank" if ranked else " ORDER BY c.id"
+    else:
+        if order_by not in SORT_COLUMNS:
+            raise ValueError(f"No se puede ordenar por {order_by!r}")
+        direction, op = ("DESC", "<") if descending else ("ASC", ">")
+        if after is not None:
+            sql += " AND " if " WHERE " in source else " WHERE "
+            if order_by == "id":
+                sql += f"c.id {op} ?"
+                params.append(after[1])
+            else:
+                sql += f"(c.{order_by}, c.id) {op} (?, ?)"
+                params.extend(after)
+        if order_by == "id":
+            sql += f" ORDER BY c.id {direction}"
+        else:
+            sql += f" ORDER BY c.{order_by} {direction}, c.id {direction}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    return sql, params
+
+
+def page_cursor(rows, order_by):
+    """Clave ``(valor, id)`` de la última fila de ``rows`` (un DataFrame), para ``after``."""
+    last = rows.iloc[-1]
+    value = last[order_by]
+    # Los escalares de numpy no se pueden usar como parámetros de sqlite3
+    return (value.item() if hasattr(value, "item") else value, int(last["id"]))
+
+
+def build_count_query(con, link_id=None, **filters):
+    """Consulta ``COUNT(*)`` de los contactos filtrados (usa los mismos índices)."""
+    source, params, _ = _filtered_source(con, link_id, filters)
+    return f"SELECT COUNT(*) AS total {source}", params
+
+
+# Descriptor liviano de una búsqueda de contactos: basta para volver a armar su
+# consulta, sin guardar las filas. ``data_version`` es la versión de la base
+# cuando se hizo la búsqueda.
+ContactSelection = namedtuple(
+    "ContactSelection",
+    "link_id nombre auto telefono order_by descending data_version",
+)
+
+
+def selection_query(con, selection):
+    """``(sql, params)`` con todos los contactos de ``selection``, en su orden."""
+    return build_contact_query(
+        con,
+        link_id=selection.link_id,
+        order_by=selection.order_by,
+        descending=selection.descending,
+        nombre=selection.nombre,
+        auto=selection.auto,
+        telefono=selection.telefono,
+    )
+
+
+def selection_count_query(con, selection):
+    """``(sql, params)`` con la cantidad de contactos de ``selection``."""
+    return build_count_query(
+        con,
+        link_id=selection.link_id,
+        nombre=selection.nombre,
+        auto=selection.auto,
+        telefono=selection.telefono,
+    )
+
+
+# Coincidencias que muestra el selector de links.
+LINK_PICKER_LIMIT = 20
+
+
+def build_link_query(con, text="", limit=LINK_PICKER_LIMIT):
+    """Construye la consulta del selector de links.
+
+    - Sin texto: los ``limit`` links más recientes (por id).
+    - Texto de tres o más caracteres: búsqueda en ``links_fts`` (marca,
+      descripción y URL), por relevancia.
+    - Texto más corto (o base sin FTS5): prefijo de la marca, con el índice
+      ``lower(marca)``.
+
+    En todos los casos se recorre un índice y se corta en ``limit`` filas, así
+    que el costo no depende de cuántos links haya.
+    """
+    term = (text or "").strip()
+    if not term:
+        return "SELECT l.* FROM links_contactos l ORDER BY l.id DESC LIMIT ?", [int(limit)]
+    if len(term) >= FTS_MIN_CHARS and fts_available(con, "links_fts"):
+        sql = (
+            "SELECT l.* FROM links_fts f "
+            "JOIN links_contactos l ON l.id = f.rowid "
+            "WHERE links_fts MATCH ? ORDER BY f.rank LIMIT ?"
+        )
+        return sql, [_fts_phrase(term), int(limit)]
+    # lower() de SQLite solo convierte letras ASCII
+    prefix = "".join(ch.lower() if ch.isascii() else ch for ch in term)
+    sql = (
+        "SELECT l.* FROM links_contactos l "
+        "WHERE lower(l.marca) >= ? AND lower(l.marca) < ? "
+        "ORDER BY lower(l.marca), l.id LIMIT ?"
+    )
+    return sql, [prefix, prefix + "\U0010ffff", int(limit)]
@@ -0,0 +1,110 @@
+"""Plantillas de mensaje compiladas.
+
+Una plantilla (``"Hola {nombre}, vi tu {auto}"``) se compila una sola vez en
+un plan: los tramos literales quedan ya codificados para URL y cada marcador
+queda asociado a su columna. Renderizar un contacto solo codifica los valores
+reemplazados y une los tramos, sin expresiones regulares ni recodificar el
+mensaje completo.
+
+Como ``urllib.parse.quote`` codifica carácter por carácter, codificar por
+tramos da exactamente el mismo resultado que codificar el mensaje armado.
+"""
+import functools
+import re
+import urllib.parse
+
+PLACEHOLDER = re.compile(r"{(.*?)}")
+PLAN_CACHE_SIZE = 256
+VALUE_CACHE_SIZE = 4096
+
+# Los valores se repiten mucho entre contactos (marcas, modelos, precios).
+_quote = functools.lru_cache(maxsize=VALUE_CACHE_SIZE)(urllib.parse.quote)
+_MISSING = object()
+
+
+class CompiledTemplate:
+    """Plan de una plantilla: tramos literales y marcadores alternados."""
+
+    def __init__(self, text):
+        self.text = text
+        literals, fields = [], []
+        pos = 0
+        for match in PLACEHOLDER.finditer(text):
+            literals.append(text[pos:match.start()])
+            fields.append(match.group(1))
+            pos = match.end()
+        literals.append(text[pos:])
+        # Siempre hay un literal más que marcadores: L0 F0 L1 F1 ... Ln
+        self.literals = tuple(literals)
+        self.fields = tuple(fields)
+        self.encoded_literals = tuple(urllib.parse.quote(part) for part in literals)
+
+    def unknown_fields(self, columns):
+        """Marcadores que no corresponden a ninguna de ``columns``, sin repetir."""
+        columns = set(columns)
+        return list(dict.fromkeys(f for f in self.fields if f not in columns))
+
+    def _values(self, contacto):
+        # Un marcador sin dato queda tal cual, igual que antes con re.sub
+        values = []
+        for field in self.fields:
+            value = contacto.get(field, _MISSING)
+            values.append("{" + field + "}" if value is _MISSING else str(value))
+        return values
+
+    def render(self, contacto):
+        """Mensaje personalizado (texto plano)."""
+        if not self.fields:
+            return self.text
+        values = self._values(contacto)
+        return "".join(_interleave(self.literals, values))
+
+    def render_columns(self, columns, count):
+        """Codifica ``count`` mensajes a partir de columnas ``{nombre: lista}``.
+
+        Cada columna usada se codifica completa de una vez y luego solo se unen
+        los tramos; no hay búsquedas por nombre fila a fila.
+        """
+        head = self.encoded_literals[0]
+        if not self.fields:
+            return [head] * count
+        encoded = []
+        for field in self.fields:
+            values = columns.get(field)
+            if values is None:
+                encoded.append([_quote("{" + field + "}")] * count)
+            else:
+                encoded.append([_quote(str(value)) for value in values])
+        tails = self.encoded_literals[1:]
+        return [
+            head + "".join(value + tail for value, tail in zip(row, tails))
+            for row in zip(*encoded)
+        ]
+
+
+def _interleave(literals, values):
+    yield literals[0]
+    for value, literal in zip(values, literals[1:]):
+        yield value
+        yield literal
+
+
+@functools.lru_cache(maxsize=PLAN_CACHE_SIZE)
+def compile_template(text):
+    """Compila ``text`` (con caché: cada plantilla distinta se compila una vez)."""
+    return CompiledTemplate(text)
+
+
+def contact_columns(con):
+    """Columnas de ``contactos`` que pueden usarse como marcadores."""
+    return [row[1] for row in con.execute("PRAGMA table_info(contactos)")]
+
+
+def apply_template(template, contacto):
+    """Reemplaza los marcadores de la plantilla con los datos del contacto."""
+    return compile_template(template).render(contacto)
+
+
+def unknown_placeholders(con, texto):
+    """Marcadores de ``texto`` que no son columnas de contactos."""
+    return compile_template(texto).unknown_fields(contact_columns(con))
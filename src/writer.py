@@ -0,0 +1,240 @@
+"""Escritor único de la base principal, con commits agrupados.
+
+Con varias sesiones escribiendo a la vez, cada una con su propia conexión y
+su propio commit, SQLite serializa las escrituras con reintentos (``database
+is locked``) y paga un fsync por cada fila. Aquí un solo hilo es dueño de la
+conexión de escritura: las sesiones le envían comandos por una cola y esperan
+su resultado. El hilo toma todos los comandos que llegaron (y los que lleguen
+durante ``GROUP_WINDOW``) y los ejecuta en una sola transacción:
+
+- cada comando corre dentro de su propio ``SAVEPOINT``, de modo que si falla
+  (p. ej. un ``IntegrityError``) solo se deshace ese comando y solo quien lo
+  envió recibe la excepción;
+- el grupo se confirma con un único ``COMMIT`` y recién entonces se entregan
+  los resultados; después se invalida la caché de consultas (ver
+  src/query_cache.py).
+
+Un comando es una función ``func(con, *args, **kwargs)``. Dentro del
+escritor, ``with con:`` y ``con.commit()`` no confirman nada (lo hace el
+grupo), así que funciones como ``bulk.insert_contacts`` o
+``exports.log_export`` se pueden enviar tal cual.
+"""
+import queue
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+from src import query_cache
+from src.db import DB_FILENAME, connect
+
+GROUP_WINDOW = 0.002   # segundos que se espera por más comandos antes del commit
+MAX_GROUP = 256        # comandos como máximo por transacción
+
+StatementResult = namedtuple("StatementResult", "lastrowid rowcount")
+
+_Command = namedtuple("_Command", "func args kwargs future")
+
+
+class _GroupConnection:
+    """La conexión del escritor, vista desde un comando.
+
+    Delega todo en la conexión real, salvo el control de transacciones: el
+    commit lo hace el grupo y ``rollback()`` deshace solo el comando.
+    """
+
+    def __init__(self, con):
+        self._con = con
+
+    def __getattr__(self, name):
+        return getattr(self._con, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self._con.execute("ROLLBACK TO comando")
+
+
+def statement(con, sql, params=()):
+    """Comando: ejecuta una sentencia y retorna ``StatementResult``."""
+    cur = con.execute(sql, params)
+    return StatementResult(cur.lastrowid, cur.rowcount)
+
+
+class Writer:
+    """Hilo dueño de la conexión de escritura de ``path``."""
+
+    def __init__(self, path, window=GROUP_WINDOW, max_group=MAX_GROUP, clock=time.monotonic):
+        self.path = path
+        self.window = window
+        self.max_group = max_group
+        self._clock = clock
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self.commits = 0
+        self.commands = 0
+        self.errors = 0
+        self.largest_group = 0
+
+    # ------------------------------------------------------------------ envío
+    def submit(self, func, *args, **kwargs):
+        """Encola ``func(con, *args, **kwargs)`` y retorna un ``Future`` con su resultado."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Un comando del escritor no puede enviar otro comando.")
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("El escritor está cerrado.")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="writer", daemon=True)
+                self._thread.start()
+            self._queue.put(_Command(func, args, kwargs, future))
+        return future
+
+    def call(self, func, *args, **kwargs):
+        """Ejecuta ``func`` en el escritor y espera su resultado (o su excepción)."""
+        return self.submit(func, *args, **kwargs).result()
+
+    def execute(self, sql, params=()):
+        """Ejecuta una sentencia de escritura y retorna ``StatementResult``."""
+        return self.call(statement, sql, params)
+
+    # -------------------------------------------------------------- ejecución
+    def _loop(self):
+        con = connect(self.path, isolation_level=None)
+        try:
+            while True:
+                group = [self._queue.get()]
+                if group[0] is None:
+                    return
+                deadline = self._clock() + self.window
+                stop = False
+                while len(group) < self.max_group:
+                    remaining = deadline - self._clock()
+                    try:
+                        command = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if command is None:
+                        stop = True
+                        break
+                    group.append(command)
+                self._run_group(con, group)
+                if stop:
+                    return
+        finally:
+            con.close()
+
+    def _run_group(self, con, group):
+        group = [c for c in group if c.future.set_running_or_notify_cancel()]
+        if not group:
+            return
+        try:
+            outcomes = self._transaction(con, group)
+        except Exception as e:
+            # La transacción completa se perdió (p. ej. disco lleno): falla todo el grupo
+            if con.in_transaction:
+                try:
+                    con.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+            outcomes = [(False, e)] * len(group)
+        else:
+            self.commits += 1
+            if any(ok for ok, _ in outcomes):
+                query_cache.invalidate(self.path)
+        self.commands += len(group)
+        self.largest_group = max(self.largest_group, len(group))
+        for command, (ok, value) in zip(group, outcomes):
+            if ok:
+                command.future.set_result(value)
+            else:
+                self.errors += 1
+                command.future.set_exception(value)
+
+    def _transaction(self, con, group):
+        """Ejecuta ``group`` en una transacción y retorna ``(ok, resultado)`` por comando."""
+        con.execute("BEGIN IMMEDIATE")
+        proxy = _GroupConnection(con)
+        outcomes = []
+        for command in group:
+            con.execute("SAVEPOINT comando")
+            try:
+                result = command.func(proxy, *command.args, **command.kwargs)
+            except Exception as e:
+                con.execute("ROLLBACK TO comando")
+                outcomes.append((False, e))
+            else:
+                outcomes.append((True, result))
+            con.execute("RELEASE comando")
+        con.execute("COMMIT")
+        return outcomes
+
+    def stats(self):
+        """Comandos, commits, errores y comandos por commit."""
+        return {
+            "commands": self.commands,
+            "commits": self.commits,
+            "errors": self.errors,
+            "per_commit": self.commands / self.commits if self.commits else 0.0,
+            "largest_group": self.largest_group,
+        }
+
+    def close(self):
+        """Termina los comandos pendientes y detiene el hilo."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            if thread is not None:
+                self._queue.put(None)
+        if thread is not None:
+            thread.join()
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(path=None):
+    """Escritor del proceso para ``path`` (por defecto, la base principal)."""
+    path = path or DB_FILENAME
+    with _writers_lock:
+        writer = _writers.get(path)
+        if writer is None:
+            writer = _writers[path] = Writer(path)
+        return writer
+
+
+def call(func, *args, **kwargs):
+    """Ejecuta ``func(con, ...)`` en el escritor de la base principal."""
+    return get_writer().call(func, *args, **kwargs)
+
+
+def execute(sql, params=()):
+    """Ejecuta una sentencia de escritura en la base principal."""
+    return get_writer().execute(sql, params)
+
+
+def stats(path=None):
+    return get_writer(path).stats()
+
+
+def close_all():
+    """Detiene todos los escritores (útil para herramientas y pruebas)."""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
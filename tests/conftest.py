@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# Las pruebas nunca deben tocar data/datos_consignacion.db: la línea de comandos
+# y el escritor único usan la base por defecto.
+os.environ.setdefault(
+    "CONSIGNACION_DB",
+    os.path.join(tempfile.mkdtemp(prefix="consignacion_"), "datos_consignacion.db"),
+)
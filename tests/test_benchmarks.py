@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from benchmarks import run, synthetic
+
+
+@pytest.fixture(scope="module")
+def base(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("bench") / "datos.db")
+    filas = synthetic.populate(path, links=3, contactos=30, export_logs=2500, mensajes=2)
+    return path, filas
+
+
+def test_populate_sizes(base):
+    _, filas = base
+    assert filas == {
+        "links_contactos": 3, "contactos": 30, "mensajes": 2,
+        "export_batches": 3, "export_logs": 2500,
+    }
+
+
+def test_populate_never_touches_app_database():
+    with pytest.raises(ValueError):
+        synthetic.populate(synthetic.PROTECTED_PATH)
+
+
+def test_run_writes_comparable_json(base, tmp_path):
+    path, _ = base
+    salida = tmp_path / "r.json"
+    argv = ["--db", path, "--filtro", "consulta.*", "--rondas", "2", "--tiempo-minimo", "0", "-o", str(salida)]
+    assert run.main(argv) == 0
+    resultado = json.loads(salida.read_text(encoding="utf-8"))
+    assert resultado["meta"]["tamanos"]["contactos"] == 30
+    assert set(resultado["resultados"]) == {n for n in run.BENCHMARKS if n.startswith("consulta.")}
+    assert all(r["rounds"] == 2 for r in resultado["resultados"].values())
+    # Una base mucho más lenta no marca regresiones; una mucho más rápida, sí
+    base = tmp_path / "base.json"
+    for factor, esperado in ((1000, 0), (1 / 1000, 1)):
+        lenta = json.loads(salida.read_text(encoding="utf-8"))
+        for medida in lenta["resultados"].values():
+            for campo in ("min", "median", "mean", "stdev"):
+                medida[campo] *= factor
+        base.write_text(json.dumps(lenta), encoding="utf-8")
+        assert run.main(argv + ["--comparar", str(base)]) == esperado
+
+
+def test_measure_doubles_until_min_time():
+    # Reloj falso: cada llamada a la función medida toma un "segundo"
+    llamadas = []
+    number, tiempos = run.measure(
+        lambda: llamadas.append(1), rounds=3, min_time=4, clock=lambda: len(llamadas)
+    )
+    assert number == 4
+    assert tiempos == [1.0, 1.0, 1.0]
+
+
+def test_regressions_ignore_a_single_slow_round():
+    base = {"resultados": {"a": {"median": 1.0}, "b": {"median": 1.0}}}
+    actual = {"resultados": {
+        "a": {"median": 1.5, "min": 0.95},  # rondas ruidosas
+        "b": {"median": 1.5, "min": 1.3},   # todas más lentas
+    }}
+    assert [fila[0] for fila in run.regressions(run.compare(base, actual))] == ["b"]
+
+
+def test_comparar_requires_the_regression_to_repeat(base, tmp_path, monkeypatch):
+    path, _ = base
+    anterior = {"resultados": {"x": {"median": 1.0, "min": 1.0}}}
+    (tmp_path / "base.json").write_text(json.dumps(anterior), encoding="utf-8")
+    lenta = {"meta": {"commit": None}, "resultados": {"x": {"median": 2.0, "min": 2.0}}}
+    normal = {"meta": {"commit": None}, "resultados": {"x": {"median": 1.0, "min": 1.0}}}
+    argv = ["--db", path, "-o", str(tmp_path / "r.json"), "--comparar", str(tmp_path / "base.json")]
+    for corridas, esperado in (([lenta, normal], 0), ([lenta, lenta], 1)):
+        llamadas = []
+
+        def falsa(*args, **kwargs):
+            llamadas.append(kwargs.get("names"))
+            return corridas[len(llamadas) - 1]
+
+        monkeypatch.setattr(run, "run", falsa)
+        assert run.main(argv) == esperado
+        assert llamadas == [None, {"x"}]
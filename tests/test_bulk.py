@@ -0,0 +1,62 @@
+import sqlite3
+import threading
+import time
+
+from src import bulk, migrations
+
+
+def test_parse_url_list():
+    text = "https://a.cl/1\nhttps://a.cl/2, https://a.cl/1;no-es-link\n'https://b.cl/3'"
+    assert bulk.parse_url_list(text) == ["https://a.cl/1", "https://a.cl/2", "https://b.cl/3"]
+
+
+def test_scrape_many_limits_concurrency_per_host():
+    active = {}
+    peak = {}
+    lock = threading.Lock()
+
+    def scrape(url):
+        host = url.split("/")[2]
+        with lock:
+            active[host] = active.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), active[host])
+        time.sleep(0.02)
+        with lock:
+            active[host] -= 1
+        if url.endswith("/bad"):
+            raise RuntimeError("fallo")
+        return {"url": url}
+
+    urls = [f"https://a.cl/{i}" for i in range(8)] + ["https://b.cl/1", "https://b.cl/bad"]
+    throttle = bulk.HostThrottle(per_host=2, delay=0)
+    results = list(bulk.scrape_many(urls, scrape=scrape, max_workers=6, throttle=throttle))
+    assert sorted(r.url for r in results) == sorted(urls)
+    assert peak["a.cl"] <= 2
+    errors = [r for r in results if r.error]
+    assert [r.url for r in errors] == ["https://b.cl/bad"]
+
+
+def test_throttle_spaces_requests_to_same_host():
+    throttle = bulk.HostThrottle(per_host=5, delay=0.05)
+    starts = []
+    for _ in range(3):
+        with throttle.slot("https://a.cl/x"):
+            starts.append(time.monotonic())
+    assert starts[2] - starts[0] >= 0.09
+
+
+def test_contact_row_and_batched_insert():
+    row, reason = bulk.contact_row(
+        "https://a.cl/1", {"whatsapp_number": "911", "nombre": "2021 Car", "precio": "10,500", "descripcion": "d",
+         "contact_image_hash": "ab12"}, 3
+    )
+    assert reason is None and row == ("https://a.cl/1", "911", "", "2021 Car", 10500.0, "d", 3, "ab12")
+    assert bulk.contact_row("https://a.cl/2", {"whatsapp_number": "No disponible"}, 3) == (None, "Sin teléfono")
+    assert bulk.contact_row("https://a.cl/2", {"whatsapp_number": "9", "precio": "x"}, 3) == (None, "Precio inválido")
+
+    con = sqlite3.connect(":memory:")
+    migrations.migrate(con)
+    rows = [(f"https://a.cl/{i}", "9", "", "Auto", 1.0, "d", 3, None) for i in range(5)]
+    assert bulk.insert_contacts(con, rows, batch_size=2) == 5
+    assert bulk.insert_contacts(con, rows[:2] + [("https://a.cl/9", "9", "", "A", 1.0, "d", 3, "ab12")]) == 1
+    assert bulk.existing_links(con, ["https://a.cl/1", "https://a.cl/77"]) == {"https://a.cl/1"}
@@ -0,0 +1,111 @@
+import zipfile
+from unittest.mock import patch
+
+import pytest
+
+from src import bulk, cli, writer
+from src.db import get_connection
+from src.migrations import ensure_schema
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pq = None
+
+
+@pytest.fixture
+def link():
+    """Link con tres contactos y dos mensajes en la base de pruebas."""
+    ensure_schema()
+    con = get_connection()
+    with con:
+        link_id = con.execute(
+            "INSERT INTO links_contactos (link_general, fecha_creacion, marca, descripcion) "
+            "VALUES ('http://cli', '2024-05-01', 'Cli', 'Pruebas de consola')"
+        ).lastrowid
+        con.executemany(
+            "INSERT INTO contactos (link_auto, telefono, nombre, auto, precio, descripcion, id_link) "
+            "VALUES (?, ?, ?, 'Rio', 1, 'd', ?)",
+            [(f"http://cli/{link_id}/{i}", f"9{i}", f"Nombre{i}", link_id) for i in range(3)],
+        )
+        mensajes = [
+            con.execute("INSERT INTO mensajes (descripcion) VALUES (?)", (texto,)).lastrowid
+            for texto in ("Hola {nombre}", "Chao {nombre}")
+        ]
+    yield link_id, mensajes
+    writer.close_all()
+
+
+def exportar(link_id, mensajes, *extra):
+    argv = ["exportar", str(link_id), "--sin-registro"] + [f"--mensaje={m}" for m in mensajes]
+    return cli.main(argv + list(extra))
+
+
+def test_export_html_rotates_messages(link, tmp_path):
+    link_id, mensajes = link
+    salida = tmp_path / "reporte.html"
+    assert exportar(link_id, mensajes, "-o", str(salida)) == 0
+    html = salida.read_text(encoding="utf-8")
+    assert "Hola%20Nombre0" in html and "Chao%20Nombre1" in html and "Hola%20Nombre2" in html
+
+
+def test_export_zip_and_xlsx(link, tmp_path):
+    link_id, mensajes = link
+    assert exportar(link_id, mensajes, "--formato", "zip", "--links-por-archivo", "2",
+                    "-o", str(tmp_path / "r.zip")) == 0
+    assert len(zipfile.ZipFile(tmp_path / "r.zip").namelist()) == 2
+    assert exportar(link_id, mensajes, "--formato", "xlsx", "-o", str(tmp_path / "c.xlsx")) == 0
+    assert zipfile.is_zipfile(tmp_path / "c.xlsx")
+
+
+@pytest.mark.skipif(pq is None, reason="requiere pyarrow")
+def test_export_parquet_with_filters(link, tmp_path):
+    link_id, mensajes = link
+    salida = tmp_path / "c.parquet"
+    assert exportar(link_id, mensajes[1:], "--formato", "parquet", "--orden", "nombre", "--desc",
+                    "-o", str(salida)) == 0
+    tabla = pq.read_table(salida).to_pydict()
+    assert tabla["nombre"] == ["Nombre2", "Nombre1", "Nombre0"]
+    assert tabla["mensaje_id"] == [mensajes[1]] * 3
+    assert tabla["whatsapp_link"][0].startswith("https://wa.me/5692?text=Chao")
+
+
+def test_export_registers_once(link, tmp_path, capsys):
+    link_id, mensajes = link
+    argv = ["exportar", str(link_id), f"--mensaje={mensajes[0]}", "-o", str(tmp_path / "r.html")]
+    assert cli.main(argv) == 0
+    assert cli.main(argv) == 0
+    salida = capsys.readouterr().out
+    assert "Exportación registrada: 3 contactos." in salida
+    assert "no se duplicó" in salida
+
+
+def test_export_unknown_link_or_message(link, tmp_path):
+    link_id, mensajes = link
+    assert exportar(999999, mensajes, "-o", str(tmp_path / "x.html")) == 1
+    assert exportar(link_id, [999999], "-o", str(tmp_path / "x.html")) == 1
+
+
+def test_ingest_from_file(link, tmp_path, capsys):
+    link_id, _ = link
+    urls = tmp_path / "links.txt"
+    urls.write_text(f"http://cli/{link_id}/0\nhttp://cli/nuevo/{link_id}\nhttp://cli/malo/{link_id}\n")
+
+    def scrape_many(pendientes):
+        for url in pendientes:
+            if "malo" in url:
+                yield bulk.BulkResult(url, None, "Error 404")
+            else:
+                yield bulk.BulkResult(url, {"whatsapp_number": "987", "precio": "1,000", "nombre": "Auto"}, None)
+
+    with patch.object(bulk, "scrape_many", scrape_many):
+        assert cli.main(["cargar", str(link_id), str(urls), "--sin-ocr"]) == 0
+    salida = capsys.readouterr().out
+    assert "Contactos agregados: 1" in salida
+    assert "Links ya registrados (omitidos): 1" in salida
+    assert f"http://cli/malo/{link_id}\tError 404" in salida
+    fila = get_connection().execute(
+        "SELECT telefono, precio FROM contactos WHERE link_auto = ?", (f"http://cli/nuevo/{link_id}",)
+    ).fetchone()
+    assert fila == ("987", 1000.0)
+
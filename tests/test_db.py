@@ -0,0 +1,63 @@
+import threading
+
+from src.db import ConnectionPool
+
+
+def test_connection_is_tuned(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "db" / "test.db"))
+    con = pool.connection()
+    assert con.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert con.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert con.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+    assert con.execute("PRAGMA cache_size").fetchone()[0] == -20000
+    pool.close()
+
+
+def test_connection_reused_within_thread(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "test.db"))
+    assert pool.connection() is pool.connection()
+    pool.close()
+
+
+def test_connection_returned_to_pool_when_thread_ends(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "test.db"))
+    used = []
+
+    def worker():
+        used.append(pool.connection())
+
+    for _ in range(2):
+        t = threading.Thread(target=worker)
+        t.start()
+        t.join()
+    assert used[0] is used[1]
+    pool.close()
+
+
+def test_unfinished_transaction_rolled_back_on_release(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "test.db"))
+    con = pool.connection()
+    con.execute("CREATE TABLE t (x INTEGER)")
+    con.commit()
+
+    def worker():
+        pool.connection().execute("INSERT INTO t VALUES (1)")
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+    assert con.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    pool.close()
+
+
+def test_data_version_changes_on_commit(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "test.db"))
+    con = pool.connection()
+    con.execute("CREATE TABLE t (x)")
+    con.commit()
+    before = pool.data_version()
+    assert pool.data_version() == before
+    con.execute("INSERT INTO t VALUES (1)")
+    con.commit()
+    assert pool.data_version() != before
+    pool.close()
@@ -0,0 +1,82 @@
+import io
+import zipfile
+
+from src import excel
+from src.db import get_connection
+
+
+def sheet_xml(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        return zf.read("xl/worksheets/sheet1.xml").decode()
+
+
+def make_db(path):
+    con = get_connection(path)
+    con.execute("CREATE TABLE IF NOT EXISTS contactos (id INTEGER PRIMARY KEY, telefono TEXT, nombre TEXT)")
+    con.executemany(
+        "INSERT INTO contactos (telefono, nombre) VALUES (?, ?)",
+        [(f"9{i:08d}", f"Nombre {i}") for i in range(5)],
+    )
+    con.commit()
+    return con
+
+
+def test_export_streams_rows_and_transform(tmp_path):
+    con = make_db(str(tmp_path / "x.db"))
+    starts = []
+
+    def transform(batch, start):
+        starts.append(start)
+        batch["extra"] = [n.upper() for n in batch["nombre"]]
+        return batch
+
+    data = excel.export_xlsx(con, "SELECT * FROM contactos WHERE id > ?", [1], "Contactos", transform=transform)
+    xml = sheet_xml(data)
+    assert "NOMBRE 4" in xml and "Nombre 0" not in xml and ">extra<" in xml
+    assert starts == [0]
+
+    empty = sheet_xml(excel.export_xlsx(con, "SELECT * FROM contactos WHERE id < 0"))
+    assert ">telefono<" in empty and "Nombre" not in empty
+
+
+def test_cache_key_follows_data_version(tmp_path):
+    path = str(tmp_path / "x.db")
+    con = make_db(path)
+    query = "SELECT * FROM contactos"
+    key = excel.cache_key(query, path=path)
+    assert excel.cached(key) is None
+    data = excel.export_xlsx(con, query, key=key)
+    assert excel.cached(excel.cache_key(query, path=path)) is data
+    assert excel.export_xlsx(con, query, key=key) is data
+
+    con.execute("DELETE FROM contactos WHERE id = 1")
+    con.commit()
+    assert excel.cached(excel.cache_key(query, path=path)) is None
+
+
+def test_export_cache_is_bounded():
+    cache = excel.ExportCache(max_bytes=10)
+    cache.put("a", b"123456")
+    cache.put("b", b"123456")
+    assert cache.get("a") is None and cache.get("b") == b"123456"
+    cache.put("c", b"x" * 11)
+    assert cache.get("c") is None
+
+
+def test_export_job_writes_to_job_file(tmp_path, monkeypatch):
+    con = make_db(str(tmp_path / "x.db"))
+    monkeypatch.setattr(excel, "get_connection", lambda: con)
+
+    class Ctx:
+        def progress(self, fraction, mensaje=None):
+            pass
+
+        def file_path(self, extension):
+            return str(tmp_path / f"job.{extension}")
+
+    excel._cache.clear()
+    resultado = excel.export_job(Ctx(), "SELECT * FROM contactos", sheet_name="Contactos", total=5)
+    assert resultado["archivo"] == str(tmp_path / "job.xlsx") and resultado["nombre"] == "contactos.xlsx"
+    with open(resultado["archivo"], "rb") as fh:
+        assert "Nombre 4" in sheet_xml(fh.read())
+    assert excel._cache._size == 0  # no pasa por la caché en memoria
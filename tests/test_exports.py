@@ -0,0 +1,77 @@
+import sqlite3
+
+from src import exports, migrations
+
+
+def make_db():
+    con = sqlite3.connect(":memory:")
+    migrations.migrate(con)
+    return con
+
+
+def count(con, table):
+    return con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_log_export_writes_batch_and_logs():
+    con = make_db()
+    lote = exports.log_export(con, [1, 2, 3], [10, 11, 10], ["a", "b", "c"], "HTML", fecha="2024-05-01")
+    assert lote.created and lote.total == 3
+    rows = con.execute(
+        "SELECT contact_id, mensaje_id, link_generado, fecha_exportacion, batch_id FROM export_logs ORDER BY id"
+    ).fetchall()
+    assert rows == [
+        (1, 10, "a", "2024-05-01", lote.id),
+        (2, 11, "b", "2024-05-01", lote.id),
+        (3, 10, "c", "2024-05-01", lote.id),
+    ]
+    assert con.execute("SELECT formato, total FROM export_batches").fetchone() == ("HTML", 3)
+
+
+def test_same_selection_same_day_is_deduplicated():
+    con = make_db()
+    first = exports.log_export(con, [1, 2], [10, 10], ["a", "b"], "HTML", fecha="2024-05-01")
+    again = exports.log_export(con, [1, 2], [10, 10], ["a", "b"], "HTML", fecha="2024-05-01")
+    assert not again.created and again.id == first.id
+    assert count(con, "export_logs") == 2 and count(con, "export_batches") == 1
+
+
+def test_same_selection_in_other_format_is_logged():
+    con = make_db()
+    html = exports.log_export(con, [1, 2], [10, 10], ["a", "b"], "HTML", fecha="2024-05-01")
+    excel = exports.log_export(con, [1, 2], [10, 10], ["a", "b"], "Excel", fecha="2024-05-01")
+    assert excel.created and excel.id != html.id
+    assert con.execute("SELECT formato FROM export_batches ORDER BY id").fetchall() == [("HTML",), ("Excel",)]
+    assert count(con, "export_logs") == 4
+
+
+def test_new_batch_for_other_day_or_content():
+    con = make_db()
+    exports.log_export(con, [1, 2], [10, 10], ["a", "b"], fecha="2024-05-01")
+    other_day = exports.log_export(con, [1, 2], [10, 10], ["a", "b"], fecha="2024-05-02")
+    other_links = exports.log_export(con, [1, 2], [10, 11], ["a", "b2"], fecha="2024-05-01")
+    assert other_day.created and other_links.created
+    assert count(con, "export_batches") == 3 and count(con, "export_logs") == 6
+
+
+def test_selection_hash_depends_on_order():
+    assert exports.selection_hash([1, 2], [1, 1], ["a", "b"]) != exports.selection_hash(
+        [2, 1], [1, 1], ["b", "a"]
+    )
+
+
+def test_recorded_selection_is_logged_from_file(tmp_path):
+    recorder = exports.SelectionRecorder(["uno", "dos"], [7, 8])
+    bloque = {"id": [3, 4], "telefono": ["91", "92"], "nombre": ["A", "B"], "auto": ["x", "y"]}
+    recorder.add(bloque, 0)
+    recorder.add({k: v[:1] for k, v in bloque.items()}, 2)
+    registro = recorder.save(str(tmp_path / "filas"), "HTML")
+    assert registro["total"] == 3 and registro["formato"] == "HTML"
+    filas = exports.load_rows(registro["archivo"])
+    assert filas == recorder.rows() and filas[:2] == ([3, 4, 3], [7, 8, 7])
+    assert registro["hash"] == exports.selection_hash(*filas, "HTML")
+
+    con = make_db()
+    lote = exports.log_export(con, *filas, formato="HTML", fecha="2024-05-01", digest=registro["hash"])
+    assert lote.created and lote.total == 3
+    assert not exports.log_export(con, *filas, formato="HTML", fecha="2024-05-01").created
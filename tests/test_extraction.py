@@ -0,0 +1,68 @@
+import pytest
+
+from src.extraction import Extractor, Field
+
+PAGE = """
+<html><body>
+  <h1>2019 Título <b>Largo</b></h1>
+  <div class="features-item features-item-value-precio">Precio: $12,990,000</div>
+  <p>Fuera del contenedor</p>
+  <div class="view-more-container">
+    <div class="otra"><p>Tampoco</p></div>
+    <div class="view-more-target"><p>Único dueño,<br> mantenciones al día</p></div>
+  </div>
+  <a href="https://example.com">Otro</a>
+  <a href="https://wa.me/56911122233">WhatsApp</a>
+  <img src="logo.png"><img src="data:image/png;base64,AA==">
+</body></html>
+"""
+
+FIELDS = [
+    Field("titulo", "h1"),
+    Field("precio", "div", classes=["features-item-value-precio"]),
+    Field(
+        "descripcion", "p",
+        within=[("div", "view-more-container"), ("div", "view-more-target")],
+    ),
+    Field("whatsapp", "a", attr="href", pattern=r"wa\.me/56\d{9}", extract="attr"),
+    Field("imagen", "img", attr="src", pattern=r"^data:image", extract="attr"),
+    Field("ausente", "span", classes=["no-existe"]),
+]
+
+
+def test_extracts_all_fields_in_one_pass():
+    values, timings = Extractor(FIELDS).extract(PAGE)
+    assert values == {
+        "titulo": "2019 TítuloLargo",
+        "precio": "Precio: $12,990,000",
+        "descripcion": "Único dueño,mantenciones al día",
+        "whatsapp": "https://wa.me/56911122233",
+        "imagen": "data:image/png;base64,AA==",
+        "ausente": None,
+    }
+    assert timings["_parse"] >= timings["titulo"] >= 0
+
+
+def test_accepts_bytes_and_unclosed_elements():
+    values, _ = Extractor([Field("precio", "div", classes=["precio"])]).extract(
+        '<div class="precio">$1,000'.encode("utf-8")
+    )
+    assert values["precio"] == "$1,000"
+
+
+def test_keeps_first_match_and_stops_early():
+    extractor = Extractor([Field("titulo", "h1")])
+    extractor.CHUNK_SIZE = 16
+    values, _ = extractor.extract("<h1>Primero</h1>" + "<h1>Segundo</h1>" * 1000 + "<h1")
+    assert values["titulo"] == "Primero"
+
+
+def test_matches_beautifulsoup():
+    bs4 = pytest.importorskip("bs4")
+    soup = bs4.BeautifulSoup(PAGE, "html.parser")
+    values, _ = Extractor(FIELDS).extract(PAGE)
+    assert values["titulo"] == soup.find("h1").get_text(strip=True)
+    assert values["precio"] == soup.find("div", class_="features-item-value-precio").get_text(strip=True)
+    container = soup.find("div", class_="view-more-container")
+    expected = container.find("div", class_="view-more-target").find("p").get_text(strip=True)
+    assert values["descripcion"] == expected
@@ -0,0 +1,55 @@
+import sqlite3
+
+import pytest
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+from src import frames, migrations
+
+pytestmark = pytest.mark.skipif(pd is None, reason="requiere pandas")
+
+
+@pytest.fixture
+def con():
+    con = sqlite3.connect(":memory:")
+    migrations.migrate(con)
+    con.executemany(
+        "INSERT INTO links_contactos (link_general, fecha_creacion, marca, descripcion) VALUES (?, ?, ?, ?)",
+        [(f"http://l{i}", "2024-01-01", "Haval" if i % 2 else "Kia", "x" * 500) for i in range(6)],
+    )
+    con.executemany(
+        "INSERT INTO contactos (link_auto, telefono, nombre, auto, precio, descripcion, id_link) "
+        "VALUES (?, ?, 'N', 'A', 1.5, 'd', ?)",
+        [(f"http://c{i}", f"9{i}", None if i == 0 else 1) for i in range(5)],
+    )
+    con.commit()
+    return con
+
+
+def test_compact_dtypes(con):
+    links = frames.read_frame(con, "SELECT * FROM links_contactos")
+    assert str(links["id"].dtype) == "Int64"
+    assert links["marca"].dtype == "category"
+    assert str(links["descripcion"].dtype).startswith("string")
+    contactos = frames.read_frame(con, "SELECT * FROM contactos")
+    # Un id_link nulo ya no convierte la columna a float64
+    assert str(contactos["id_link"].dtype) == "Int64" and contactos["id_link"].isna().sum() == 1
+    assert contactos["precio"].dtype == "float64"
+
+
+def test_projection_and_chunks(con):
+    links = frames.read_frame(con, "SELECT * FROM links_contactos WHERE id > ?", [2], columns=("id", "marca"))
+    assert list(links.columns) == ["id", "marca"] and links["id"].tolist() == [3, 4, 5, 6]
+    chunks = list(frames.iter_frames(con, "SELECT * FROM contactos ORDER BY id", chunksize=2))
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert all(str(c["id"].dtype) == "Int64" for c in chunks)
+    with pytest.raises(ValueError):
+        frames.projected("SELECT * FROM contactos", ["id; DROP TABLE contactos"])
+
+
+def test_unexpected_values_keep_original_dtype():
+    frame = frames.compact(pd.DataFrame({"id": ["a", "b"], "otra": [1, 2]}))
+    assert frame["id"].dtype == object and frame["otra"].dtype == "int64"
@@ -0,0 +1,33 @@
+from src.http_cache import ResponseCache, canonical_url
+
+
+def test_canonical_url_drops_tracking_and_sorts_query():
+    url = "HTTPS://www.ChileAutos.cl:443/vehiculos/detalles/x/CL-AD-1/?Cr=0&gts=CL-AD-1&b=2&a=1#top"
+    assert canonical_url(url) == "https://www.chileautos.cl/vehiculos/detalles/x/CL-AD-1/?a=1&b=2"
+
+
+def test_put_get_and_parsed(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+    assert cache.get("http://a/") is None
+    cache.put("http://a/", b"<html>", etag='"e"')
+    entry = cache.get("http://a/?gts=9")
+    assert entry.body == b"<html>" and entry.etag == '"e"' and entry.parsed is None
+    assert cache.is_fresh(entry)
+    cache.set_parsed("http://a/", {"nombre": "X"})
+    assert cache.get("http://a/").parsed == {"nombre": "X"}
+
+
+def test_ttl_expiry(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"), ttl=0)
+    cache.put("http://a/", b"x")
+    assert not cache.is_fresh(cache.get("http://a/"))
+
+
+def test_lru_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"), max_bytes=10)
+    cache.put("http://a/", b"12345")
+    cache.put("http://b/", b"12345")
+    cache.put("http://c/", b"12345")
+    assert cache.get("http://a/") is None
+    assert cache.get("http://b/") is not None
+    assert cache.get("http://c/") is not None
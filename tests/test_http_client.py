@@ -0,0 +1,88 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+from src.http_client import CircuitBreaker, CircuitOpenError, ScraperClient, parse_retry_after
+
+
+def response(status, headers=None):
+    return MagicMock(status_code=status, headers=headers or {})
+
+
+def make_client(results, **kwargs):
+    session = MagicMock()
+    session.get.side_effect = results
+    sleeps = []
+    client = ScraperClient(session=session, sleep=sleeps.append, **kwargs)
+    return client, session, sleeps
+
+
+def test_retries_5xx_with_capped_jittered_backoff():
+    client, session, sleeps = make_client(
+        [response(503), response(502), response(200)], backoff_base=1, backoff_max=1.5
+    )
+    assert client.get("https://a.cl/x").status_code == 200
+    assert session.get.call_count == 3
+    assert len(sleeps) == 2 and all(0 <= s <= 1.5 for s in sleeps)
+
+
+def test_honors_retry_after():
+    client, _, sleeps = make_client([response(429, {"Retry-After": "7"}), response(200)], backoff_max=30)
+    assert client.get("https://a.cl/x").status_code == 200
+    assert sleeps == [7.0]
+
+
+def test_gives_up_when_retry_after_too_long():
+    client, session, sleeps = make_client([response(429, {"Retry-After": "3600"})], backoff_max=30)
+    assert client.get("https://a.cl/x").status_code == 429
+    assert session.get.call_count == 1 and sleeps == []
+
+
+def test_connection_errors_are_retried_then_raised():
+    error = requests.ConnectionError("down")
+    client, session, _ = make_client([error, error], max_retries=1)
+    with pytest.raises(requests.ConnectionError):
+        client.get("https://a.cl/x")
+    assert session.get.call_count == 2
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    client, session, _ = make_client(
+        [response(500), response(500), response(200)], max_retries=0, breaker=breaker
+    )
+    client.get("https://a.cl/1")
+    client.get("https://a.cl/2")
+    with pytest.raises(CircuitOpenError):
+        client.get("https://a.cl/3")
+    assert session.get.call_count == 2
+    now[0] = 11
+    assert client.get("https://a.cl/4").status_code == 200
+    assert breaker.allow("a.cl")
+
+
+def test_other_request_errors_end_the_trial():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    client, session, _ = make_client(
+        [response(500), requests.TooManyRedirects("loop"), response(200)], max_retries=0, breaker=breaker
+    )
+    client.get("https://a.cl/1")
+    now[0] = 11
+    with pytest.raises(requests.TooManyRedirects):
+        client.get("https://a.cl/2")
+    # La prueba falló: el sitio vuelve a quedar abierto, no bloqueado para siempre
+    with pytest.raises(CircuitOpenError):
+        client.get("https://a.cl/3")
+    now[0] = 22
+    assert client.get("https://a.cl/4").status_code == 200
+    assert session.get.call_count == 3
+
+
+def test_parse_retry_after_http_date():
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("12") == 12.0
+    assert parse_retry_after("basura") is None
@@ -0,0 +1,46 @@
+import os
+import sqlite3
+
+from src import images, migrations
+from src.images import ImageStore
+
+
+def test_put_is_content_addressed_and_written_once(tmp_path):
+    store = ImageStore(str(tmp_path))
+    digest = store.put(b"png-bytes")
+    path = store.path(digest)
+    assert os.path.exists(path) and store.get(digest) == b"png-bytes"
+    mtime = os.stat(path).st_mtime_ns
+    assert ImageStore(str(tmp_path)).put(b"png-bytes") == digest
+    assert os.stat(path).st_mtime_ns == mtime
+    assert store.put(b"otra") != digest
+    assert store.get("0" * 64) is None
+
+
+def test_get_serves_recent_images_from_memory(tmp_path):
+    store = ImageStore(str(tmp_path), memory_items=1)
+    first = store.put(b"a")
+    os.remove(store.path(first))
+    assert store.get(first) == b"a"
+    store.put(b"b")
+    assert store.get(first) is None
+
+
+def test_evicts_only_orphans_oldest_first(tmp_path):
+    store = ImageStore(str(tmp_path), max_bytes=10)
+    digests = [store.put(bytes([i]) * 4) for i in range(4)]
+    for age, digest in enumerate(digests):
+        os.utime(store.path(digest), (age, age))
+
+    con = sqlite3.connect(":memory:")
+    migrations.migrate(con)
+    con.execute(
+        "INSERT INTO contactos (link_auto, telefono, nombre, auto, precio, descripcion, id_link, imagen_hash) "
+        "VALUES ('l', '9', '', 'A', 1, 'd', 1, ?)",
+        (digests[0],),
+    )
+    assert images.collect_garbage(con, store) == 2
+    remaining = [d for d in digests if os.path.exists(store.path(d))]
+    assert remaining == [digests[0], digests[3]]
+    assert store.total_bytes() == 8
+    assert images.collect_garbage(con, store) == 0
@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Módulos sin interfaz: la línea de comandos y las pruebas los importan
+CORE = (
+    "src.db", "src.migrations", "src.templates", "src.links", "src.search", "src.report",
+    "src.records", "src.writer", "src.query_cache", "src.frames", "src.exports", "src.bulk",
+    "src.jobs", "src.excel", "src.ocr", "src.images", "src.cli",
+)
+# Dependencias pesadas que deben cargarse solo al usarse
+HEAVY = ("streamlit", "pandas", "pyarrow", "numpy", "requests", "bs4", "xlsxwriter", "pytesseract", "PIL")
+# Tiempo máximo (acumulado, según -X importtime) para importar la línea de comandos
+CLI_BUDGET_US = 250_000
+
+
+def importtime(code):
+    """``{módulo: microsegundos acumulados}`` al ejecutar ``code`` en un intérprete nuevo."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_core_modules_defer_heavy_imports():
+    loaded = importtime("import " + ", ".join(CORE))
+    heavy = sorted(name for name in loaded if name.split(".")[0] in HEAVY)
+    assert heavy == []
+
+
+def test_cli_import_budget():
+    loaded = importtime("import src.cli")
+    assert loaded["src.cli"] < CLI_BUDGET_US
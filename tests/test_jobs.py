@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+
+import pytest
+
+from src import jobs
+
+
+@pytest.fixture
+def runner(tmp_path):
+    runner = jobs.JobRunner(
+        path=str(tmp_path / "jobs.db"), files_dir=str(tmp_path / "files"), max_workers=1, max_queued=2
+    )
+    yield runner
+    runner.shutdown()
+
+
+def test_submit_stores_result(runner):
+    job_id = runner.submit("suma", lambda ctx, a, b=0: {"total": a + b}, 2, b=3, clave="x")
+    job = runner.wait(job_id, timeout=5)
+    assert job.estado == jobs.TERMINADO
+    assert job.progreso == 1.0
+    assert job.resultado == {"total": 5}
+    assert runner.latest("suma", "x").id == job_id
+
+
+def test_failed_job_records_error(runner):
+    def falla(ctx):
+        raise RuntimeError("sin conexión")
+
+    job = runner.wait(runner.submit("falla", falla), timeout=5)
+    assert job.estado == jobs.ERROR and job.error == "sin conexión"
+
+
+def test_cancel_running_job(runner):
+    started = threading.Event()
+
+    def lento(ctx):
+        started.set()
+        while True:
+            ctx.progress(0.5)
+            time.sleep(0.01)
+
+    job_id = runner.submit("lento", lento)
+    assert started.wait(5)
+    assert runner.cancel(job_id)
+    assert runner.wait(job_id, timeout=5).estado == jobs.CANCELADO
+    assert not runner.cancel(job_id)
+
+
+def test_reuse_active_job_and_queue_limit(runner):
+    gate = threading.Event()
+
+    def bloqueado(ctx):
+        gate.wait(5)
+        return "ok"
+
+    first = runner.submit("bloq", bloqueado, clave="k")
+    assert runner.submit("bloq", bloqueado, clave="k") == first
+    # Uno corriendo y dos en espera: el siguiente no cabe
+    runner.submit("bloq", bloqueado, clave="a", reuse=False)
+    runner.submit("bloq", bloqueado, clave="b", reuse=False)
+    with pytest.raises(jobs.JobQueueFull):
+        runner.submit("bloq", bloqueado, clave="c")
+    gate.set()
+    assert runner.wait(first, timeout=5).resultado == "ok"
+
+
+def test_latest_honours_max_age(runner):
+    job_id = runner.submit("viejo", lambda ctx: None, clave="k")
+    runner.wait(job_id, timeout=5)
+    runner._update(job_id, creado=time.time() - 100)
+    assert runner.latest("viejo", "k").id == job_id
+    assert runner.latest("viejo", "k", max_age=10) is None
+
+
+def test_restart_marks_interrupted_jobs(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    first = jobs.JobRunner(path=path, files_dir=str(tmp_path / "files"))
+    gate = threading.Event()
+    job_id = first.submit("largo", lambda ctx: gate.wait(5))
+    second = jobs.JobRunner(path=path, files_dir=str(tmp_path / "files"))
+    job = second.get(job_id)
+    assert job.estado == jobs.ERROR and "reiniciar" in job.error
+    gate.set()
+    first.shutdown()
+    second.shutdown()
+
+
+def test_file_results_and_purge(runner):
+    def escribe(ctx):
+        path = ctx.file_path("txt")
+        with open(path, "w") as fh:
+            fh.write("hola")
+        return {"archivo": path}
+
+    job = runner.wait(runner.submit("archivo", escribe), timeout=5)
+    path = job.resultado["archivo"]
+    assert os.path.dirname(path) == runner.files_dir
+    assert runner.purge_files() == 0
+    old = time.time() - jobs.FILE_MAX_AGE - 10
+    os.utime(path, (old, old))
+    assert runner.purge_files() == 1 and not os.path.exists(path)
+
+
+def test_make_key_is_stable():
+    assert jobs.make_key("q", [1, 2]) == jobs.make_key("q", [1, 2])
+    assert jobs.make_key("q", [1, 2]) != jobs.make_key("q", [2, 1])
+
+
+def test_latest_file_ignores_purged_files(runner):
+    def escribe(ctx):
+        path = ctx.file_path("txt")
+        with open(path, "w") as fh:
+            fh.write("hola")
+        return {"archivo": path}
+
+    job = runner.wait(runner.submit("archivo", escribe, clave="k"), timeout=5)
+    assert runner.latest_file("archivo", "k").id == job.id
+    old = time.time() - jobs.FILE_MAX_AGE - 10
+    os.utime(job.resultado["archivo"], (old, old))
+    # Al pedir otro trabajo se borran los archivos vencidos
+    runner.wait(runner.submit("otro", lambda ctx: None), timeout=5)
+    assert not os.path.exists(job.resultado["archivo"])
+    assert runner.latest("archivo", "k").id == job.id
+    assert runner.latest_file("archivo", "k") is None
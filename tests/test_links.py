@@ -0,0 +1,60 @@
+import urllib.parse
+
+import pytest
+
+from src import links
+
+# pandas y pyarrow son opcionales: sin ellos se prueban solo los diccionarios
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+MENSAJES = ["Hola {nombre}, ¿vendes tu {auto}?", "Sigue disponible el {auto} a {precio}?", "Hola"]
+IDS = [10, 20, 30]
+DATOS = {
+    "id": [1, 2, 3, 4, 5],
+    "telefono": ["9 1111 1111", "922222222", " 933333333 ", "944444444", "955555555"],
+    "nombre": ["Ana", "José", "", "Luis", "Eva"],
+    "auto": ["Kia Rio", "Mazda 3", "Fiat & Uno", "BMW", "Audi"],
+    "precio": [1000000.0, 2500000.0, 3.5, 4.0, 5.0],
+}
+
+
+def expected():
+    # Semántica anterior: una fila a la vez, mensaje i % n, quote del texto completo
+    rows = [dict(zip(DATOS, values)) for values in zip(*DATOS.values())]
+    result = {"telefono": [], "mensaje_id": [], "whatsapp_link": []}
+    for i, row in enumerate(rows):
+        texto = MENSAJES[i % len(MENSAJES)]
+        for key, value in row.items():
+            texto = texto.replace("{" + key + "}", str(value))
+        telefono = "".join(row["telefono"].split())
+        result["telefono"].append(telefono)
+        result["mensaje_id"].append(IDS[i % len(IDS)])
+        result["whatsapp_link"].append(f"https://wa.me/56{telefono}?text={urllib.parse.quote(texto)}")
+    return result
+
+
+def test_build_links_from_dict_of_lists():
+    assert links.build_links(DATOS, MENSAJES, IDS) == expected()
+
+
+@pytest.mark.skipif(pd is None, reason="pandas no instalado")
+def test_build_links_from_dataframe():
+    assert links.build_links(pd.DataFrame(DATOS), MENSAJES, IDS) == expected()
+
+
+@pytest.mark.skipif(pa is None, reason="pyarrow no instalado")
+def test_build_links_from_arrow_table():
+    assert links.build_links(pa.table(DATOS), MENSAJES, IDS) == expected()
+
+
+def test_build_links_edge_cases():
+    assert links.build_links({"telefono": []}, ["Hola"]) == {"telefono": [], "whatsapp_link": []}
+    with pytest.raises(ValueError):
+        links.build_links(DATOS, [])
@@ -1,73 +1,54 @@
-import sys
-import os
-from unittest.mock import MagicMock, patch
 import sqlite3
-import importlib
+from unittest.mock import patch
 
-ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+from src import records, writer
 
 
-def import_app():
-    with patch.dict(
-        sys.modules,
-        {
-            "streamlit": MagicMock(),
-            "pandas": MagicMock(),
-            "requests": MagicMock(),
-            "bs4": MagicMock(),
-        },
-    ):
-        sys.path.insert(0, ROOT)
-        import src.app
-
-        importlib.reload(src.app)
-        sys.path.remove(ROOT)
-        return src.app
-
-
-def make_memory_db():
-    conn = sqlite3.connect(":memory:")
+def make_db(tmp_path):
+    """Base en archivo con la tabla mensajes y un escritor propio sobre ella."""
+    path = str(tmp_path / "mensajes.db")
+    conn = sqlite3.connect(path)
     conn.execute(
         "CREATE TABLE mensajes (id INTEGER PRIMARY KEY AUTOINCREMENT, descripcion TEXT NOT NULL)"
     )
-    return conn
+    conn.commit()
+    return conn, writer.Writer(path)
 
 
-def test_add_message():
-    conn = make_memory_db()
-    app = import_app()
-    with patch.object(app, "get_connection", return_value=conn):
-        msg_id = app.add_message("Hola")
+def test_add_message(tmp_path):
+    conn, db_writer = make_db(tmp_path)
+    with patch.object(writer, "get_writer", return_value=db_writer):
+        msg_id = records.add_message("Hola")
+    db_writer.close()
     cur = conn.cursor()
     cur.execute("SELECT descripcion FROM mensajes WHERE id=?", (msg_id,))
     row = cur.fetchone()
     assert row[0] == "Hola"
 
 
-def test_update_message():
-    conn = make_memory_db()
+def test_update_message(tmp_path):
+    conn, db_writer = make_db(tmp_path)
     cur = conn.cursor()
     cur.execute("INSERT INTO mensajes (descripcion) VALUES ('Old')")
     msg_id = cur.lastrowid
     conn.commit()
-    app = import_app()
-    with patch.object(app, "get_connection", return_value=conn):
-        result = app.update_message(msg_id, "New")
+    with patch.object(writer, "get_writer", return_value=db_writer):
+        result = records.update_message(msg_id, "New")
+    db_writer.close()
     assert result is True
     cur.execute("SELECT descripcion FROM mensajes WHERE id=?", (msg_id,))
     assert cur.fetchone()[0] == "New"
 
 
-def test_delete_message():
-    conn = make_memory_db()
+def test_delete_message(tmp_path):
+    conn, db_writer = make_db(tmp_path)
     cur = conn.cursor()
     cur.execute("INSERT INTO mensajes (descripcion) VALUES ('Temp')")
     msg_id = cur.lastrowid
     conn.commit()
-    app = import_app()
-    with patch.object(app, "get_connection", return_value=conn):
-        result = app.delete_message(msg_id)
+    with patch.object(writer, "get_writer", return_value=db_writer):
+        result = records.delete_message(msg_id)
+    db_writer.close()
     assert result is True
     cur.execute("SELECT COUNT(*) FROM mensajes WHERE id=?", (msg_id,))
     assert cur.fetchone()[0] == 0
-
@@ -0,0 +1,113 @@
+import sqlite3
+from unittest.mock import patch
+
+from src import migrations
+
+
+def table_names(con):
+    return {
+        row[0]
+        for row in con.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    }
+
+
+def test_migrate_fresh_database():
+    con = sqlite3.connect(":memory:")
+    applied = migrations.migrate(con)
+    assert applied == [v for v, _, _ in migrations.MIGRATIONS]
+    assert migrations.get_version(con) == migrations.LATEST_VERSION
+    assert {"links_contactos", "contactos", "mensajes", "export_logs"} <= table_names(con)
+    assert migrations.migrate(con) == []
+
+
+def test_migrate_legacy_contactos_schema():
+    con = sqlite3.connect(":memory:")
+    con.execute(
+        "CREATE TABLE contactos (id INTEGER PRIMARY KEY AUTOINCREMENT, link_auto TEXT NOT NULL, "
+        "telefono TEXT UNIQUE NOT NULL, nombre TEXT NOT NULL, auto TEXT NOT NULL, "
+        "precio REAL NOT NULL, descripcion TEXT NOT NULL, id_link INTEGER)"
+    )
+    con.execute(
+        "INSERT INTO contactos (link_auto, telefono, nombre, auto, precio, descripcion, id_link) "
+        "VALUES ('http://a', '911', 'A', 'Auto', 1, 'd', 1)"
+    )
+    con.commit()
+    migrations.migrate(con)
+    table_sql = con.execute(
+        "SELECT sql FROM sqlite_master WHERE name='contactos'"
+    ).fetchone()[0].upper()
+    assert "LINK_AUTO TEXT UNIQUE" in table_sql
+    assert "TELEFONO TEXT UNIQUE" not in table_sql
+    assert con.execute("SELECT telefono FROM contactos").fetchone()[0] == "911"
+
+
+def test_ensure_schema_runs_once_per_database(tmp_path):
+    path = str(tmp_path / "test.db")
+    migrations.ensure_schema(path)
+    with patch.object(migrations, "get_connection", side_effect=AssertionError):
+        migrations.ensure_schema(path)
+
+
+def test_cli_status_and_migrate(tmp_path, capsys):
+    path = str(tmp_path / "cli.db")
+    assert migrations.main(["--db", path, "--status"]) == 0
+    assert "Versión actual: 0" in capsys.readouterr().out
+    assert migrations.main(["--db", path]) == 0
+    assert migrations.main(["--db", path]) == 0
+    assert "al día" in capsys.readouterr().out
+
+
+def test_contactos_version_counts_changes():
+    con = sqlite3.connect(":memory:")
+    migrations.migrate(con)
+
+    def version():
+        return con.execute("SELECT version FROM versiones WHERE tabla = 'contactos'").fetchone()[0]
+
+    assert version() == 0
+    con.execute(
+        "INSERT INTO contactos (link_auto, telefono, nombre, auto, precio, descripcion, id_link) "
+        "VALUES ('http://1', '91', 'N', 'A', 1, 'd', 1)"
+    )
+    con.execute("UPDATE contactos SET nombre = 'Juan'")
+    con.execute("DELETE FROM contactos")
+    assert version() == 3
+
+
+class SinFts5:
+    """Cursor de una base cuyo SQLite no trae FTS5."""
+
+    def __init__(self, cur):
+        self.cur = cur
+
+    def execute(self, sql, *args):
+        if "USING fts5" in sql:
+            raise sqlite3.OperationalError("no such module: fts5")
+        return self.cur.execute(sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self.cur, name)
+
+
+def test_fts_tables_are_created_once_fts5_is_available(caplog):
+    con = sqlite3.connect(":memory:")
+    steps = [(v, d, lambda cur, f=f: f(SinFts5(cur))) for v, d, f in migrations.MIGRATIONS]
+    with patch.object(migrations, "MIGRATIONS", steps):
+        migrations.migrate(con)
+    assert migrations.get_version(con) == migrations.LATEST_VERSION
+    assert not {"contactos_fts", "links_fts"} & table_names(con)
+    assert "FTS5" in caplog.text
+
+    con.execute(
+        "INSERT INTO contactos (link_auto, telefono, nombre, auto, precio, descripcion, id_link) "
+        "VALUES ('http://1', '91', 'Juan', 'Yaris', 1, 'd', 1)"
+    )
+    con.commit()
+    assert migrations.ensure_fts(con) == ["contactos_fts", "links_fts"]
+    assert migrations.ensure_fts(con) == []
+    assert con.execute("SELECT rowid FROM contactos_fts WHERE contactos_fts MATCH 'Yar'").fetchall() == [(1,)]
+    con.execute(
+        "INSERT INTO links_contactos (link_general, fecha_creacion, marca, descripcion) "
+        "VALUES ('http://g', '2024-01-01', 'Toyota', 'lote')"
+    )
+    assert con.execute("SELECT rowid FROM links_fts WHERE links_fts MATCH 'Toy'").fetchall() == [(1,)]
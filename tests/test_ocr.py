@@ -0,0 +1,57 @@
+from src import ocr
+from src.images import ImageStore
+from src.ocr import OcrCache, OcrResult
+
+
+def fake_recognize(data):
+    text = data.decode()
+    return OcrResult(ocr.parse_phone(text), 0.9 if text.startswith("+") else 0.4, text)
+
+
+def failing_recognize(data):
+    raise AssertionError("no debe leer imágenes ya en caché")
+
+
+def test_parse_phone():
+    assert ocr.parse_phone("+56 9 1234 5678") == "912345678"
+    assert ocr.parse_phone("912345678") == "912345678"
+    assert ocr.parse_phone("22 123 4567") is None
+    assert ocr.parse_phone("") is None
+
+
+def test_recognize_many_batches_in_processes_and_caches(tmp_path):
+    cache = OcrCache(str(tmp_path / "cache.db"))
+    images = {f"h{i}": f"+56 9 1111 000{i}".encode() for i in range(5)}
+    images["dup"] = images["h0"]
+    results = ocr.recognize_many(images, cache=cache, max_workers=2, batch_size=2, recognize=fake_recognize)
+    assert results["h3"] == OcrResult("911110003", 0.9, "+56 9 1111 0003")
+    assert set(results) == set(images)
+
+    again = ocr.recognize_many(images, cache=cache, recognize=failing_recognize)
+    assert again == results
+
+
+def test_unreadable_images_are_not_cached(tmp_path):
+    cache = OcrCache(str(tmp_path / "cache.db"))
+    assert ocr.recognize_many({"x": b"img"}, cache=cache, max_workers=1, recognize=failing_recognize) == {}
+    assert cache.get_many(["x"]) == {}
+
+
+def test_fill_phones_respects_confidence(tmp_path):
+    store = ImageStore(str(tmp_path / "images"))
+    sure = store.put(b"+56 9 1234 5678")
+    unsure = store.put(b"9 8765 4321")
+    datas = [
+        {"whatsapp_number": "No disponible", "contact_image_hash": sure},
+        {"whatsapp_number": "No disponible", "contact_image_hash": unsure},
+        {"whatsapp_number": "911122233", "contact_image_hash": unsure},
+        {"whatsapp_number": "No disponible", "contact_image_hash": None},
+    ]
+    filled = ocr.fill_phones(
+        datas, store, cache=OcrCache(str(tmp_path / "cache.db")), max_workers=1, recognize=fake_recognize
+    )
+    assert filled == 1
+    assert datas[0]["whatsapp_number"] == "912345678"
+    assert datas[1]["whatsapp_number"] == "No disponible"
+    assert datas[1]["telefono_ocr"].telefono == "987654321"
+    assert datas[2]["whatsapp_number"] == "911122233" and "telefono_ocr" not in datas[2]
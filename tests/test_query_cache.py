@@ -0,0 +1,70 @@
+import sqlite3
+
+from src import query_cache
+from src.db import get_connection
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(tmp_path, **kwargs):
+    path = str(tmp_path / "q.db")
+    con = get_connection(path)
+    con.execute("CREATE TABLE IF NOT EXISTS mensajes (id INTEGER PRIMARY KEY, descripcion TEXT)")
+    con.execute("INSERT INTO mensajes (descripcion) VALUES ('hola')")
+    con.commit()
+    clock = FakeClock()
+    return query_cache.QueryCache(path, clock=clock, **kwargs), con, clock, path
+
+
+def test_repeated_reads_hit_the_cache(tmp_path):
+    cache, con, clock, _ = make_cache(tmp_path)
+    first = cache.read("SELECT * FROM mensajes")
+    first["extra"] = 1  # las páginas modifican lo que reciben
+    second = cache.read("SELECT * FROM mensajes")
+    assert list(second.columns) == ["id", "descripcion"]
+    assert cache.read("SELECT * FROM mensajes WHERE id = ?", [1]).iloc[0]["descripcion"] == "hola"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 2)
+
+
+def test_invalidate_after_own_write(tmp_path):
+    cache, con, clock, _ = make_cache(tmp_path)
+    cache.read("SELECT * FROM mensajes")
+    con.execute("INSERT INTO mensajes (descripcion) VALUES ('chao')")
+    con.commit()
+    cache.invalidate()
+    assert len(cache.read("SELECT * FROM mensajes")) == 2
+    # El mismo commit no vuelve a contar como cambio externo
+    clock.now += 10
+    cache.read("SELECT * FROM mensajes")
+    assert cache.stats()["invalidations"] == 1 and cache.stats()["hits"] == 1
+
+
+def test_external_write_detected_with_data_version(tmp_path):
+    cache, con, clock, path = make_cache(tmp_path)
+    cache.read("SELECT * FROM mensajes")
+    other = sqlite3.connect(path)  # otro proceso o herramienta
+    other.execute("INSERT INTO mensajes (descripcion) VALUES ('chao')")
+    other.commit()
+    other.close()
+    # Dentro del intervalo no se consulta la base
+    assert len(cache.read("SELECT * FROM mensajes")) == 1
+    clock.now += query_cache.CHECK_INTERVAL
+    assert len(cache.read("SELECT * FROM mensajes")) == 2
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_limits(tmp_path):
+    cache, con, clock, _ = make_cache(tmp_path, max_entries=2, max_rows=0)
+    cache.read("SELECT * FROM mensajes")
+    assert cache.stats()["entries"] == 0
+    cache.max_rows = 10
+    for i in range(3):
+        cache.read("SELECT * FROM mensajes WHERE id > ?", [i])
+    assert cache.stats()["entries"] == 2
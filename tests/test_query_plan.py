@@ -0,0 +1,100 @@
+import re
+import sqlite3
+
+import pytest
+
+from src import migrations, queries, search
+
+# Tablas pequeñas que las páginas sí listan completas.
+SMALL_TABLES = ("links_contactos", "mensajes")
+
+
+@pytest.fixture(scope="module")
+def con():
+    con = sqlite3.connect(":memory:")
+    migrations.migrate(con)
+    return con
+
+
+def full_scans(con, sql, params):
+    plan = con.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    details = [row[-1] for row in plan]
+    # "SCAN x" sin "USING ..." ni "VIRTUAL TABLE" es un recorrido completo; x
+    # puede ser el nombre de la tabla o su alias en la consulta.
+    return [
+        d for d in details
+        if re.fullmatch(r"SCAN (\w+)", d) and d.split()[1] not in SMALL_TABLES
+    ]
+
+
+@pytest.mark.parametrize("name", sorted(queries.PAGE_QUERIES))
+def test_page_query_uses_index(con, name):
+    sql, params = queries.PAGE_QUERIES[name]
+    assert full_scans(con, sql, params) == []
+
+
+def test_plan_check_detects_full_scan(con):
+    assert full_scans(con, "SELECT * FROM contactos WHERE nombre = ?", ("x",))
+    assert full_scans(con, "SELECT * FROM export_logs e WHERE e.link_generado = ?", ("x",))
+
+
+def test_migration_normalizes_numpy_blob_keys():
+    con = sqlite3.connect(":memory:")
+    migrations.migrate(con, target=2)
+    con.execute(
+        "INSERT INTO contactos (link_auto, telefono, nombre, auto, precio, descripcion, id_link) "
+        "VALUES ('http://a', '9 11 22', 'A', 'Auto', 1, 'd', ?)",
+        ((7).to_bytes(8, "little"),),
+    )
+    con.commit()
+    migrations.migrate(con)
+    row = con.execute(
+        "SELECT telefono, typeof(id_link), id_link FROM contactos"
+    ).fetchone()
+    assert row == ("91122", "integer", 7)
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {"link_id": 1},
+        {"link_id": 1, "nombre": "ana", "auto": "haval", "telefono": "911"},
+        {"link_id": 1, "nombre": "a"},
+        {"telefono": "9123", "limit": 50},
+    ],
+)
+def test_contact_search_uses_index(con, filters):
+    sql, params = search.build_contact_query(con, **filters)
+    assert full_scans(con, sql, params) == []
+
+
+@pytest.mark.parametrize("order_by", search.SORT_COLUMNS)
+def test_contact_page_and_count_use_index(con, order_by):
+    filters = {"link_id": 1, "auto": "haval"}
+    sql, params = search.build_contact_query(
+        con, order_by=order_by, after=(1, 1), limit=50, **filters
+    )
+    assert full_scans(con, sql, params) == []
+    sql, params = search.build_count_query(con, link_id=1)
+    assert full_scans(con, sql, params) == []
+
+
+@pytest.mark.parametrize("text", ["", "k", "haval"])
+def test_link_picker_uses_index(con, text):
+    # links_contactos puede crecer con las campañas: el selector lee a lo más
+    # LIMIT filas en el orden de un índice (sin texto, el de la clave primaria
+    # en reversa) y no ordena la tabla completa.
+    sql, params = search.build_link_query(con, text)
+    plan = [row[-1] for row in con.execute("EXPLAIN QUERY PLAN " + sql, params)]
+    assert not [d for d in plan if "TEMP B-TREE" in d], plan
+    if text:
+        assert not [d for d in plan if re.fullmatch(r"SCAN (\w+)", d)], plan
+
+
+def test_unused_phone_index_is_dropped():
+    con = sqlite3.connect(":memory:")
+    migrations.migrate(con, target=8)
+    con.execute("CREATE INDEX IF NOT EXISTS idx_contactos_telefono ON contactos(telefono)")
+    migrations.migrate(con)
+    indexes = {r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert "idx_contactos_telefono" not in indexes and "idx_contactos_id_link" in indexes
@@ -0,0 +1,80 @@
+import gzip
+import io
+import re
+import sqlite3
+import zipfile
+
+from src import links, report
+
+MENSAJES = ["Hola {nombre} 1", "Hola {nombre} 2", "Hola {nombre} 3"]
+
+
+def make_db(count):
+    con = sqlite3.connect(":memory:")
+    con.execute("CREATE TABLE contactos (id INTEGER PRIMARY KEY, telefono TEXT, nombre TEXT, auto TEXT)")
+    con.executemany(
+        "INSERT INTO contactos (telefono, nombre, auto) VALUES (?, ?, ?)",
+        [(f"9 {i:08d}", f"N{i}", "" if i % 2 else f"Auto {i}") for i in range(count)],
+    )
+    return con
+
+
+def reference(con):
+    # Reporte armado de una vez, como lo hacía generate_html
+    rows = con.execute("SELECT * FROM contactos ORDER BY id").fetchall()
+    data = {"telefono": [r[1] for r in rows], "nombre": [r[2] for r in rows], "auto": [r[3] for r in rows]}
+    return b"".join(report.iter_report([data], MENSAJES, "T"))
+
+
+def test_chunked_report_matches_single_batch():
+    con = make_db(25)
+    batches = report.cursor_batches(con.execute("SELECT * FROM contactos ORDER BY id"), size=4)
+    streamed = b"".join(report.iter_report(batches, MENSAJES, "T"))
+    assert streamed == reference(con)
+    html = streamed.decode()
+    assert html.startswith("<html>") and html.endswith("</html>")
+    assert "CONTACTO 25</a> Auto 24<br>" in html and "CONTACTO 2</a> N1<br>" in html
+    assert "Hola%20N5%203" in html  # fila 6 usa el tercer mensaje
+
+
+def test_gzip_and_zip_parts():
+    con = make_db(12)
+    batches = report.cursor_batches(con.execute("SELECT * FROM contactos ORDER BY id"), size=5)
+    gz = b"".join(report.gzip_chunks(report.iter_report(batches, MENSAJES, "T")))
+    assert gzip.decompress(gz) == reference(con)
+
+    buffer = io.BytesIO()
+    batches = report.cursor_batches(con.execute("SELECT * FROM contactos ORDER BY id"), size=5)
+    assert report.write_zip(buffer, batches, MENSAJES, links_per_file=5, timestamp="T") == 3
+    with zipfile.ZipFile(buffer) as zf:
+        names = zf.namelist()
+        parts = [zf.read(name).decode() for name in names]
+    assert names == [f"REPORTE_T_parte_00{i}.html" for i in (1, 2, 3)]
+    numbers = [int(n) for part in parts for n in re.findall(r"CONTACTO (\d+)<", part)]
+    assert numbers == list(range(1, 13))
+    expected_links = re.findall(r'href="([^"]+)"', reference(con).decode())
+    assert [l for part in parts for l in re.findall(r'href="([^"]+)"', part)] == expected_links
+
+
+def test_export_report_reads_from_cursor():
+    con = make_db(3)
+    data, name, mime = report.export_report(con, "SELECT * FROM contactos ORDER BY id", [], MENSAJES, "HTML")
+    assert name.endswith(".html") and mime == "text/html"
+    assert links.WHATSAPP_URL + "900000002" in data.decode()
+    data, name, _ = report.export_report(con, "SELECT * FROM contactos WHERE id > ?", [5], MENSAJES, "ZIP por partes")
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert len(zf.namelist()) == 1
+
+
+def test_write_report_records_written_rows():
+    from src import exports
+
+    con = make_db(7)
+    recorder = exports.SelectionRecorder(MENSAJES, [1, 2, 3])
+    fileobj = io.BytesIO()
+    report.write_report(
+        fileobj, con, "SELECT * FROM contactos ORDER BY id DESC", [], MENSAJES, record=recorder.add
+    )
+    contact_ids, mensaje_ids, enlaces = recorder.rows()
+    assert contact_ids == [7, 6, 5, 4, 3, 2, 1] and mensaje_ids == [1, 2, 3, 1, 2, 3, 1]
+    assert enlaces == re.findall(r'href="([^"]+)"', fileobj.getvalue().decode())
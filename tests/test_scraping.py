@@ -1,46 +1,97 @@
-import sys
-from unittest import mock
 from unittest.mock import MagicMock, patch
 import pytest
 
-pytest.importorskip("bs4")
-from bs4 import BeautifulSoup
+pytest.importorskip("requests")
 
-# Mock unavailable modules so src.app can be imported
-sys.modules.setdefault("streamlit", MagicMock())
-sys.modules.setdefault("pandas", MagicMock())
-sys.modules.setdefault("requests", MagicMock())
+import src.ocr
+import src.scraping
+from src.http_cache import ResponseCache
+from src.images import ImageStore
 
-import src.app
+HTML = (
+    "<img src=\"data:image/png;base64,AA==\" />"
+    "<a href=\"https://wa.me/56911122233\">WhatsApp</a>"
+    "<div class=\"features-item-value-vehculo\">2021 TestCar</div>"
+    "<div class=\"features-item-value-precio\">$10,000</div>"
+    "<div class=\"view-more-container\"><div class=\"view-more-target\">"
+    "<p>Great car</p></div></div>"
+)
 
 
-def test_extract_whatsapp_number():
-    html = '<a href="https://wa.me/56912345678">Chat</a>'
-    soup = BeautifulSoup(html, "html.parser")
-    assert src.app.extract_whatsapp_number(soup) == "912345678"
+class MockResponse:
+    status_code = 200
+    content = HTML.encode("utf-8")
+    headers = {"ETag": '"v1"'}
+
+
+def test_whatsapp_number_from_link():
+    html = b'<a href="https://wa.me/56912345678?text=Hola">Chat</a><a href="https://wa.me/569">Corto</a>'
+    assert src.scraping.parse_vehicle_page(html)["whatsapp_number"] == "912345678"
+    assert src.scraping.parse_vehicle_page(b'<a href="https://wa.me/569">Corto</a>')["whatsapp_number"] == "No disponible"
 
 
 def test_scrape_vehicle_details(tmp_path):
-    html = (
-        "<img src=\"data:image/png;base64,AA==\" />"
-        "<a href=\"https://wa.me/56911122233\">WhatsApp</a>"
-        "<div class=\"features-item-value-vehculo\">2021 TestCar</div>"
-        "<div class=\"features-item-value-precio\">$10,000</div>"
-        "<div class=\"view-more-container\"><div class=\"view-more-target\">"
-        "<p>Great car</p></div></div>"
-    )
-
-    class MockResponse:
-        status_code = 200
-        content = html.encode("utf-8")
-
-    with patch.object(src.app.requests, "get", return_value=MockResponse()):
-        with patch("builtins.open", mock.mock_open()), \
-             patch("os.path.join", return_value=str(tmp_path / "img.png")):
-            data = src.app.scrape_vehicle_details("http://example.com")
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+    store = ImageStore(str(tmp_path / "images"))
+    with patch.object(src.scraping.get_client(), "get", return_value=MockResponse()):
+        data = src.scraping.scrape_vehicle_details("http://example.com", cache=cache, store=store)
 
     assert data["nombre"] == "2021 TestCar"
     assert data["whatsapp_number"] == "911122233"
     assert data["precio"] == "10,000"
     assert data["descripcion"] == "Great car"
-    assert data["contact_image_file"].endswith("img.png")
+    assert store.get(data["contact_image_hash"]) == b"\x00"
+    assert data["contact_image_file"] == store.path(data["contact_image_hash"])
+
+
+def test_scrape_uses_cache_and_revalidates(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+    store = ImageStore(str(tmp_path / "images"))
+    with patch.object(src.scraping.get_client(), "get", return_value=MockResponse()) as get:
+        first = src.scraping.scrape_vehicle_details("http://example.com/a?gts=1", cache=cache, store=store)
+        second = src.scraping.scrape_vehicle_details("http://example.com/a", cache=cache, store=store)
+        assert get.call_count == 1
+        assert not first["from_cache"] and second["from_cache"]
+        assert second["nombre"] == "2021 TestCar"
+
+        not_modified = MagicMock(status_code=304, headers={})
+        get.return_value = not_modified
+        third = src.scraping.scrape_vehicle_details(
+            "http://example.com/a", force_refresh=True, cache=cache, store=store
+        )
+        assert get.call_count == 2
+        assert get.call_args.kwargs["headers"]["If-None-Match"] == '"v1"'
+        assert third["nombre"] == "2021 TestCar"
+
+
+def test_parse_vehicle_page_reports_timings():
+    timings = {}
+    data = src.scraping.parse_vehicle_page(HTML.encode("utf-8"), timings=timings)
+    assert data["nombre"] == "2021 TestCar"
+    assert data["contact_image_b64"] == "AA=="
+    assert {"contact_image", "whatsapp", "descripcion", "_parse"} <= set(timings)
+
+
+class FakeContext:
+    def progress(self, fraction, mensaje=None, force=False):
+        pass
+
+
+@pytest.mark.parametrize("confianza, numero", [(0.9, "987654321"), (0.4, "No disponible")])
+def test_scrape_job_reads_phone_from_image(tmp_path, confianza, numero):
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+    store = ImageStore(str(tmp_path / "images"))
+    response = MockResponse()
+    response.content = HTML.replace("https://wa.me/56911122233", "/contacto").encode("utf-8")
+
+    def recognize_many(images, **kwargs):
+        return {digest: src.ocr.OcrResult("987654321", confianza, "9 8765 4321") for digest in images}
+
+    with patch.object(src.scraping.get_client(), "get", return_value=response), \
+            patch.object(src.scraping, "get_cache", return_value=cache), \
+            patch.object(src.scraping, "get_store", return_value=store), \
+            patch.object(src.ocr, "recognize_many", recognize_many):
+        data = src.scraping.scrape_job(FakeContext(), "http://example.com/ocr", usar_ocr=True)
+    # Bajo MIN_CONFIDENCE la lectura queda solo como sugerencia
+    assert data["whatsapp_number"] == numero
+    assert data["telefono_ocr"] == {"telefono": "987654321", "confianza": confianza, "texto": "9 8765 4321"}
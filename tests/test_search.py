@@ -0,0 +1,155 @@
+import sqlite3
+
+import pytest
+
+from src import migrations, search
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+
+@pytest.fixture
+def con():
+    con = sqlite3.connect(":memory:")
+    con.row_factory = sqlite3.Row
+    migrations.migrate(con)
+    if not search.fts_available(con):
+        pytest.skip("SQLite sin FTS5/trigram")
+    rows = [
+        ("http://1", "911111111", "Ana", "2021 Haval H6", 1),
+        ("http://2", "922222222", "Bruno", "2020 Changan CS35", 1),
+        ("http://3", "933333111", "Carla", "2022 Haval Jolion", 2),
+    ]
+    con.executemany(
+        "INSERT INTO contactos (link_auto, telefono, nombre, auto, precio, descripcion, id_link) "
+        "VALUES (?, ?, ?, ?, 1, 'd', ?)",
+        rows,
+    )
+    con.commit()
+    return con
+
+
+def ids(con, **kwargs):
+    sql, params = search.build_contact_query(con, **kwargs)
+    return sorted(row["id"] for row in con.execute(sql, params))
+
+
+def test_substring_search_matches_like(con):
+    assert ids(con, auto="haval") == [1, 3]
+    assert ids(con, auto="haval", link_id=1) == [1]
+    assert ids(con, telefono="3111") == [3]
+    assert ids(con, nombre="run", auto="chan") == [2]
+
+
+def test_short_terms_fall_back_to_like(con):
+    sql, _ = search.build_contact_query(con, nombre="ar")
+    assert "MATCH" not in sql
+    assert ids(con, nombre="ar") == [3]
+
+
+def test_triggers_keep_index_in_sync(con):
+    con.execute("UPDATE contactos SET auto = '2019 Kia Rio' WHERE id = 1")
+    con.execute("DELETE FROM contactos WHERE id = 3")
+    con.commit()
+    assert ids(con, auto="haval") == []
+    assert ids(con, auto="kia rio") == [1]
+
+
+def test_limit_and_quotes(con):
+    assert len(ids(con, telefono="111", limit=1)) == 1
+    assert ids(con, nombre='an"a') == []
+
+
+def pages(con, size, **kwargs):
+    """Recorre todas las páginas por clave y retorna los ids de cada una."""
+    result, after = [], None
+    while True:
+        sql, params = search.build_contact_query(con, after=after, limit=size, **kwargs)
+        rows = con.execute(sql, params).fetchall()
+        if not rows:
+            return result
+        result.append([row["id"] for row in rows])
+        order_by = kwargs["order_by"]
+        after = (rows[-1][order_by], rows[-1]["id"])
+
+
+@pytest.mark.parametrize("order_by", search.SORT_COLUMNS)
+@pytest.mark.parametrize("descending", [False, True])
+def test_keyset_pages_cover_everything_in_order(con, order_by, descending):
+    con.execute("UPDATE contactos SET nombre = 'Ana' WHERE id = 3")  # empate en nombre
+    con.commit()
+    sql, params = search.build_contact_query(con, order_by=order_by, descending=descending)
+    expected = [row["id"] for row in con.execute(sql, params)]
+    got = pages(con, 2, order_by=order_by, descending=descending)
+    assert [len(p) for p in got] == [2, 1]
+    assert sum(got, []) == expected
+
+
+def test_keyset_with_filters_and_count(con):
+    assert pages(con, 1, order_by="nombre", auto="haval") == [[1], [3]]
+    sql, params = search.build_count_query(con, auto="haval")
+    assert con.execute(sql, params).fetchone()[0] == 2
+    sql, params = search.build_count_query(con, link_id=1, nombre="a")
+    assert con.execute(sql, params).fetchone()[0] == 1
+
+
+def test_invalid_order_by(con):
+    with pytest.raises(ValueError):
+        search.build_contact_query(con, order_by="descripcion; DROP TABLE contactos")
+
+
+@pytest.mark.skipif(pd is None, reason="requiere pandas")
+def test_page_cursor_from_dataframe(con):
+    sql, params = search.build_contact_query(con, order_by="precio", limit=2)
+    page = pd.read_sql_query(sql, con, params=params)
+    after = search.page_cursor(page, "precio")
+    assert after == (1.0, 2) and type(after[0]) is float
+    sql, params = search.build_contact_query(con, order_by="precio", after=after)
+    assert [row["id"] for row in con.execute(sql, params)] == [3]
+
+
+def test_selection_descriptor_rebuilds_query(con):
+    selection = search.ContactSelection(1, "", "haval", "", "nombre", True, 0)
+    sql, params = search.selection_query(con, selection)
+    assert [row["id"] for row in con.execute(sql, params)] == [1]
+    sql, params = search.selection_count_query(con, selection._replace(link_id=None))
+    assert con.execute(sql, params).fetchone()[0] == 2
+
+
+@pytest.fixture
+def links_con(con):
+    con.executemany(
+        "INSERT INTO links_contactos (link_general, fecha_creacion, marca, descripcion) VALUES (?, '2024-01-01', ?, ?)",
+        [
+            ("http://a/haval", "Haval", "SUV usados"),
+            ("http://a/kia", "Kia", "Sedanes"),
+            ("http://a/hyundai", "hyundai", "Campaña SUV"),
+            ("http://a/kia2", "Kia", "Sedanes"),  # misma etiqueta, otro id
+        ],
+    )
+    con.commit()
+    return con
+
+
+def link_ids(con, text, limit=search.LINK_PICKER_LIMIT):
+    sql, params = search.build_link_query(con, text, limit)
+    return [row["id"] for row in con.execute(sql, params)]
+
+
+def test_link_picker_recent_prefix_and_fts(links_con):
+    assert link_ids(links_con, "") == [4, 3, 2, 1]
+    assert link_ids(links_con, "", limit=2) == [4, 3]
+    assert link_ids(links_con, "H") == [1, 3]  # prefijo de marca, sin distinguir mayúsculas
+    assert link_ids(links_con, "ki") == [2, 4]
+    assert sorted(link_ids(links_con, "suv")) == [1, 3]
+    assert link_ids(links_con, "a/kia2") == [4]
+
+
+def test_link_picker_follows_updates(links_con):
+    links_con.execute("UPDATE links_contactos SET descripcion = 'Camionetas' WHERE id = 1")
+    links_con.execute("DELETE FROM links_contactos WHERE id = 3")
+    links_con.commit()
+    assert link_ids(links_con, "suv") == []
+    assert link_ids(links_con, "camionetas") == [1]
@@ -0,0 +1,44 @@
+import urllib.parse
+
+from src.templates import compile_template
+
+CONTACTO = {"nombre": "José", "auto": "Toyota Yaris", "precio": 10500000.0, "telefono": "911"}
+
+
+def reference(template, contacto):
+    # Comportamiento anterior: re.sub sobre la plantilla y quote del mensaje completo
+    import re
+    texto = re.sub(r"{(.*?)}", lambda m: str(contacto.get(m.group(1), m.group(0))), template)
+    return urllib.parse.quote(texto)
+
+
+def test_render_matches_regex_and_full_quote():
+    for template in [
+        "Hola {nombre}, vi tu {auto} a ${precio} & más/?",
+        "Sin marcadores ñ",
+        "{nombre}{auto}",
+        "Hola {desconocido} y {} {nombre",
+        "",
+    ]:
+        plan = compile_template(template)
+        [encoded] = plan.render_columns({k: [v] for k, v in CONTACTO.items()}, 1)
+        assert encoded == reference(template, CONTACTO)
+        assert urllib.parse.unquote(encoded) == plan.render(CONTACTO)
+
+
+def test_render_columns_matches_per_row_render():
+    template = "Hola {nombre}: {auto} ({otro})"
+    columns = {"nombre": ["José", "Ana"], "auto": ["Toyota Yaris", "Kia & Co"]}
+    rendered = compile_template(template).render_columns(columns, 2)
+    assert rendered == [
+        reference(template, {"nombre": "José", "auto": "Toyota Yaris"}),
+        reference(template, {"nombre": "Ana", "auto": "Kia & Co"}),
+    ]
+    assert compile_template("fijo").render_columns({}, 3) == ["fijo"] * 3
+
+
+def test_plans_are_cached_and_report_unknown_fields():
+    plan = compile_template("Hola {nombre} {modelo} {modelo}")
+    assert compile_template("Hola {nombre} {modelo} {modelo}") is plan
+    assert plan.fields == ("nombre", "modelo", "modelo")
+    assert plan.unknown_fields(["nombre", "auto"]) == ["modelo"]
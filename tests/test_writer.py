@@ -0,0 +1,98 @@
+import sqlite3
+import threading
+
+import pytest
+
+from src import bulk, exports, migrations, writer
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "datos.db")
+    con = sqlite3.connect(path)
+    migrations.migrate(con)
+    con.execute(
+        "INSERT INTO links_contactos (link_general, fecha_creacion, marca, descripcion) "
+        "VALUES ('http://l', '2024-05-01', 'M', 'D')"
+    )
+    con.commit()
+    w = writer.Writer(path, window=0.05)
+    yield con, w
+    w.close()
+    con.close()
+
+
+def contacto(i):
+    return (f"http://auto/{i}", f"9{i}", "", "Auto", 1.0, "d", 1, None)
+
+
+def test_execute_returns_statement_result(db):
+    con, w = db
+    result = w.execute("INSERT INTO mensajes (descripcion) VALUES (?)", ("Hola",))
+    assert result.rowcount == 1
+    assert con.execute("SELECT descripcion FROM mensajes WHERE id = ?", (result.lastrowid,)).fetchone() == ("Hola",)
+
+
+def test_concurrent_commands_share_commits(db):
+    con, w = db
+    start = threading.Barrier(20)
+
+    def operador(i):
+        start.wait()
+        w.execute(bulk.INSERT_CONTACTO, contacto(i))
+
+    hilos = [threading.Thread(target=operador, args=(i,)) for i in range(20)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert con.execute("SELECT COUNT(*) FROM contactos").fetchone()[0] == 20
+    stats = w.stats()
+    assert stats["commands"] == 20 and stats["commits"] < 20
+
+
+def test_failed_command_only_affects_its_sender(db):
+    con, w = db
+    insert = "INSERT INTO contactos (link_auto, telefono, nombre, auto, precio, descripcion, id_link) VALUES (?, ?, ?, ?, ?, ?, ?)"
+    w.execute(insert, contacto(1)[:7])
+    futures = [
+        w.submit(writer.statement, insert, contacto(2)[:7]),
+        w.submit(writer.statement, insert, contacto(1)[:7]),  # link repetido
+        w.submit(writer.statement, insert, contacto(3)[:7]),
+    ]
+    assert futures[0].result().rowcount == 1
+    with pytest.raises(sqlite3.IntegrityError):
+        futures[1].result()
+    assert futures[2].result().rowcount == 1
+    links = [r[0] for r in con.execute("SELECT link_auto FROM contactos ORDER BY id")]
+    assert links == ["http://auto/1", "http://auto/2", "http://auto/3"]
+    assert w.stats()["errors"] == 1
+
+
+def test_functions_with_their_own_transactions(db):
+    con, w = db
+    assert w.call(bulk.insert_contacts, [contacto(i) for i in range(5)], batch_size=2) == 5
+    lote = w.call(exports.log_export, [1, 2], [10, 10], ["a", "b"], "HTML", fecha="2024-05-01")
+    assert lote.created
+    assert con.execute("SELECT COUNT(*) FROM export_logs").fetchone()[0] == 2
+
+
+def test_rollback_inside_command_undoes_only_that_command(db):
+    con, w = db
+
+    def arrepentido(c):
+        c.execute("INSERT INTO mensajes (descripcion) VALUES ('no')")
+        c.rollback()
+        return "ok"
+
+    w.execute("INSERT INTO mensajes (descripcion) VALUES ('si')")
+    assert w.call(arrepentido) == "ok"
+    assert [r[0] for r in con.execute("SELECT descripcion FROM mensajes")] == ["si"]
+
+
+def test_closed_writer_rejects_commands(db):
+    con, w = db
+    w.execute("INSERT INTO mensajes (descripcion) VALUES ('x')")
+    w.close()
+    with pytest.raises(RuntimeError):
+        w.execute("INSERT INTO mensajes (descripcion) VALUES ('y')")